@@ -2,14 +2,10 @@ from flask import Flask
 import os
 
 from config import Config
-from dotenv import load_dotenv
 from app.extensions import db
 from flask_migrate import Migrate
 
 
-
-import env_loader
-
 def create_app(config_class=Config):
 
     app = Flask(__name__)
@@ -21,6 +17,14 @@ def create_app(config_class=Config):
     # Initialize Flask extensions here
     db.init_app(app)
 
+    # Per-request temporary files are released when each request ends
+    from app.utils import temp_utils
+    temp_utils.init_app(app)
+
+    # Opt-in request profiling; nothing is installed unless PROFILING_ENABLED is set
+    from app.profiling import profiler
+    profiler.init_app(app)
+
 
      # Import models and blueprints after initializing the app and db
     from app import models 
@@ -33,9 +37,19 @@ def create_app(config_class=Config):
     from app.ai_model import bp as ai_model_bp
     app.register_blueprint(ai_model_bp, url_prefix='/ai-model')
 
-     # Create database tables
-    with app.app_context():
-        db.create_all() 
+    from app.registry_log import bp as registry_log_bp
+    app.register_blueprint(registry_log_bp, url_prefix='/registry-log')
+
+    from app.scrubber import bp as scrubber_bp
+    app.register_blueprint(scrubber_bp)
+
+    from app.profiling import bp as profiling_bp
+    app.register_blueprint(profiling_bp, url_prefix='/profiling')
+
+    # Schema is managed by Flask-Migrate; create tables directly only when asked to
+    if app.config.get('AUTO_CREATE_SCHEMA'):
+        with app.app_context():
+            db.create_all()
 
     @app.route('/test/')
     def test_page():
@@ -2,4 +2,4 @@ from flask import Blueprint
 
 bp = Blueprint('ai-model', __name__)
 
-from app.ai_model import routes
\ No newline at end of file
+from app.ai_model import routes, upload_sessions, commands
\ No newline at end of file
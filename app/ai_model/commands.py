@@ -0,0 +1,23 @@
+import click
+from flask import current_app
+
+from app.ai_model import bp
+from app.ai_model.upload_sessions import cleanup_abandoned_uploads
+from app.storage import get_storage
+
+
+@bp.cli.command('cleanup-uploads')
+@click.option('--max-age', type=int, default=None,
+              help="Seconds without a new part before a session is abandoned (default: UPLOAD_SESSION_MAX_AGE).")
+@click.option('--dry-run', is_flag=True, help="Only list what would be aborted.")
+def cleanup_uploads(max_age, dry_run):
+    """Abort abandoned upload sessions and the multipart uploads they left in storage."""
+    max_age = current_app.config['UPLOAD_SESSION_MAX_AGE'] if max_age is None else max_age
+    sessions, uploads = cleanup_abandoned_uploads(get_storage(), max_age, dry_run=dry_run)
+
+    action = 'Would abort' if dry_run else 'Aborted'
+    for session_id in sessions:
+        click.echo(f"{action} upload session {session_id}")
+    for key, upload_id in uploads:
+        click.echo(f"{action} multipart upload {upload_id}" + (f" of {key}" if key else ""))
+    click.echo(f"{action} {len(sessions)} session(s) and {len(uploads)} orphaned upload(s).")
@@ -1,28 +1,35 @@
-from flask import request, jsonify, after_this_request
+from flask import request, jsonify, current_app
 from app.ai_model import bp
-from app.utils.metadata_utils import extract_metadata_from_form, validate_metadata, extract_metadata, update_metadata_fields
-from app.merkle_tree import build_tree, read_leaves_from_file, verify_model_integrity
+from app.utils.metadata_utils import extract_metadata_from_form, validate_metadata, extract_metadata, update_metadata_fields, extract_hash_options, extract_chunking_options
+from app.utils.search_utils import parse_search_filters, search_model_metadata
+from app.utils.bulk_utils import bulk_update_versions, parse_bulk_selection, parse_bulk_updates
+from app.utils.cache_utils import get_subtree_cache
+from app.utils.stream_utils import stream_json_list
+from app.utils.admission_utils import DOWNLOAD, UPLOAD, admission_controlled, admission_stats
+from app.merkle_tree import build_tree, read_leaves_from_stream, verify_model_integrity
+from app.storage import get_storage, model_key, tree_key
+from app.storage.compression import normalize_compression, put_object
+from app.utils.repair_utils import repair_download
+from app.utils.redirect_utils import ensure_verified, redirect_response, wants_redirect
+from app.utils.fetch_utils import fetch_and_verify
+from app.scrubber.scrub import STATUS_CORRUPT, STATUS_MISSING, STATUS_OK
+from app.utils.temp_utils import detach, spooled_file, upload_stream, workspace_path
 from werkzeug.utils import secure_filename
-import boto3
+import json
 import os
 from botocore.exceptions import NoCredentialsError
 from sqlalchemy.exc import IntegrityError
-from config import Config
 from app.models.modelmetadata import ModelMetadata
+from app.registry_log.log import append_model_version
 from app.extensions import db
 from flask import  send_file
-import time
 
+# Rows fetched per round trip when streaming list responses
+STREAM_BATCH_SIZE = 500
 
 
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=Config.AWS_ACCESS_KEY,
-    aws_secret_access_key=Config.AWS_SECRET_KEY,
-    region_name=Config.AWS_REGION
-)
-
 @bp.route('/upload/', methods=['POST'])
+@admission_controlled(UPLOAD)
 def upload_model():
     if 'file' not in request.files:
         return jsonify({'error': "No file part of request"}), 400
@@ -51,37 +58,36 @@ def upload_model():
     if not version:
         return jsonify({'error': "Version is a required field and cannot be None."}), 400
 
-    # Define the custom temporary directory path
-    temp_dir = os.path.join(os.getcwd(), 'temp')
-    if not os.path.exists(temp_dir):
-        os.makedirs(temp_dir)
-
-    # Construct the full path for the temporary file
-    temp_file_path = os.path.join(temp_dir, sanitized_filename)
-
-    # Save the file temporarily with the sanitized file name
-    file.save(temp_file_path)
-
-    # Check if the file is saved properly
-    if not os.path.exists(temp_file_path):
-        return jsonify({'error': f"File {sanitized_filename} was not saved properly to {temp_file_path}"}), 500
+    # Check the version is new before anything is written, so a duplicate cannot overwrite the stored object
+    if ModelMetadata.query.filter_by(model_name=sanitized_filename, version=version).first():
+        return jsonify({'error': f"Version '{version}' already exists for model '{sanitized_filename}'."}), 400
 
+    # Hash algorithm for the Merkle tree, recorded with the version
     try:
-        # Step 1: Read the leaves from the saved file
-        leaves = read_leaves_from_file(temp_file_path)
-
-        # Step 2: Generate Merkle Tree and save it to a file
-        merkle_tree_file = os.path.join(temp_dir, f"{sanitized_filename}_merkle.tree")
-        root = build_tree(leaves, merkle_tree_file)
+        hash_algorithm, hash_params = extract_hash_options(
+            current_app.config['MERKLE_HASH_ALGORITHM'], current_app.config.get('MERKLE_HASH_PARAMS'))
+        chunking = extract_chunking_options(current_app.config.get('MERKLE_CHUNKING'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        # Upload the file to S3
-        s3_client.upload_file(temp_file_path, Config.S3_BUCKET, f"models/{sanitized_filename}_v{version}")
-        s3_url = f"https://{Config.S3_BUCKET}.s3.{Config.AWS_REGION}.amazonaws.com/models/{sanitized_filename}_v{version}"
+    # Read the upload where the form parser spooled it, privately for this request
+    uploaded_file = upload_stream(file)
 
-        # Optional Step: Upload the Merkle Tree file to S3
-        s3_client.upload_file(merkle_tree_file, Config.S3_BUCKET, f"merkle_trees/{sanitized_filename}_v{version}_merkle.tree")
-
-        # Create a new metadata record
+    try:
+        # Step 1: Read the leaves from the uploaded file
+        leaves = read_leaves_from_stream(uploaded_file, chunking, hash_algorithm, hash_params)
+
+        # Step 2: Generate Merkle Tree and save it to a file in the request's workspace
+        merkle_tree_file = workspace_path(f"{sanitized_filename}_merkle.tree")
+        root = build_tree(leaves, merkle_tree_file, hash_algorithm, hash_params, get_subtree_cache())
+
+        # Create the metadata record and insert it before anything is stored: a concurrent upload of the
+        # same version then fails (or waits on the row and fails) here, never after overwriting the object
+        storage = get_storage()
+        compression, compression_level = normalize_compression(
+            current_app.config['STORAGE_COMPRESSION'], current_app.config.get('STORAGE_COMPRESSION_LEVEL'))
+        s3_key = model_key(sanitized_filename, version)
+        s3_url = storage.url(s3_key)
         new_metadata = ModelMetadata(
             model_name=sanitized_filename,
             version=version,
@@ -89,20 +95,42 @@ def upload_model():
             accuracy=accuracy,
             s3_url=s3_url,
             merkle_root=root.hashValue,
+            hash_algorithm=hash_algorithm,
+            hash_params=json.dumps(hash_params) if hash_params else None,
+            chunking=json.dumps(chunking) if chunking else None,
+            compression=compression,
             change_log=metadata.get('change_log', '')
         )
-
         db.session.add(new_metadata)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'error': f"Version '{version}' already exists for model '{sanitized_filename}'."}), 400
+
+        # Upload the file to the configured storage backend, compressing it on the way if configured
+        uploaded_file.seek(0)
+        original_size, stored_size = put_object(storage, s3_key, uploaded_file, compression, compression_level)
+        new_metadata.original_size = original_size
+        new_metadata.stored_size = stored_size
+        new_metadata.compression_ratio = original_size / stored_size if stored_size else None
+
+        # Optional Step: Upload the Merkle Tree file
+        with open(merkle_tree_file, 'rb') as tree_file:
+            put_object(storage, tree_key(sanitized_filename, version), tree_file, compression, compression_level)
+
+        # Record the new version in the registry transparency log within the same transaction
+        append_model_version(new_metadata)
         db.session.commit()
 
-        # Remove temporary files after uploading
-        os.remove(temp_file_path)
-        os.remove(merkle_tree_file)
-
         return jsonify({
             'message': f'{sanitized_filename} uploaded successfully!',
             's3_url': s3_url,
-            'merkle_root': root.hashValue
+            'merkle_root': root.hashValue,
+            'hash_algorithm': hash_algorithm,
+            'chunking': chunking,
+            'compression': compression,
+            'stored_size': stored_size
         }), 200
 
     except IntegrityError:
@@ -115,22 +143,45 @@ def upload_model():
 @bp.route('/models/', methods=['GET'])
 def list_models():
     try:
-        # Step 1: Query the database for all model metadata entries
-        metadata_list = ModelMetadata.query.all()
+        # Step 1: Query the database for all model metadata entries, reading rows in batches
+        metadata_rows = ModelMetadata.query.order_by(ModelMetadata.id).yield_per(STREAM_BATCH_SIZE)
 
-        print(metadata_list, "metadataList")
-        
-        # Step 2: Convert each model metadata entry to a dictionary
-        models = [model.to_dict() for model in metadata_list]
-        
-        # Step 3: Return the list of models as a JSON response
-        return jsonify({'models': models}), 200
+        # Step 2: Stream each entry as it is read (JSON, or NDJSON with ?format=ndjson)
+        return stream_json_list('models', metadata_rows, ModelMetadata.to_dict)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     
 
 
+# Search model versions by name prefix, accuracy range, deprecation, upload date and free text.
+@bp.route('/search', methods=['GET'])
+def search_models():
+    try:
+        # Step 1: Parse and validate the filters from the query string
+        filters, error = parse_search_filters(request.args)
+        if error:
+            return jsonify({'error': error}), 400
+
+        # Step 2: Run the indexed query
+        results = search_model_metadata(filters)
+
+        return jsonify({
+            'models': [model.to_dict() for model in results],
+            'count': len(results),
+            'limit': filters['limit'],
+            'offset': filters['offset']
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _download_size(model_name, version):
+    return db.session.query(ModelMetadata.original_size) \
+        .filter_by(model_name=model_name, version=version).scalar()
+
+
 @bp.route('/download/<model_name>/<version>', methods=['GET'])
+@admission_controlled(DOWNLOAD, cost=_download_size)
 def download_model(model_name, version):
     try:
         # Step 1: Check if the model with the given name and version exists in the database
@@ -143,50 +194,83 @@ def download_model(model_name, version):
         s3_url = model_metadata.s3_url
         stored_merkle_root = model_metadata.merkle_root
 
-        # Step 3: Define the temporary local filename for the model download
+        # Step 3: Define the download filename and locate the stored object
         sanitized_filename = f"{model_name}_v{version}"
-        temp_dir = os.path.join(os.getcwd(), 'temp')
-
-        # Create the directory if it does not exist
-        if not os.path.exists(temp_dir):
-            os.makedirs(temp_dir)
-
-        local_filename = os.path.join(temp_dir, sanitized_filename)
-
-        # Step 4: Download the model file from S3 to the temporary location
-        s3_key = f"models/{sanitized_filename}"
-        s3_client.download_file(Config.S3_BUCKET, s3_key, local_filename)
-
-        # Step 5: Verify the integrity of the downloaded file using the stored Merkle root
-        is_verified = verify_model_integrity(local_filename, stored_merkle_root)
+        storage = get_storage()
+        s3_key = model_key(model_name, version)
+
+        # In redirect mode the client fetches the object from storage directly once it is known to match
+        # its Merkle root; compressed objects are still served through the app, which decompresses them.
+        # A versioned bucket gets a URL for exactly the version verified
+        if wants_redirect(request.args) and model_metadata.compression in (None, 'none'):
+            expires_in = current_app.config['DOWNLOAD_PRESIGNED_EXPIRY']
+            presigned_url = storage.presigned_url(s3_key, expires_in, filename=sanitized_filename)
+            if presigned_url is not None:
+                status, error, stored_version = ensure_verified(storage, model_metadata)
+                if status == STATUS_MISSING:
+                    return jsonify({'error': f'Stored file for model {model_name} version {version} is missing.'}), 404
+                if status == STATUS_CORRUPT:
+                    return jsonify({'error': 'Model integrity verification failed. The file might be corrupted.'}), 400
+                if status != STATUS_OK:
+                    return jsonify({'error': error}), 500
+                if stored_version is not None and stored_version['version_id']:
+                    presigned_url = storage.presigned_url(s3_key, expires_in, filename=sanitized_filename,
+                                                          version_id=stored_version['version_id'])
+                return redirect_response(presigned_url, model_metadata, expires_in, stored_version)
+
+        # Uncompressed objects already on the local filesystem are verified and served in place,
+        # letting the server hand the file to the client with sendfile instead of copying it.
+        # The file is opened once, so the bytes sent are the bytes verified even if the key is rewritten
+        stored_path = storage.local_path(s3_key) if model_metadata.compression in (None, 'none') else None
+        if stored_path is not None:
+            stored_file = open(stored_path, 'rb')
+            try:
+                is_verified = verify_model_integrity(stored_file, stored_merkle_root,
+                                                     chunking=model_metadata.get_chunking(),
+                                                     **model_metadata.merkle_options())
+                if not is_verified:
+                    stored_file.close()
+                    return jsonify({'error': 'Model integrity verification failed. The file might be corrupted.'}), 400
+                stored_file.seek(0)
+                response = send_file(stored_file, as_attachment=True, download_name=sanitized_filename)
+                response.content_length = os.fstat(stored_file.fileno()).st_size
+                return response
+            except BaseException:
+                stored_file.close()
+                raise
+
+        # Step 4 and 5: Download the model file from storage into a buffer private to this request as
+        # concurrent byte ranges, decompressing it on the way if it was stored compressed, and verify it
+        # against the stored Merkle root while the remaining ranges are still arriving
+        downloaded_file = spooled_file()
+        is_verified = fetch_and_verify(storage, model_metadata, downloaded_file)
+
+        # If it fails, locate the corrupted chunks with the stored Merkle tree and re-fetch only those
+        if not is_verified:
+            is_verified = repair_download(storage, model_metadata, downloaded_file)
 
         if not is_verified:
-            # If the verification fails, delete the local file and return an error
-            os.remove(local_filename)
             return jsonify({'error': 'Model integrity verification failed. The file might be corrupted.'}), 400
 
-        # Schedule the file to be deleted after the response is sent
-        @after_this_request
-        def cleanup(response):
-            try:
-                # Delay to ensure the file is no longer being used
-                time.sleep(1)
-                os.remove(local_filename)
-                print(f"File {local_filename} successfully deleted.")
-            except Exception as e:
-                print(f"Error deleting file: {e}")
-            return response
-
-        # Step 6: If verification is successful, return the file to the user as a downloadable attachment
-        return send_file(local_filename, as_attachment=True, download_name=sanitized_filename)
+        # Step 6: If verification is successful, return the file to the user as a downloadable attachment;
+        # the response closes the buffer once it has been sent
+        downloaded_file.seek(0, os.SEEK_END)
+        file_size = downloaded_file.tell()
+        downloaded_file.seek(0)
+        response = send_file(detach(downloaded_file), as_attachment=True, download_name=sanitized_filename)
+        response.content_length = file_size
+        return response
     
     except NoCredentialsError:
         return jsonify({'error': 'Credentials not available to access S3'}), 403
+    except FileNotFoundError:
+        return jsonify({'error': f'Stored file for model {model_name} version {version} is missing.'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @bp.route('/models/<model_name>/versions', methods=['POST'])
+@admission_controlled(UPLOAD)
 def add_new_version(model_name):
     try:
         # Check if a file is provided in the request
@@ -205,6 +289,14 @@ def add_new_version(model_name):
         if validation_error:
             return jsonify({'error': validation_error}), 400
 
+        # Hash algorithm for the Merkle tree, recorded with the version
+        try:
+            hash_algorithm, hash_params = extract_hash_options(
+                current_app.config['MERKLE_HASH_ALGORITHM'], current_app.config.get('MERKLE_HASH_PARAMS'))
+            chunking = extract_chunking_options(current_app.config.get('MERKLE_CHUNKING'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
         version = metadata['version']
         accuracy = metadata['accuracy']
 
@@ -222,39 +314,23 @@ def add_new_version(model_name):
         original_filename = file.filename
         sanitized_filename = secure_filename(f"{model_name}_v{version}")
 
-        # Define the custom temporary directory path
-        temp_dir = os.path.join(os.getcwd(), 'temp')
-
-        # Create the directory if it does not exist
-        if not os.path.exists(temp_dir):
-            os.makedirs(temp_dir)
-
-        # Construct the full path for the temporary file
-        temp_file_path = os.path.join(temp_dir, sanitized_filename)
-
-        # Save the file temporarily with the sanitized file name
-        file.save(temp_file_path)
-
-        # Check if the file is saved properly
-        if not os.path.exists(temp_file_path):
-            return jsonify({'error': f"File {sanitized_filename} was not saved properly to {temp_file_path}"}), 500
-
-        # Step 1: Read the leaves from the saved file
-        leaves = read_leaves_from_file(temp_file_path)
+        # Read the upload where the form parser spooled it, privately for this request
+        uploaded_file = upload_stream(file)
 
-        # Step 2: Generate Merkle Tree and save it to a file
-        merkle_tree_file = os.path.join(temp_dir, f"{sanitized_filename}_merkle.tree")
-        root = build_tree(leaves, merkle_tree_file)
+        # Step 1: Read the leaves from the uploaded file
+        leaves = read_leaves_from_stream(uploaded_file, chunking, hash_algorithm, hash_params)
 
-        # Step 3: Upload the model file to S3 with the versioned path
-        s3_key = f"models/{model_name}_v{version}"
-        s3_client.upload_file(temp_file_path, Config.S3_BUCKET, s3_key)
-        s3_url = f"https://{Config.S3_BUCKET}.s3.{Config.AWS_REGION}.amazonaws.com/{s3_key}"
+        # Step 2: Generate Merkle Tree and save it to a file in the request's workspace
+        merkle_tree_file = workspace_path(f"{sanitized_filename}_merkle.tree")
+        root = build_tree(leaves, merkle_tree_file, hash_algorithm, hash_params, get_subtree_cache())
 
-        # Step 4: Upload the Merkle Tree file to S3
-        s3_client.upload_file(merkle_tree_file, Config.S3_BUCKET, f"merkle_trees/{sanitized_filename}_merkle.tree")
-
-        # Step 5: Create a new metadata record for the version
+        # Step 3: Create a new metadata record for the version and insert it before anything is stored,
+        # so a concurrent upload of the same version fails here instead of overwriting the object
+        storage = get_storage()
+        compression, compression_level = normalize_compression(
+            current_app.config['STORAGE_COMPRESSION'], current_app.config.get('STORAGE_COMPRESSION_LEVEL'))
+        s3_key = model_key(model_name, version)
+        s3_url = storage.url(s3_key)
         new_metadata = ModelMetadata(
             model_name=model_name,
             version=version,
@@ -262,20 +338,42 @@ def add_new_version(model_name):
             accuracy=float(accuracy),
             s3_url=s3_url,
             merkle_root=root.hashValue,
+            hash_algorithm=hash_algorithm,
+            hash_params=json.dumps(hash_params) if hash_params else None,
+            chunking=json.dumps(chunking) if chunking else None,
+            compression=compression,
             change_log=metadata.get('change_log', '')  # Adding the change_log to metadata
         )
-
         db.session.add(new_metadata)
-        db.session.commit()
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'error': f"Version '{version}' already exists for model '{model_name}'."}), 400
 
-        # Remove temporary files after uploading
-        os.remove(temp_file_path)
-        os.remove(merkle_tree_file)
+        # Step 4: Upload the model file to storage with the versioned path, compressing it on the way if configured
+        uploaded_file.seek(0)
+        original_size, stored_size = put_object(storage, s3_key, uploaded_file, compression, compression_level)
+        new_metadata.original_size = original_size
+        new_metadata.stored_size = stored_size
+        new_metadata.compression_ratio = original_size / stored_size if stored_size else None
+
+        # Step 5: Upload the Merkle Tree file
+        with open(merkle_tree_file, 'rb') as tree_file:
+            put_object(storage, tree_key(model_name, version), tree_file, compression, compression_level)
+
+        # Record the new version in the registry transparency log within the same transaction
+        append_model_version(new_metadata)
+        db.session.commit()
 
         return jsonify({
             'message': f'New version {version} for model {model_name} uploaded successfully!',
             's3_url': s3_url,
-            'merkle_root': root.hashValue
+            'merkle_root': root.hashValue,
+            'hash_algorithm': hash_algorithm,
+            'chunking': chunking,
+            'compression': compression,
+            'stored_size': stored_size
         }), 200
 
     except IntegrityError:
@@ -342,6 +440,13 @@ def get_model_version(model_name, version):
             'accuracy': model_metadata.accuracy,
             's3_url': model_metadata.s3_url,
             'merkle_root': model_metadata.merkle_root,
+            'hash_algorithm': model_metadata.hash_algorithm,
+            'hash_params': model_metadata.get_hash_params(),
+            'chunking': model_metadata.get_chunking(),
+            'compression': model_metadata.compression,
+            'original_size': model_metadata.original_size,
+            'stored_size': model_metadata.stored_size,
+            'compression_ratio': model_metadata.compression_ratio,
             'upload_date': model_metadata.upload_date,
             'change_log': model_metadata.change_log
         }), 200
@@ -350,31 +455,39 @@ def get_model_version(model_name, version):
         return jsonify({'error': str(e)}), 500
     
 
+def _version_summary(version):
+    return {
+        'version': version.version,
+        'description': version.description,
+        'accuracy': version.accuracy,
+        's3_url': version.s3_url,
+        'merkle_root': version.merkle_root,
+        'hash_algorithm': version.hash_algorithm,
+        'hash_params': version.get_hash_params(),
+        'chunking': version.get_chunking(),
+        'compression': version.compression,
+        'original_size': version.original_size,
+        'stored_size': version.stored_size,
+        'compression_ratio': version.compression_ratio,
+        'upload_date': version.upload_date,
+        'change_log': version.change_log
+    }
+
+
 # Lists all versions of a specific model along with their metadata.
 @bp.route('/models/<model_name>/versions', methods=['GET'])
 def list_model_versions(model_name):
     try:
-        # Query for all versions of the given model
-        versions = ModelMetadata.query.filter_by(model_name=model_name).all()
-        
-        if not versions:
+        # Check that the model has at least one version before starting the response
+        if db.session.query(ModelMetadata.id).filter_by(model_name=model_name).first() is None:
             return jsonify({'error': f'No versions found for model {model_name}.'}), 404
 
-        # Create a list of metadata for each version
-        version_list = []
-        for version in versions:
-            version_list.append({
-                'version': version.version,
-                'description': version.description,
-                'accuracy': version.accuracy,
-                's3_url': version.s3_url,
-                'merkle_root': version.merkle_root,
-                'upload_date': version.upload_date,
-                'change_log': version.change_log
-            })
-
-        # Return the list of versions and their metadata
-        return jsonify({'model_name': model_name, 'versions': version_list}), 200
+        # Query for all versions of the given model, reading rows in batches
+        versions = ModelMetadata.query.filter_by(model_name=model_name) \
+            .order_by(ModelMetadata.id).yield_per(STREAM_BATCH_SIZE)
+
+        # Stream the metadata of each version as it is read
+        return stream_json_list('versions', versions, _version_summary, fields={'model_name': model_name})
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -405,5 +518,74 @@ def deprecate_model_version(model_name, version):
         return jsonify({'error': str(e)}), 500
 
 
+def _bulk_update(payload, updates):
+    # Step 1: Read which versions to change, by (model_name, version) pairs and/or search filters
+    pairs, filters, error = parse_bulk_selection(payload)
+    if error:
+        return jsonify({'error': error}), 400
+
+    # Step 2: Apply the change with set-based UPDATE statements and commit once
+    try:
+        updated, unmatched = bulk_update_versions(pairs, filters, updates)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'A database integrity error occurred. Please check the input values or constraints.'}), 400
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return jsonify({
+        'updated_count': len(updated),
+        'updated': [{'model_name': name, 'version': version} for name, version in updated],
+        'unmatched': [{'model_name': name, 'version': version} for name, version in unmatched]
+    }), 200
+
+
+# Update the metadata of many versions in one transaction, selected by pairs and/or search filters.
+@bp.route('/models/bulk-update', methods=['POST'])
+def bulk_update_version_metadata():
+    try:
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({'error': 'Request body must be a JSON object.'}), 400
+
+        updates, error = parse_bulk_updates(payload.get('updates'))
+        if error:
+            return jsonify({'error': error}), 400
+        return _bulk_update(payload, updates)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# Deprecate many versions in one transaction, selected by pairs and/or search filters.
+@bp.route('/models/bulk-deprecate', methods=['POST'])
+def bulk_deprecate_model_versions():
+    try:
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({'error': 'Request body must be a JSON object.'}), 400
+        return _bulk_update(payload, {'deprecated': True})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 
+# Hit rates of the Merkle subtree cache, for this worker and for all workers sharing the cache file
+@bp.route('/subtree-cache/stats', methods=['GET'])
+def subtree_cache_stats():
+    try:
+        cache = get_subtree_cache()
+        if cache is None:
+            return jsonify({'enabled': False}), 200
+        return jsonify({'enabled': True, **cache.stats()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
+
+# Slots in use, queue depth and rejections of the upload and download admission limits
+@bp.route('/admission/stats', methods=['GET'])
+def admission_control_stats():
+    try:
+        return jsonify(admission_stats()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,445 @@
+# app/ai_model/upload_sessions.py
+"""
+Resumable uploads of new model versions.
+
+A client creates a session, PUTs numbered parts in any order (and in parallel), asks which parts
+have arrived, and finalizes with the number of parts. Each part is split into fixed-size leaves
+and hashed as it arrives; every part but the last is a power-of-two number of leaves, so it is
+one perfect subtree of the version's Merkle tree and finalizing only combines the stored part
+hashes, never rereading the file; the tree file is written from the stored levels of the parts.
+Parts go straight to the storage driver's multipart upload. Every upload of a part is recorded with
+the token the driver returned for it, and finalizing checks that storage still holds those uploads,
+so concurrent uploads of one part number cannot pair the leaves of one with the bytes of another.
+Sessions nobody finishes are aborted by `flask ai-model cleanup-uploads`.
+"""
+import datetime
+import json
+import uuid
+
+from botocore.exceptions import NoCredentialsError
+from flask import current_app, jsonify, request
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
+
+from app.ai_model import bp
+from app.extensions import db
+from app.merkle_tree import MerkleAccumulator, iter_chunks, tree_levels, write_tree_levels
+from app.merkle_tree.chunking import CHUNKING_FIXED
+from app.merkle_tree.digest import get_hash_function
+from app.models.modelmetadata import ModelMetadata
+from app.models.upload_session import UploadPart, UploadSession
+from app.registry_log.log import append_model_version
+from app.storage import PartMismatchError, get_storage, model_key, tree_key
+from app.storage.compression import COMPRESSION_NONE, put_object
+from app.utils.admission_utils import UPLOAD, admission_controlled
+from app.utils.metadata_utils import extract_hash_options
+from app.utils.temp_utils import spooled_file, workspace_path
+
+# Part numbers S3 multipart uploads accept
+MAX_PART_NUMBER = 10000
+
+STATUS_OPEN = 'open'
+STATUS_COMPLETED = 'completed'
+STATUS_ABORTED = 'aborted'
+
+
+def _part_geometry():
+    """
+    Configured (leaf size, part size) of new sessions.
+    :raises ValueError: If the part size is not a power-of-two multiple of the leaf size.
+    """
+    leaf_size = current_app.config['UPLOAD_LEAF_SIZE']
+    part_size = current_app.config['UPLOAD_PART_SIZE']
+    leaves_per_part = part_size // leaf_size if leaf_size > 0 else 0
+    if leaves_per_part < 1 or part_size % leaf_size or leaves_per_part & (leaves_per_part - 1):
+        raise ValueError("UPLOAD_PART_SIZE must be a power-of-two multiple of UPLOAD_LEAF_SIZE.")
+    return leaf_size, part_size
+
+
+def _leaf_chunking(upload_session):
+    return {'method': CHUNKING_FIXED, 'size': upload_session.leaf_size}
+
+
+def _part_frontier(nodes, leaf_count):
+    """
+    MerkleAccumulator frontier of a part, read off the levels of its subtree: the root of each
+    perfect subtree, tallest first.
+    """
+    frontier = []
+    offset = 0
+    for height in range(leaf_count.bit_length() - 1, -1, -1):
+        if leaf_count >> height & 1:
+            frontier.append([height, nodes[height][offset >> height]])
+            offset += 1 << height
+    return frontier
+
+
+def _combined_levels(upload_session, parts, hash_function):
+    """
+    Levels of the version's tree from the levels of its parts. Below the height of a full part they
+    are the parts' levels side by side, a short last part carrying its root up; above it they pair
+    the part roots.
+    """
+    part_height = (upload_session.part_size // upload_session.leaf_size).bit_length() - 1
+    # Parts recorded before their levels were stored are rehashed from their leaves
+    part_levels = [part.get_nodes() or tree_levels(list(map(hash_function, part.get_leaves())), hash_function)
+                   for part in parts]
+    levels = [[node for nodes in part_levels for node in nodes[min(height, len(nodes) - 1)]]
+              for height in range(part_height)]
+    return levels + tree_levels([nodes[-1][0] for nodes in part_levels], hash_function)
+
+
+def _abort(storage, upload_session):
+    """
+    Discard the stored parts of a session, then close it.
+    """
+    storage.abort_multipart(
+        model_key(upload_session.model_name, upload_session.version), upload_session.storage_upload_id,
+        [(part.part_number, part.storage_token) for part in upload_session.parts])
+    upload_session.status = STATUS_ABORTED
+    upload_session.parts.clear()
+    db.session.commit()
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _open_session(session_id):
+    """
+    Look up a session that still accepts parts.
+    :return: A tuple (session, error response or None).
+    """
+    upload_session = db.session.get(UploadSession, session_id)
+    if upload_session is None:
+        return None, (jsonify({'error': f'Upload session {session_id} not found.'}), 404)
+    if upload_session.status != STATUS_OPEN:
+        return None, (jsonify({'error': f'Upload session {session_id} is {upload_session.status}.'}), 409)
+    return upload_session, None
+
+
+@bp.route('/uploads', methods=['POST'])
+def create_upload_session():
+    try:
+        payload = request.get_json(silent=True) or {}
+
+        # Step 1: Validate the metadata of the new version
+        model_name = secure_filename(str(payload.get('model_name') or '')).replace(" ", "_")
+        if not model_name:
+            return jsonify({'error': "model_name is a required field and cannot be None."}), 400
+        version = payload.get('version')
+        if not version:
+            return jsonify({'error': "Version is a required field and cannot be None."}), 400
+        version = str(version)
+        if payload.get('accuracy') is None:
+            return jsonify({'error': "Accuracy is a required field and cannot be None."}), 400
+        try:
+            accuracy = float(payload['accuracy'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Accuracy must be a valid number.'}), 400
+
+        try:
+            hash_algorithm, hash_params = extract_hash_options(
+                current_app.config['MERKLE_HASH_ALGORITHM'], current_app.config.get('MERKLE_HASH_PARAMS'),
+                source=payload)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if ModelMetadata.query.filter_by(model_name=model_name, version=version).first():
+            return jsonify({'error': f"Version '{version}' already exists for model '{model_name}'."}), 400
+
+        # Step 2: Start the multipart upload in storage and record the session
+        leaf_size, part_size = _part_geometry()
+        storage_upload_id = get_storage().create_multipart(model_key(model_name, version))
+        upload_session = UploadSession(
+            id=uuid.uuid4().hex,
+            model_name=model_name,
+            version=version,
+            description=payload.get('description', ''),
+            accuracy=accuracy,
+            change_log=payload.get('change_log', ''),
+            hash_algorithm=hash_algorithm,
+            hash_params=json.dumps(hash_params) if hash_params else None,
+            leaf_size=leaf_size,
+            part_size=part_size,
+            storage_upload_id=storage_upload_id,
+            status=STATUS_OPEN
+        )
+        db.session.add(upload_session)
+        db.session.commit()
+
+        return jsonify(upload_session.to_dict()), 201
+
+    except NoCredentialsError:
+        return jsonify({'error': 'Credentials not available'}), 403
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/uploads/<session_id>/parts/<int:part_number>', methods=['PUT'])
+@admission_controlled(UPLOAD)
+def upload_part(session_id, part_number):
+    try:
+        upload_session, error = _open_session(session_id)
+        if error:
+            return error
+        if not 1 <= part_number <= MAX_PART_NUMBER:
+            return jsonify({'error': f'Part numbers run from 1 to {MAX_PART_NUMBER}.'}), 400
+        too_large = f'Parts are at most {upload_session.part_size} bytes.'
+        if request.content_length and request.content_length > upload_session.part_size:
+            return jsonify({'error': too_large}), 400
+
+        # Step 1: Buffer the part while hashing each of its leaves as it arrives
+        hash_function = get_hash_function(upload_session.hash_algorithm, upload_session.get_hash_params())
+        part_file = spooled_file()
+        leaves = []
+        leaf_hashes = []
+        size = 0
+        for chunk in iter_chunks(request.stream, _leaf_chunking(upload_session)):
+            size += len(chunk)
+            if size > upload_session.part_size:
+                return jsonify({'error': too_large}), 400
+            part_file.write(chunk)
+            leaf = hash_function(chunk)
+            leaves.append(leaf)
+            leaf_hashes.append(hash_function(leaf))
+        if not size:
+            return jsonify({'error': 'Parts cannot be empty.'}), 400
+        nodes = tree_levels(leaf_hashes, hash_function)
+
+        # Step 2: Store this upload of the part, identified by the token the driver returns. The upload
+        # recorded so far is read first, so one recorded while this one is being stored is never replaced
+        part = db.session.get(UploadPart, (session_id, part_number))
+        replaced = part is not None
+        replaced_token = part.storage_token if replaced else None
+        storage = get_storage()
+        s3_key = model_key(upload_session.model_name, upload_session.version)
+        part_file.seek(0)
+        storage_token = storage.put_part(s3_key, upload_session.storage_upload_id, part_number, part_file)
+
+        # Step 3: Record its leaves and subtree. The upload read above is only replaced if no concurrent
+        # upload replaced it first; the upload that loses the race is discarded
+        values = {
+            'size': size,
+            'leaves': '\n'.join(leaves),
+            'nodes': json.dumps(nodes),
+            'frontier': json.dumps(_part_frontier(nodes, len(leaves))),
+            'storage_token': storage_token,
+        }
+        if not replaced:
+            db.session.add(UploadPart(session_id=session_id, part_number=part_number, **values))
+        else:
+            query = UploadPart.query.filter_by(session_id=session_id, part_number=part_number).filter(
+                UploadPart.storage_token.is_(None) if replaced_token is None
+                else UploadPart.storage_token == replaced_token)
+            if not query.update(values, synchronize_session=False):
+                db.session.rollback()
+                storage.discard_part(s3_key, upload_session.storage_upload_id, part_number, storage_token)
+                return jsonify({'error': f'Part {part_number} is being uploaded concurrently. Please retry.'}), 409
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # The same part was first recorded by a concurrent upload
+            db.session.rollback()
+            storage.discard_part(s3_key, upload_session.storage_upload_id, part_number, storage_token)
+            return jsonify({'error': f'Part {part_number} is being uploaded concurrently. Please retry.'}), 409
+        if replaced and replaced_token != storage_token:
+            storage.discard_part(s3_key, upload_session.storage_upload_id, part_number, replaced_token)
+
+        return jsonify({
+            'session_id': session_id,
+            'part_number': part_number,
+            'size': size,
+            'leaf_count': len(leaves)
+        }), 200
+
+    except NoCredentialsError:
+        return jsonify({'error': 'Credentials not available'}), 403
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/uploads/<session_id>', methods=['GET'])
+def get_upload_session(session_id):
+    try:
+        upload_session = db.session.get(UploadSession, session_id)
+        if upload_session is None:
+            return jsonify({'error': f'Upload session {session_id} not found.'}), 404
+
+        return jsonify(upload_session.to_dict()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/uploads/<session_id>/complete', methods=['POST'])
+def complete_upload_session(session_id):
+    try:
+        upload_session, error = _open_session(session_id)
+        if error:
+            return error
+        model_name, version = upload_session.model_name, upload_session.version
+
+        # Step 1: Check that the parts cover the file: numbered 1..part_count, all full but the last.
+        # The client states the count, since a missing final part cannot be told apart from a shorter file
+        payload = request.get_json(silent=True) or {}
+        try:
+            part_count = int(payload['part_count'])
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': "part_count is a required field and must be an integer."}), 400
+        if not 1 <= part_count <= MAX_PART_NUMBER:
+            return jsonify({'error': f'part_count must be between 1 and {MAX_PART_NUMBER}.'}), 400
+        parts = list(upload_session.parts)
+        received = {part.part_number for part in parts}
+        missing = sorted(set(range(1, part_count + 1)) - received)
+        if missing:
+            return jsonify({'error': 'Some parts are missing.', 'missing_parts': missing}), 400
+        unexpected = sorted(received - set(range(1, part_count + 1)))
+        if unexpected:
+            return jsonify({'error': f'Parts were uploaded beyond part {part_count}.',
+                            'unexpected_parts': unexpected}), 400
+        short = [part.part_number for part in parts[:-1] if part.size != upload_session.part_size]
+        if short:
+            return jsonify({'error': f'Every part but the last must be {upload_session.part_size} bytes.',
+                            'short_parts': short}), 400
+
+        if ModelMetadata.query.filter_by(model_name=model_name, version=version).first():
+            return jsonify({'error': f"Version '{version}' already exists for model '{model_name}'."}), 400
+
+        # Step 2: Combine the part subtrees into the Merkle root
+        hash_algorithm, hash_params = upload_session.hash_algorithm, upload_session.get_hash_params()
+        accumulator = MerkleAccumulator(hash_algorithm, hash_params)
+        for part in parts:
+            for height, node in part.get_frontier():
+                accumulator.append_subtree(node, height)
+        merkle_root = accumulator.root()
+
+        # Step 3: Write the tree file from the stored levels of the parts; its root must be the combined one
+        levels = _combined_levels(upload_session, parts, get_hash_function(hash_algorithm, hash_params))
+        if levels[-1][0] != merkle_root:
+            return jsonify({'error': 'The part hashes do not combine into the Merkle tree of their leaves.'}), 500
+        leaves = [leaf for part in parts for leaf in part.get_leaves()]
+        merkle_tree_file = workspace_path(f"{model_name}_v{version}_merkle.tree")
+        write_tree_levels(leaves, levels, merkle_tree_file, hash_algorithm, hash_params)
+
+        # Step 4: Create the metadata record and insert it before anything is assembled, so a concurrent
+        # upload of the same version fails here instead of overwriting the object
+        storage = get_storage()
+        s3_key = model_key(model_name, version)
+        s3_url = storage.url(s3_key)
+        size = sum(part.size for part in parts)
+        chunking = _leaf_chunking(upload_session)
+        new_metadata = ModelMetadata(
+            model_name=model_name,
+            version=version,
+            description=upload_session.description,
+            accuracy=upload_session.accuracy,
+            s3_url=s3_url,
+            merkle_root=merkle_root,
+            hash_algorithm=hash_algorithm,
+            hash_params=upload_session.hash_params,
+            chunking=json.dumps(chunking),
+            compression=COMPRESSION_NONE,
+            original_size=size,
+            stored_size=size,
+            compression_ratio=1.0,
+            change_log=upload_session.change_log
+        )
+        db.session.add(new_metadata)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'error': f"Version '{version}' already exists for model '{model_name}'."}), 400
+
+        # Step 5: Assemble the recorded uploads of the parts in storage and upload the tree file next to
+        # them. Parts whose stored copy is no longer the recorded one are dropped, to be sent again
+        try:
+            storage.complete_multipart(s3_key, upload_session.storage_upload_id,
+                                       [(part.part_number, part.storage_token) for part in parts])
+        except PartMismatchError as e:
+            db.session.rollback()
+            UploadPart.query.filter(UploadPart.session_id == session_id,
+                                    UploadPart.part_number.in_(e.part_numbers)).delete(synchronize_session=False)
+            db.session.commit()
+            return jsonify({'error': 'Some parts were replaced by concurrent uploads. Please upload them again.',
+                            'missing_parts': e.part_numbers}), 409
+        with open(merkle_tree_file, 'rb') as tree_file:
+            put_object(storage, tree_key(model_name, version), tree_file, COMPRESSION_NONE)
+
+        # Step 6: Log the version, closing the session in the same transaction
+        append_model_version(new_metadata)
+
+        upload_session.status = STATUS_COMPLETED
+        upload_session.parts.clear()
+        db.session.commit()
+
+        return jsonify({
+            'message': f'{model_name} version {version} uploaded successfully!',
+            's3_url': s3_url,
+            'merkle_root': merkle_root,
+            'hash_algorithm': hash_algorithm,
+            'chunking': chunking,
+            'compression': COMPRESSION_NONE,
+            'stored_size': size
+        }), 200
+
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'A database integrity error occurred. Please check for duplicate entries or other constraints.'}), 400
+    except NoCredentialsError:
+        return jsonify({'error': 'Credentials not available'}), 403
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/uploads/<session_id>', methods=['DELETE'])
+def abort_upload_session(session_id):
+    try:
+        upload_session, error = _open_session(session_id)
+        if error:
+            return error
+
+        # Discard the stored parts, then close the session
+        _abort(get_storage(), upload_session)
+
+        return jsonify({'message': f'Upload session {session_id} aborted.'}), 200
+
+    except NoCredentialsError:
+        return jsonify({'error': 'Credentials not available'}), 403
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def cleanup_abandoned_uploads(storage, max_age, dry_run=False):
+    """
+    Abort open upload sessions that received nothing for `max_age` seconds, then multipart uploads
+    left in storage that long without an open session (e.g. when recording a new session failed).
+    Must run inside an application context.
+    :param storage: A StorageBackend.
+    :param max_age: Seconds without a new part after which an open session counts as abandoned.
+    :param dry_run: Only report what would be aborted.
+    :return: A tuple (ids of the sessions aborted, (key or None, upload id) of the uploads aborted).
+    """
+    cutoff = _now() - datetime.timedelta(seconds=max_age)
+    last_part = db.session.query(UploadPart.session_id, db.func.max(UploadPart.received_at).label('received_at')) \
+        .group_by(UploadPart.session_id).subquery()
+    abandoned = UploadSession.query.outerjoin(last_part, last_part.c.session_id == UploadSession.id) \
+        .filter(UploadSession.status == STATUS_OPEN, UploadSession.updated_at < cutoff,
+                db.or_(last_part.c.received_at.is_(None), last_part.c.received_at < cutoff)) \
+        .order_by(UploadSession.created_at).all()
+    sessions = []
+    for upload_session in abandoned:
+        sessions.append(upload_session.id)
+        if not dry_run:
+            _abort(storage, upload_session)
+
+    open_uploads = {upload_id for (upload_id,) in
+                    db.session.query(UploadSession.storage_upload_id).filter_by(status=STATUS_OPEN)}
+    uploads = []
+    for key, upload_id, initiated in storage.list_multipart_uploads():
+        if upload_id in open_uploads or initiated >= cutoff:
+            continue
+        uploads.append((key, upload_id))
+        if not dry_run:
+            storage.abort_multipart(key, upload_id, [])
+    return sessions, uploads
@@ -1,7 +1,12 @@
 # app/auth/utils.py
-import jwt
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from flask import request, jsonify, current_app
+
+import jwt
+from flask import request, jsonify, current_app, g, has_app_context
 from functools import wraps
 
 # Function to generate JWT token
@@ -23,21 +28,202 @@ def decode_jwt_token(token):
     except jwt.InvalidTokenError:
         return {'error': 'Invalid token'}
 
+
+class TTLCache:
+    """
+    A small thread-safe LRU cache whose entries expire at an absolute time.
+    Entries can be tagged with a user id so they can be dropped together. Every drop bumps the
+    user's generation, so a value read from the database before the drop is not cached after it.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._by_user = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, user_id = entry
+            if expires_at <= now:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def generation(self, user_id):
+        """
+        Current generation of a user's entries; take it before reading the value to cache.
+        """
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def set(self, key, value, expires_at=None, user_id=None, generation=None):
+        """
+        Store a value until `expires_at` (epoch seconds), capped by the cache TTL.
+        :param generation: The user's generation when the value was read; the value is dropped
+                           if the user was invalidated since.
+        """
+        if self.max_size <= 0:
+            return
+        deadline = time.time() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        with self._lock:
+            if generation is not None and generation != self._generations.get(user_id, 0):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, deadline, user_id)
+            if user_id is not None:
+                self._by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            for key in list(self._by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        _, _, user_id = self._entries.pop(key)
+        if user_id is not None:
+            keys = self._by_user.get(user_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_user[user_id]
+
+
+def _secret_fingerprint(secret):
+    if isinstance(secret, str):
+        secret = secret.encode('utf-8')
+    return hashlib.sha256(secret or b'').digest()
+
+
+def get_auth_caches(app=None):
+    """
+    Return the (claims cache, user cache) pair for the application, creating them on first use.
+    Both caches are flushed whenever the SECRET_KEY changes.
+    """
+    app = app or current_app
+    caches = app.extensions.get('jwt_cache')
+    fingerprint = _secret_fingerprint(app.config.get('SECRET_KEY'))
+    if caches is None:
+        caches = {
+            'claims': TTLCache(app.config.get('JWT_CACHE_SIZE', 1024), app.config.get('JWT_CACHE_TTL', 300)),
+            'users': TTLCache(app.config.get('JWT_USER_CACHE_SIZE', 1024), app.config.get('JWT_USER_CACHE_TTL', 60)),
+            'fingerprint': fingerprint,
+        }
+        app.extensions['jwt_cache'] = caches
+    elif caches['fingerprint'] != fingerprint:
+        # Secret rotation: claims validated with the old secret must not be trusted any more
+        caches['claims'].clear()
+        caches['users'].clear()
+        caches['fingerprint'] = fingerprint
+    return caches['claims'], caches['users']
+
+
+def invalidate_user_cache(user_id):
+    """
+    Drop cached claims and the cached role/status for a user, e.g. after deactivation.
+    Call it once the change is committed. Other worker processes keep their entries for up to
+    JWT_USER_CACHE_TTL seconds.
+    """
+    if user_id is None or not has_app_context():
+        return
+    claims_cache, user_cache = get_auth_caches()
+    claims_cache.invalidate_user(user_id)
+    user_cache.invalidate_user(user_id)
+
+
+def authenticate_token(token):
+    """
+    Validate a token, serving the claims from the cache when the same token was seen recently.
+    :param token: The encoded JWT.
+    :return: The decoded payload, or a dict with an 'error' key.
+    """
+    claims_cache, _ = get_auth_caches()
+    key = hashlib.sha256(token.encode('utf-8')).digest()
+
+    payload = claims_cache.get(key)
+    if payload is not None:
+        return payload
+
+    payload = decode_jwt_token(token)
+    if 'error' not in payload:
+        claims_cache.set(key, payload, expires_at=payload.get('exp'), user_id=payload.get('user_id'))
+    return payload
+
+
+def get_user_status(user_id):
+    """
+    Look up (role, is_active) for a user, cached for JWT_USER_CACHE_TTL seconds.
+    :return: The tuple, or None if the user does not exist.
+    """
+    _, user_cache = get_auth_caches()
+    status = user_cache.get(user_id)
+    if status is not None:
+        return status
+    generation = user_cache.generation(user_id)
+
+    from app.extensions import db
+    from app.models.user import User
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    status = (user.role, bool(user.is_active))
+    user_cache.set(user_id, status, user_id=user_id, generation=generation)
+    return status
+
+
 # Decorator to protect routes
-def jwt_required(f):
+def jwt_required(f=None, roles=None, check_active=False):
+    """
+    Protect a route with a bearer token.
+    Can be used bare (`@jwt_required`) or with options (`@jwt_required(roles=['Admin'])`).
+    :param roles: Optional list of roles allowed to call the route; implies an active-user check.
+    :param check_active: Reject tokens belonging to deactivated users.
+    """
+    if f is None:
+        return lambda func: jwt_required(func, roles=roles, check_active=check_active)
+
     @wraps(f)
     def decorated_function(*args, **kwargs):
         auth_header = request.headers.get('Authorization')
         if not auth_header:
             return jsonify({'error': 'Authorization header is missing'}), 401
-        
+
         try:
             token = auth_header.split()[1]  # Split "Bearer <token>"
-            payload = decode_jwt_token(token)
+            payload = authenticate_token(token)
             if 'error' in payload:
                 return jsonify({'error': payload['error']}), 401
         except IndexError:
             return jsonify({'error': 'Token is missing or invalid'}), 401
 
+        if roles or check_active:
+            status = get_user_status(payload.get('user_id'))
+            if status is None or not status[1]:
+                return jsonify({'error': 'User is inactive or does not exist'}), 401
+            if roles and status[0] not in roles:
+                return jsonify({'error': 'Insufficient permissions'}), 403
+
+        g.jwt_payload = payload
         return f(*args, **kwargs)
     return decorated_function
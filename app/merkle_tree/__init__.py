@@ -1,5 +1,9 @@
 # merkle_tree/__init__.py
 
 # Import necessary functions or classes from this package
-from .build_tree import build_tree, MerkleTreeNode
-from .utils import read_leaves_from_file, write_tree_to_file, verify_model_integrity
+from .build_tree import build_tree, compute_root, tree_levels, write_tree_levels, MerkleTreeNode
+from .utils import read_leaves_from_file, read_leaves_from_stream, write_tree_to_file, verify_model_integrity
+from .multiproof import build_multiproof, verify_multiproof, compute_levels
+from .accumulator import MerkleAccumulator
+from .subtree_cache import SubtreeCache
+from .chunking import iter_chunks, normalize_chunking
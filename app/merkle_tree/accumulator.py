@@ -0,0 +1,84 @@
+# accumulator.py
+from .digest import DEFAULT_ALGORITHM, get_hash_function, normalize_hash_params
+
+
+class MerkleAccumulator:
+    """
+    Append-only Merkle tree builder that never holds more than O(log n) hashes.
+    It keeps a frontier of perfect subtree roots, one per set bit of the leaf count.
+    Folding them from right to left gives the same root as build_tree over the same leaves,
+    because carrying an unpaired node up a level splits the tree along those same subtrees.
+    """
+
+    def __init__(self, algorithm=DEFAULT_ALGORITHM, hash_params=None):
+        self.algorithm, self.hash_params = normalize_hash_params(algorithm, hash_params)
+        self._hash = get_hash_function(self.algorithm, self.hash_params)
+        self.leaf_count = 0
+        # (height, hash) of each perfect subtree, tallest first
+        self._frontier = []
+
+    def append(self, leaf):
+        """
+        Add a leaf value.
+        :param leaf: The leaf value as a string.
+        """
+        self.append_hash(self._hash(leaf))
+
+    def append_hash(self, leaf_hash):
+        """
+        Add a leaf whose hash has already been computed.
+        """
+        self.append_subtree(leaf_hash, 0)
+
+    def append_subtree(self, subtree_hash, height):
+        """
+        Add the root of a perfect subtree of 2**height leaves.
+        The leaves appended so far must end on a multiple of 2**height.
+        """
+        if self.leaf_count % (1 << height):
+            raise ValueError(f"A subtree of height {height} cannot start at leaf {self.leaf_count}.")
+        self.leaf_count += 1 << height
+
+        node = subtree_hash
+        while self._frontier and self._frontier[-1][0] == height:
+            _, left = self._frontier.pop()
+            node = self._hash(left + node)
+            height += 1
+        self._frontier.append((height, node))
+
+    def root(self):
+        """
+        Return the root hash of all leaves appended so far, or None if there are none.
+        """
+        if not self._frontier:
+            return None
+        node = self._frontier[-1][1]
+        for _, left in reversed(self._frontier[:-1]):
+            node = self._hash(left + node)
+        return node
+
+    def snapshot(self):
+        """
+        Return a JSON-serializable snapshot of the accumulator state.
+        """
+        return {
+            'algorithm': self.algorithm,
+            'hash_params': self.hash_params,
+            'leaf_count': self.leaf_count,
+            'frontier': [[height, node] for height, node in self._frontier],
+        }
+
+    @classmethod
+    def restore(cls, snapshot):
+        """
+        Rebuild an accumulator from a snapshot taken with `snapshot()`.
+        """
+        accumulator = cls(snapshot.get('algorithm', DEFAULT_ALGORITHM), snapshot.get('hash_params'))
+        frontier = [(int(height), node) for height, node in snapshot['frontier']]
+        expected = [height for height in range(int(snapshot['leaf_count']).bit_length() - 1, -1, -1)
+                    if int(snapshot['leaf_count']) >> height & 1]
+        if [height for height, _ in frontier] != expected:
+            raise ValueError("Snapshot frontier does not match its leaf count.")
+        accumulator.leaf_count = int(snapshot['leaf_count'])
+        accumulator._frontier = frontier
+        return accumulator
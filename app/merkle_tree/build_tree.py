@@ -1,40 +1,111 @@
+import operator
 
-import hashlib
+from .digest import DEFAULT_ALGORITHM, describe, get_hash_function
+
+# First line of tree files, recording the hash algorithm used for every node
+TREE_HEADER_PREFIX = "Hash algorithm: "
 
 class MerkleTreeNode:
-    def __init__(self, value):
+    def __init__(self, value, hash_function=None):
         self.left = None
         self.right = None
         self.value = value
-        self.hashValue = hashlib.sha256(value.encode('utf-8')).hexdigest()
+        self.hashValue = (hash_function or get_hash_function())(value)
 
-def build_tree(leaves, output_file_path):
+def build_tree(leaves, output_file_path, algorithm=DEFAULT_ALGORITHM, hash_params=None, cache=None):
     """
     Build a Merkle Tree from a list of leaves and write the structure to a file.
-    
+
     :param leaves: List of string leaves.
     :param output_file_path: Path to the file where the tree structure will be written.
+    :param algorithm: Hash algorithm for leaves and parents (see digest.SUPPORTED_ALGORITHMS).
+    :param hash_params: Optional algorithm parameters, e.g. {'digest_size': 32}.
+    :param cache: Optional SubtreeCache; the nodes of aligned chunks it already holds are read back
+                  instead of hashed, and the nodes of the others are recorded in it.
     :return: The root node of the Merkle Tree.
     """
-    nodes = [MerkleTreeNode(leaf) for leaf in leaves]
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves.")
+
+    hash_function = get_hash_function(algorithm, hash_params)
+    if cache is None:
+        levels = tree_levels(list(map(hash_function, leaves)), hash_function)
+    else:
+        levels = cache.tree_levels(leaves, algorithm, hash_params)
+    return write_tree_levels(leaves, levels, output_file_path, algorithm, hash_params)
+
 
+def write_tree_levels(leaves, levels, output_file_path, algorithm=DEFAULT_ALGORITHM, hash_params=None):
+    """
+    Write the tree file of leaves whose node hashes are already known.
+
+    :param leaves: List of string leaves.
+    :param levels: Node hashes level by level, from the leaf hashes up, as returned by tree_levels.
+                   Levels may repeat a lone node that is carried up, as long as the last one is the root.
+    :param output_file_path: Path to the file where the tree structure will be written.
+    :param algorithm: Hash algorithm the hashes were computed with.
+    :param hash_params: Optional algorithm parameters, e.g. {'digest_size': 32}.
+    :return: The root node of the Merkle Tree.
+    """
+    hash_function = get_hash_function(algorithm, hash_params)
+    # Leaves are their own values; a parent's value is its children's hashes concatenated
+    values = leaves
     with open(output_file_path, "w") as f:
-        while len(nodes) != 1:
-            temp = []
-            for i in range(0, len(nodes), 2):
-                node1 = nodes[i]
-                if i + 1 < len(nodes):
-                    node2 = nodes[i + 1]
-                else:
-                    temp.append(nodes[i])
-                    break
-                f.write(f"Left child: {node1.value} | Hash: {node1.hashValue}\n")
-                f.write(f"Right child: {node2.value} | Hash: {node2.hashValue}\n")
-                concatenated_hash = node1.hashValue + node2.hashValue
-                parent = MerkleTreeNode(concatenated_hash)
-                parent.left = node1
-                parent.right = node2
-                f.write(f"Parent (concatenation of {node1.value} and {node2.value}): {parent.value} | Hash: {parent.hashValue}\n")
-                temp.append(parent)
-            nodes = temp
-    return nodes[0]
+        f.write(f"{TREE_HEADER_PREFIX}{describe(algorithm, hash_params)}\n")
+        for height, level in enumerate(levels[:-1]):
+            parents = levels[height + 1]
+            concatenated = list(map(operator.add, level[0::2], level[1::2]))
+            f.writelines(
+                f"Left child: {values[i]} | Hash: {level[i]}\n"
+                f"Right child: {values[i + 1]} | Hash: {level[i + 1]}\n"
+                f"Parent (concatenation of {values[i]} and {values[i + 1]}): {concatenated[i // 2]} | Hash: {parents[i // 2]}\n"
+                for i in range(0, len(level) - 1, 2)
+            )
+            # An unpaired last node is carried up with its value
+            values = concatenated + list(values[-1:]) if len(level) % 2 else concatenated
+
+    return MerkleTreeNode(values[0], hash_function)
+
+
+def tree_levels(level, hash_function):
+    """
+    Every level of node hashes from `level` up to the root, pairing nodes as build_tree does:
+    an unpaired last node is carried up unchanged.
+    """
+    levels = [level]
+    while len(level) > 1:
+        carried = level[-1:] if len(level) % 2 else []
+        level = list(map(hash_function, map(operator.add, level[0::2], level[1::2]))) + carried
+        levels.append(level)
+    return levels
+
+
+def compute_root(leaves, algorithm=DEFAULT_ALGORITHM, hash_params=None, cache=None):
+    """
+    Compute the Merkle root of a list of leaves without building nodes or writing the tree.
+    Gives the same root as build_tree, keeping only one level of hashes in memory at a time.
+
+    :param leaves: List of string leaves.
+    :param algorithm: Hash algorithm for leaves and parents (see digest.SUPPORTED_ALGORITHMS).
+    :param hash_params: Optional algorithm parameters, e.g. {'digest_size': 32}.
+    :param cache: Optional SubtreeCache reusing the hashes of unchanged aligned subtrees.
+    :return: The root hash as a hexadecimal string.
+    """
+    if cache is not None:
+        return cache.compute_root(leaves, algorithm, hash_params)
+
+    hash_function = get_hash_function(algorithm, hash_params)
+    return fold_hashes(list(map(hash_function, leaves)), hash_function)
+
+
+def fold_hashes(level, hash_function):
+    """
+    Reduce one level of node hashes to the root, pairing nodes as build_tree does.
+    """
+    if not level:
+        raise ValueError("Cannot build a Merkle tree without leaves.")
+
+    while len(level) > 1:
+        carried = level[-1:] if len(level) % 2 else []
+        level = list(map(hash_function, map(operator.add, level[0::2], level[1::2]))) + carried
+    return level[0]
@@ -0,0 +1,265 @@
+# chunking.py
+"""
+Content-defined chunking of binary files into Merkle leaves.
+
+Comma-separated leaves (and fixed-size blocks) all shift when bytes are inserted near the start
+of a file, so every later leaf hash changes. Here cut points are chosen by the content itself,
+FastCDC style: a gear hash over a 32-byte rolling window is tested against two masks, a stricter
+one before the average chunk size and a looser one after it ("normalized chunking"), within the
+configured minimum and maximum sizes. An insertion then only changes the chunks around it.
+
+Each chunk becomes a leaf holding the hexadecimal digest of its bytes, so trees, tree files,
+proofs and the subtree cache work on these leaves exactly as on comma-separated ones.
+
+Fixed-size chunks are supported as well. They do not resist insertions, but their leaves line up
+with fixed-size upload parts, so each part can be hashed on its own (see app.ai_model.upload_sessions).
+
+The window hash of every position is computed with numpy when it is installed (well over
+100 MB/s per core, see benchmarks/bench_chunking.py); otherwise a pure Python loop gives
+identical cut points, only far slower.
+"""
+import hashlib
+import json
+from bisect import bisect_left
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+CHUNKING_FASTCDC = 'fastcdc'
+CHUNKING_FIXED = 'fixed'
+CHUNKING_METHODS = (CHUNKING_FASTCDC, CHUNKING_FIXED)
+
+DEFAULT_MIN_SIZE = 16 * 1024
+DEFAULT_AVG_SIZE = 64 * 1024
+DEFAULT_MAX_SIZE = 256 * 1024
+DEFAULT_FIXED_SIZE = 1024 * 1024
+
+# Bytes read from the stream at a time, and hashed at a time (small enough to stay in cache)
+_BLOCK_SIZE = 4 * 1024 * 1024
+_HASH_BLOCK_SIZE = 64 * 1024
+# A 32-bit gear hash shifted once per byte depends on exactly the last 32 bytes
+_WINDOW = 32
+_MASK32 = (1 << 32) - 1
+
+# Fixed pseudo-random value per byte; part of the chunk format, so it must never change
+_GEAR = [int.from_bytes(hashlib.sha256(bytes([b])).digest()[:4], 'big') for b in range(256)]
+_GEAR_ARRAY = np.array(_GEAR, dtype=np.uint32) if np is not None else None
+
+
+def normalize_chunking(params):
+    """
+    Validate chunking parameters.
+    :param params: None (comma-separated leaves), a method name for its defaults, or a dict (or JSON
+                   string) with 'method' and its sizes in bytes: optional 'min_size', 'avg_size' and
+                   'max_size' for 'fastcdc', optional 'size' for 'fixed'.
+    :return: A dict with the method and all its sizes, or None for comma-separated leaves.
+    :raises ValueError: If the method or a size is not supported.
+    """
+    if isinstance(params, str):
+        params = params.strip()
+        if params.startswith('{'):
+            params = json.loads(params)
+        else:
+            params = {'method': params} if params else None
+    if not params or params.get('method') in (None, '', 'none'):
+        return None
+
+    params = dict(params)
+    method = str(params.pop('method')).lower()
+    if method not in CHUNKING_METHODS:
+        raise ValueError(f"Unsupported chunking '{method}'. Choose one of: none, {', '.join(CHUNKING_METHODS)}.")
+    unknown = set(params) - ({'size'} if method == CHUNKING_FIXED else {'min_size', 'avg_size', 'max_size'})
+    if unknown:
+        raise ValueError(f"Unsupported chunking parameter(s): {', '.join(sorted(unknown))}.")
+
+    if method == CHUNKING_FIXED:
+        try:
+            size = int(params.get('size', DEFAULT_FIXED_SIZE))
+        except (TypeError, ValueError):
+            raise ValueError("Chunk sizes must be integers.")
+        if size < 1:
+            raise ValueError("size must be at least 1 byte.")
+        return {'method': method, 'size': size}
+
+    try:
+        min_size = int(params.get('min_size', DEFAULT_MIN_SIZE))
+        avg_size = int(params.get('avg_size', DEFAULT_AVG_SIZE))
+        max_size = int(params.get('max_size', DEFAULT_MAX_SIZE))
+    except (TypeError, ValueError):
+        raise ValueError("Chunk sizes must be integers.")
+    if not 256 <= avg_size <= 1 << 30 or avg_size & (avg_size - 1):
+        raise ValueError("avg_size must be a power of two between 256 bytes and 1 GiB.")
+    if not _WINDOW <= min_size <= avg_size <= max_size:
+        raise ValueError(f"Chunk sizes must satisfy {_WINDOW} <= min_size <= avg_size <= max_size.")
+    return {'method': method, 'min_size': min_size, 'avg_size': avg_size, 'max_size': max_size}
+
+
+def _masks(avg_size):
+    # Mask bits are the top bits of the hash, which depend on the most window bytes; the
+    # looser mask's bits are a subset of the stricter one's
+    bits = avg_size.bit_length() - 1
+    strict = (_MASK32 << (32 - bits - 2)) & _MASK32
+    loose = (_MASK32 << (32 - bits + 2)) & _MASK32
+    return strict, loose
+
+
+def _candidates_numpy(data, context, offset, strict, loose):
+    strict_positions = []
+    loose_positions = []
+    scratch = np.empty(_HASH_BLOCK_SIZE + _WINDOW, dtype=np.uint32)
+    for start in range(0, len(data), _HASH_BLOCK_SIZE):
+        window = context + data[start:start + _HASH_BLOCK_SIZE]
+        hashes = _GEAR_ARRAY.take(np.frombuffer(window, dtype=np.uint8))
+        # Sum of gear[byte] << age over the last 32 bytes, doubling the covered span on every pass
+        size = len(hashes)
+        span = 1
+        # A window shorter than the span (a tiny block read at the start) has nothing left to add
+        while span < _WINDOW and span < size:
+            shifted = scratch[:size - span]
+            np.left_shift(hashes[:-span], np.uint32(span), out=shifted)
+            np.add(hashes[span:], shifted, out=hashes[span:])
+            span *= 2
+        hashes = hashes[len(context):]
+        base = offset + start
+        matches = np.flatnonzero((hashes & np.uint32(loose)) == 0)
+        loose_positions.extend((matches + base).tolist())
+        strict_positions.extend((matches[(hashes[matches] & np.uint32(strict)) == 0] + base).tolist())
+        context = window[-(_WINDOW - 1):]
+    return strict_positions, loose_positions
+
+
+def _candidates_python(data, context, offset, strict, loose):
+    strict_positions = []
+    loose_positions = []
+    fingerprint = 0
+    for byte in context:
+        fingerprint = ((fingerprint << 1) + _GEAR[byte]) & _MASK32
+    for position, byte in enumerate(data, offset):
+        fingerprint = ((fingerprint << 1) + _GEAR[byte]) & _MASK32
+        if not fingerprint & loose:
+            loose_positions.append(position)
+            if not fingerprint & strict:
+                strict_positions.append(position)
+    return strict_positions, loose_positions
+
+
+def _find_candidates(data, context, offset, params):
+    """
+    Absolute positions in `data` (which starts at `offset`) whose window hash passes the strict
+    and the loose mask. A chunk may end right after such a position.
+    :param context: Up to 31 bytes preceding `data`, which the first window hashes depend on.
+    """
+    strict, loose = _masks(params['avg_size'])
+    find = _candidates_numpy if np is not None else _candidates_python
+    return find(data, context, offset, strict, loose)
+
+
+def _next_cut(start, available, final, strict_positions, loose_positions, params):
+    """
+    End of the chunk starting at `start`, or None if it depends on bytes not read yet.
+    """
+    if not final and start + params['max_size'] > available:
+        return None
+    first = start + params['min_size'] - 1
+    normal = start + params['avg_size'] - 1
+    last = min(start + params['max_size'], available) - 1
+
+    i = bisect_left(strict_positions, first)
+    if i < len(strict_positions) and strict_positions[i] < normal and strict_positions[i] <= last:
+        return strict_positions[i] + 1
+    j = bisect_left(loose_positions, max(first, normal))
+    if j < len(loose_positions) and loose_positions[j] <= last:
+        return loose_positions[j] + 1
+    return last + 1
+
+
+def _chunk_ranges(blocks, params):
+    """
+    (start, end) offsets of the chunks of a sequence of byte blocks.
+    """
+    if params['method'] == CHUNKING_FIXED:
+        yield from _fixed_ranges(blocks, params['size'])
+        return
+
+    strict_positions = []
+    loose_positions = []
+    context = b''
+    start = 0
+    available = 0
+    for block in blocks:
+        found = _find_candidates(block, context, available, params)
+        strict_positions.extend(found[0])
+        loose_positions.extend(found[1])
+        context = (context + block[-(_WINDOW - 1):])[-(_WINDOW - 1):]
+        available += len(block)
+
+        while (end := _next_cut(start, available, False, strict_positions, loose_positions, params)) is not None:
+            yield start, end
+            start = end
+        # Positions before the current chunk can no longer matter
+        del strict_positions[:bisect_left(strict_positions, start)]
+        del loose_positions[:bisect_left(loose_positions, start)]
+
+    while start < available:
+        end = _next_cut(start, available, True, strict_positions, loose_positions, params)
+        yield start, end
+        start = end
+
+
+def _fixed_ranges(blocks, size):
+    start = 0
+    available = 0
+    for block in blocks:
+        available += len(block)
+        while start + size <= available:
+            yield start, start + size
+            start += size
+    if start < available:
+        yield start, available
+
+
+def iter_chunks(stream, params, block_size=_BLOCK_SIZE):
+    """
+    Split a binary stream into chunks.
+    :param stream: Readable binary file object, read from its current position.
+    :param params: Chunking parameters, as returned by normalize_chunking.
+    :return: Generator of bytes chunks.
+    """
+    pending = bytearray()
+    pending_start = 0
+
+    def blocks():
+        while True:
+            block = stream.read(block_size)
+            if not block:
+                return
+            pending.extend(block)
+            yield block
+
+    for start, end in _chunk_ranges(blocks(), params):
+        yield bytes(pending[start - pending_start:end - pending_start])
+        if end - pending_start >= block_size:
+            del pending[:end - pending_start]
+            pending_start = end
+
+
+def chunk_data(data, params, hash_function):
+    """
+    Chunk leaves of in-memory file contents, with where each one lies.
+    :return: A tuple (leaves, byte ranges); every leaf is the digest of the bytes in its range.
+    """
+    ranges = list(_chunk_ranges([data] if data else [], params))
+    view = memoryview(data)
+    leaves = [hash_function(view[start:end]) for start, end in ranges]
+    return leaves or [hash_function(b'')], ranges or [(0, 0)]
+
+
+def read_chunked_leaves(stream, params, hash_function):
+    """
+    Chunk leaves of a binary stream: the digest of every chunk, in order.
+    An empty stream gives a single leaf, as comma-separated reading does.
+    """
+    leaves = [hash_function(chunk) for chunk in iter_chunks(stream, params)]
+    return leaves or [hash_function(b'')]
@@ -0,0 +1,90 @@
+# digest.py
+import functools
+import hashlib
+import json
+
+DEFAULT_ALGORITHM = 'sha256'
+
+# Parameters each algorithm accepts, with the allowed digest sizes in bytes. Digests shorter than
+# 16 bytes make collisions (and so forged leaves) practical, whatever the algorithm allows.
+_DIGEST_SIZES = {
+    'sha256': None,
+    'blake2b': (16, 64),
+    'blake2s': (16, 32),
+}
+
+SUPPORTED_ALGORITHMS = tuple(_DIGEST_SIZES)
+
+
+def normalize_hash_params(algorithm, params=None):
+    """
+    Validate an algorithm name and its parameters.
+    :param algorithm: One of SUPPORTED_ALGORITHMS.
+    :param params: Optional dict (or JSON string) of parameters, e.g. {'digest_size': 32}.
+    :return: A tuple (algorithm, params) with params as a plain dict.
+    :raises ValueError: If the algorithm or a parameter is not supported.
+    """
+    algorithm = (algorithm or DEFAULT_ALGORITHM).lower()
+    if algorithm not in _DIGEST_SIZES:
+        raise ValueError(f"Unsupported hash algorithm '{algorithm}'. Choose one of: {', '.join(SUPPORTED_ALGORITHMS)}.")
+
+    if isinstance(params, str):
+        params = json.loads(params) if params.strip() else None
+    params = dict(params or {})
+
+    unknown = set(params) - ({'digest_size'} if _DIGEST_SIZES[algorithm] else set())
+    if unknown:
+        raise ValueError(f"Unsupported parameter(s) for {algorithm}: {', '.join(sorted(unknown))}.")
+
+    if 'digest_size' in params:
+        low, high = _DIGEST_SIZES[algorithm]
+        try:
+            params['digest_size'] = int(params['digest_size'])
+        except (TypeError, ValueError):
+            raise ValueError("digest_size must be an integer.")
+        if not low <= params['digest_size'] <= high:
+            raise ValueError(f"digest_size for {algorithm} must be between {low} and {high}.")
+    return algorithm, params
+
+
+@functools.lru_cache(maxsize=None)
+def _hash_function(algorithm, frozen_params):
+    constructor = getattr(hashlib, algorithm)
+    if frozen_params:
+        constructor = functools.partial(constructor, **dict(frozen_params))
+
+    def hash_value(data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return constructor(data).hexdigest()
+
+    hash_value.algorithm = algorithm
+    hash_value.params = dict(frozen_params)
+    return hash_value
+
+
+def get_hash_function(algorithm=DEFAULT_ALGORITHM, params=None):
+    """
+    Return a function hashing a str (as UTF-8) or bytes value to a hexadecimal digest.
+    :param algorithm: One of SUPPORTED_ALGORITHMS.
+    :param params: Optional algorithm parameters, e.g. {'digest_size': 32} for BLAKE2.
+    """
+    algorithm, params = normalize_hash_params(algorithm, params)
+    return _hash_function(algorithm, tuple(sorted(params.items())))
+
+
+def describe(algorithm=DEFAULT_ALGORITHM, params=None):
+    """
+    One-line description of an algorithm and its parameters, as written in tree file headers.
+    """
+    algorithm, params = normalize_hash_params(algorithm, params)
+    return f"{algorithm} {json.dumps(params, sort_keys=True)}"
+
+
+def parse_description(text):
+    """
+    Inverse of describe().
+    :return: A tuple (algorithm, params).
+    """
+    algorithm, _, params = text.strip().partition(' ')
+    return normalize_hash_params(algorithm, params or None)
@@ -0,0 +1,144 @@
+# multiproof.py
+from .digest import DEFAULT_ALGORITHM, get_hash_function
+
+_sha256 = get_hash_function()
+
+
+def hash_leaf(value, hash_function=_sha256):
+    """
+    Hash a leaf value the same way MerkleTreeNode does.
+    :param value: The leaf value as a string.
+    :param hash_function: A function from digest.get_hash_function (SHA-256 by default).
+    :return: The hash as a hexadecimal string.
+    """
+    return hash_function(value)
+
+
+def hash_pair(left_hash, right_hash, hash_function=_sha256):
+    """
+    Hash two sibling hashes into their parent hash, as build_tree does.
+    """
+    return hash_function(left_hash + right_hash)
+
+
+def compute_levels(leaf_hashes, hash_function=_sha256):
+    """
+    Compute every level of the Merkle tree, from the leaf hashes up to the root.
+    An unpaired last node is carried up to the next level unchanged, as in build_tree.
+    :param leaf_hashes: List of leaf hashes.
+    :param hash_function: A function from digest.get_hash_function (SHA-256 by default).
+    :return: List of levels; levels[0] are the leaf hashes and levels[-1] == [root].
+    """
+    if not leaf_hashes:
+        raise ValueError("Cannot build a Merkle tree without leaves.")
+
+    levels = [list(leaf_hashes)]
+    while len(levels[-1]) > 1:
+        nodes = levels[-1]
+        parents = [hash_function(nodes[i] + nodes[i + 1]) for i in range(0, len(nodes) - 1, 2)]
+        if len(nodes) % 2:
+            parents.append(nodes[-1])
+        levels.append(parents)
+    return levels
+
+
+def _level_steps(level_size, positions):
+    """
+    Pair up the known positions of one level.
+    Yields (position, sibling position, sibling is known) for each node that moves up a level.
+    The sibling position is None when an unpaired last node is carried up unchanged; a sibling
+    that is not known has to come from the proof.
+    """
+    i = 0
+    while i < len(positions):
+        pos = positions[i]
+        if pos == level_size - 1 and level_size % 2:
+            yield pos, None, False
+        elif pos % 2 == 0 and i + 1 < len(positions) and positions[i + 1] == pos + 1:
+            yield pos, pos + 1, True
+            i += 1
+        else:
+            yield pos, pos ^ 1, False
+        i += 1
+
+
+def build_multiproof(leaves, indices, hashed=False, algorithm=DEFAULT_ALGORITHM, hash_params=None):
+    """
+    Build a single proof covering several leaves of the same tree.
+    Siblings that can be computed from other proven leaves are left out, so upper-level
+    nodes shared by several leaves appear at most once.
+    :param leaves: All leaves of the tree (values, or hashes if `hashed` is True).
+    :param indices: Indices of the leaves to prove.
+    :param hashed: Whether `leaves` already holds leaf hashes.
+    :param algorithm: Hash algorithm of the tree (see digest.SUPPORTED_ALGORITHMS).
+    :param hash_params: Optional algorithm parameters.
+    :return: A dict with 'leaf_count', the sorted unique 'indices' and the proof 'hashes' in verification order.
+    """
+    hash_function = get_hash_function(algorithm, hash_params)
+    leaf_hashes = list(leaves) if hashed else [hash_function(leaf) for leaf in leaves]
+    positions = sorted(set(indices))
+    if not positions:
+        raise ValueError("At least one leaf index is required.")
+    if positions[0] < 0 or positions[-1] >= len(leaf_hashes):
+        raise IndexError("Leaf index out of range.")
+
+    proof_hashes = []
+    for level in compute_levels(leaf_hashes, hash_function)[:-1]:
+        next_positions = []
+        for pos, sibling, sibling_known in _level_steps(len(level), positions):
+            if sibling is not None and not sibling_known:
+                proof_hashes.append(level[sibling])
+            next_positions.append(pos // 2)
+        positions = next_positions
+
+    return {'leaf_count': len(leaf_hashes), 'indices': sorted(set(indices)), 'hashes': proof_hashes}
+
+
+def verify_multiproof(root, leaf_count, leaves, proof_hashes, hashed=False, algorithm=DEFAULT_ALGORITHM,
+                      hash_params=None):
+    """
+    Recompute the root from a set of leaves and their multiproof in a single bottom-up pass.
+    :param root: The expected root hash.
+    :param leaf_count: Number of leaves in the tree.
+    :param leaves: Dict mapping leaf index to leaf value (or hash if `hashed` is True).
+    :param proof_hashes: The 'hashes' list returned by build_multiproof.
+    :param hashed: Whether `leaves` already holds leaf hashes.
+    :param algorithm: Hash algorithm of the tree (see digest.SUPPORTED_ALGORITHMS).
+    :param hash_params: Optional algorithm parameters.
+    :return: True if the leaves and proof lead to the root.
+    """
+    hash_function = get_hash_function(algorithm, hash_params)
+    if not leaves or leaf_count <= 0:
+        return False
+    positions = sorted(leaves)
+    if positions[0] < 0 or positions[-1] >= leaf_count:
+        return False
+
+    known = {pos: (leaves[pos] if hashed else hash_function(leaves[pos])) for pos in positions}
+    proof = iter(proof_hashes)
+
+    level_size = leaf_count
+    while level_size > 1:
+        parents = {}
+        for pos, sibling, sibling_known in _level_steps(level_size, positions):
+            if sibling is None:
+                parents[pos // 2] = known[pos]
+                continue
+            if sibling_known:
+                sibling_hash = known[sibling]
+            else:
+                sibling_hash = next(proof, None)
+                if sibling_hash is None:
+                    return False
+            if pos % 2 == 0:
+                parents[pos // 2] = hash_function(known[pos] + sibling_hash)
+            else:
+                parents[pos // 2] = hash_function(sibling_hash + known[pos])
+        known = parents
+        positions = sorted(parents)
+        level_size = (level_size + 1) // 2
+
+    # Every proof hash must have been consumed
+    if next(proof, None) is not None:
+        return False
+    return known.get(0) == root
@@ -0,0 +1,180 @@
+# repair.py
+"""
+Locate and repair corrupted parts of a downloaded file with its stored Merkle tree.
+
+The download is read as a stream: its leaf hashes are folded into a root with a MerkleAccumulator
+and compared, in order, with the leaf level of the stored tree read through its MerkleTreeIndex,
+so neither the file nor a rebuilt tree is ever held in memory. Each differing leaf maps back to
+the bytes between its separating commas (or to its chunk), which can then be fetched again on
+their own instead of downloading the whole file.
+"""
+from .accumulator import MerkleAccumulator
+from .chunking import iter_chunks
+from .digest import DEFAULT_ALGORITHM, get_hash_function
+from .utils import DECODE_BLOCK_SIZE, fold_stream_leaves
+
+
+def scan_leaves(leaves, index=None, algorithm=DEFAULT_ALGORITHM, hash_params=None):
+    """
+    Fold a stream of leaf hashes into their root, comparing each with the stored tree.
+    :param leaves: Iterable of (leaf hash, byte range or None) tuples, in order.
+    :param index: MerkleTreeIndex of the stored tree file, or None to only compute the root.
+    :param algorithm: Hash algorithm of the tree.
+    :param hash_params: Optional algorithm parameters.
+    :return: A tuple (root hash, leaf count, list of (position, byte range) of the leaves that
+             differ from the stored ones).
+    """
+    accumulator = MerkleAccumulator(algorithm, hash_params)
+    stored = index.iter_level(0) if index is not None else None
+    corrupt = []
+    for position, (leaf_hash, leaf_range) in enumerate(leaves):
+        accumulator.append_hash(leaf_hash)
+        if stored is not None:
+            stored_hash = next(stored, None)
+            if stored_hash is None or stored_hash.hex() != leaf_hash:
+                corrupt.append((position, leaf_range))
+    if stored is not None:
+        stored.close()
+    return accumulator.root(), accumulator.leaf_count, corrupt
+
+
+def _chunk_leaves(stream, chunking, hash_function):
+    # Chunk leaves are the digests of the chunks, hashed again as leaf values
+    start = 0
+    for chunk in iter_chunks(stream, chunking):
+        yield hash_function(hash_function(chunk)), (start, start + len(chunk))
+        start += len(chunk)
+    if not start:
+        yield hash_function(hash_function(b'')), (0, 0)
+
+
+def leaf_byte_ranges(stream, encoding, leaf_count, positions):
+    """
+    Byte ranges of some leaves in the raw file contents: the bytes between two separating commas.
+    The stream is scanned a block at a time and only the requested ranges are kept.
+    :param stream: Readable binary file object, read from its current position.
+    :param encoding: Encoding the leaves were decoded with.
+    :param leaf_count: Number of leaves decoded from the contents.
+    :param positions: Sorted indices of the leaves.
+    :return: List of (start, end) offsets, one per position, or None if commas are not single
+             bytes in this encoding or do not split the contents into `leaf_count` parts.
+    """
+    if ','.encode(encoding) != b',':
+        return None
+
+    wanted = iter(positions)
+    next_wanted = next(wanted, None)
+    ranges = []
+    leaf = 0
+    start = 0
+    offset = 0
+    for block in iter(lambda: stream.read(DECODE_BLOCK_SIZE), b''):
+        commas = block.count(b',')
+        if next_wanted is None or leaf + commas <= next_wanted:
+            # No requested leaf ends in this block; skip its commas at once
+            if commas:
+                leaf += commas
+                start = offset + block.rfind(b',') + 1
+        else:
+            comma = block.find(b',')
+            while comma != -1:
+                if leaf == next_wanted:
+                    ranges.append((start, offset + comma))
+                    next_wanted = next(wanted, None)
+                leaf += 1
+                start = offset + comma + 1
+                comma = block.find(b',', comma + 1)
+        offset += len(block)
+    if leaf == next_wanted:
+        ranges.append((start, offset))
+    return ranges if leaf + 1 == leaf_count and len(ranges) == len(positions) else None
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        # Neighbouring leaves are only separated by a comma; fetch them in one request
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def repair_file(fileobj, stored_root, index, fetch_range, fetch_all=None, attempts=2,
+                algorithm=DEFAULT_ALGORITHM, hash_params=None, chunking=None):
+    """
+    Re-fetch the corrupted byte ranges of a downloaded file until it matches its stored root.
+    When the damage cannot be localized (no trusted tree, a different tree shape, or a round that
+    fixed nothing), the whole file is fetched again with `fetch_all` instead.
+
+    :param fileobj: Seekable, writable binary file object holding the download; repaired in place.
+    :param stored_root: Merkle root recorded for the file.
+    :param index: MerkleTreeIndex of the stored tree file, or None if it is not available.
+    :param fetch_range: Callable(start, end) returning bytes [start, end) of the stored object,
+                        or None to only ever re-fetch the whole file.
+    :param fetch_all: Optional callable(fileobj) writing the whole stored object to `fileobj`.
+    :param attempts: Maximum number of repair rounds.
+    :param algorithm: Hash algorithm of the tree.
+    :param hash_params: Optional algorithm parameters.
+    :param chunking: Content-defined chunking parameters of the file, if its leaves are chunks.
+    :return: A dict with 'verified', the 'attempts' made, the re-fetched 'ranges',
+             'bytes_refetched' and the number of 'full_refetches'.
+    """
+    hash_function = get_hash_function(algorithm, hash_params)
+    if fetch_range is None or index is None or index.root is None or index.root.hex() != stored_root:
+        index = None
+
+    report = {'verified': False, 'attempts': 0, 'ranges': [], 'bytes_refetched': 0, 'full_refetches': 0}
+    previous_ranges = None
+
+    for attempt in range(attempts + 1):
+        fileobj.seek(0)
+        if chunking:
+            root, leaf_count, corrupt = scan_leaves(_chunk_leaves(fileobj, chunking, hash_function), index,
+                                                    algorithm, hash_params)
+            encoding = None
+        else:
+            (root, leaf_count, corrupt), encoding = fold_stream_leaves(
+                fileobj,
+                lambda leaves: scan_leaves(((hash_function(leaf), None) for leaf in leaves), index,
+                                           algorithm, hash_params))
+        if root == stored_root:
+            report['verified'] = True
+            break
+        if attempt == attempts:
+            break
+        report['attempts'] += 1
+
+        ranges = None
+        # A different leaf count shifts every later leaf, so the differences say nothing about the damage
+        if index is not None and corrupt and leaf_count == index.leaf_count:
+            if chunking:
+                offsets = [leaf_range for _, leaf_range in corrupt]
+            else:
+                fileobj.seek(0)
+                offsets = leaf_byte_ranges(fileobj, encoding, leaf_count, [position for position, _ in corrupt])
+            if offsets is not None:
+                ranges = _merge_ranges(offsets)
+                if ranges == previous_ranges:
+                    ranges = None
+
+        if ranges is None:
+            if fetch_all is None:
+                break
+            fileobj.seek(0)
+            fileobj.truncate()
+            fetch_all(fileobj)
+            report['bytes_refetched'] += fileobj.tell()
+            report['full_refetches'] += 1
+        else:
+            for start, end in ranges:
+                chunk = fetch_range(start, end)
+                fileobj.seek(start)
+                fileobj.write(chunk)
+                report['bytes_refetched'] += len(chunk)
+            report['ranges'].extend(ranges)
+        previous_ranges = ranges
+
+    fileobj.seek(0)
+    return report
@@ -0,0 +1,270 @@
+# subtree_cache.py
+"""
+Persistent, content-addressed cache of Merkle subtree hashes.
+
+Leaves are grouped into aligned chunks of `chunk_leaves` (a power of two), so every full chunk
+is a perfect subtree of the tree build_tree makes and the last chunk is its right edge. A chunk
+is keyed by a single SHA-256 over its joined leaves and the tree's hash algorithm, which is far
+cheaper than hashing each leaf and inner node one call at a time. Chunks that an earlier upload
+or version already hashed are read back instead of recomputed, so building the tree of a new
+version costs roughly the changed fraction of its chunks plus one pass of chunk keys. Besides
+each chunk's root, every node of the chunk is kept, so build_tree can still write the full tree
+file without hashing the chunks it finds.
+
+The cache file is writable by every worker on the host, so nothing read from it is trusted for
+integrity checks: verification always rehashes the data. A wrong entry can at worst make an
+upload record a root that its own data then fails to verify against.
+
+Entries live in a small SQLite file shared by all workers on a host and are evicted least
+recently used first once there are more than `max_entries` roots or `max_node_entries` node sets.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from .build_tree import fold_hashes, tree_levels
+from .digest import DEFAULT_ALGORITHM, describe, get_hash_function
+
+# Host parameter limit per statement in older SQLite builds
+_BATCH = 500
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS subtree_hash (key TEXT PRIMARY KEY, hash TEXT NOT NULL, used REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_subtree_hash_used ON subtree_hash (used)",
+    "CREATE TABLE IF NOT EXISTS subtree_nodes (key TEXT PRIMARY KEY, nodes BLOB NOT NULL, used REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_subtree_nodes_used ON subtree_nodes (used)",
+    "CREATE TABLE IF NOT EXISTS subtree_cache_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO subtree_cache_stats (name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0)",
+)
+
+
+class SubtreeCache:
+    """
+    Cache from chunk digest to subtree hash. Safe to share between threads; each process opens
+    its own connection to the cache file.
+    """
+
+    def __init__(self, path, max_entries=1_000_000, chunk_leaves=1024, max_node_entries=4096):
+        if chunk_leaves < 1 or chunk_leaves & (chunk_leaves - 1):
+            raise ValueError("chunk_leaves must be a power of two.")
+        self.path = path
+        self.max_entries = max_entries
+        self.max_node_entries = max_node_entries
+        self.chunk_leaves = chunk_leaves
+        # Counters for this process; stats() also reports the totals kept in the cache file
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = None
+        self._connection_pid = None
+
+    @property
+    def connection(self):
+        if self._connection is None or self._connection_pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            if self.path != ':memory:':
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            self._connection = connection
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def chunk_keys(self, leaves, algorithm=DEFAULT_ALGORITHM, hash_params=None):
+        """
+        Content digest of every aligned chunk of leaves, for the given tree hash algorithm.
+        """
+        prefix = describe(algorithm, hash_params).encode('utf-8') + b'\n'
+        keys = []
+        for start in range(0, len(leaves), self.chunk_leaves):
+            digest = hashlib.sha256(prefix)
+            # Leaves never contain commas, so the joined chunk identifies its leaves exactly
+            digest.update(','.join(leaves[start:start + self.chunk_leaves]).encode('utf-8'))
+            keys.append(digest.hexdigest())
+        return keys
+
+    def compute_root(self, leaves, algorithm=DEFAULT_ALGORITHM, hash_params=None):
+        """
+        Same result as build_tree.compute_root, hashing only the chunks missing from the cache.
+        """
+        if not leaves:
+            raise ValueError("Cannot build a Merkle tree without leaves.")
+
+        hash_function = get_hash_function(algorithm, hash_params)
+        keys = self.chunk_keys(leaves, algorithm, hash_params)
+        cached = self._lookup(keys)
+
+        computed = {}
+        chunk_hashes = []
+        for i, key in enumerate(keys):
+            chunk_hash = cached.get(key) or computed.get(key)
+            if chunk_hash is None:
+                chunk = leaves[i * self.chunk_leaves:(i + 1) * self.chunk_leaves]
+                chunk_hash = fold_hashes(list(map(hash_function, chunk)), hash_function)
+                computed[key] = chunk_hash
+            chunk_hashes.append(chunk_hash)
+
+        self._store(computed, hits=len(keys) - len(computed), misses=len(computed))
+        return fold_hashes(chunk_hashes, hash_function)
+
+    def tree_levels(self, leaves, algorithm=DEFAULT_ALGORITHM, hash_params=None):
+        """
+        Same result as build_tree.tree_levels over the leaf hashes, reading the nodes of cached
+        chunks back instead of hashing them. The nodes and roots of the other chunks are stored.
+        """
+        if not leaves:
+            raise ValueError("Cannot build a Merkle tree without leaves.")
+
+        hash_function = get_hash_function(algorithm, hash_params)
+        keys = self.chunk_keys(leaves, algorithm, hash_params)
+        cached = self._lookup_nodes(keys, leaves)
+
+        computed = {}
+        chunk_height = self.chunk_leaves.bit_length() - 1
+        levels = [[] for _ in range(chunk_height + 1)]
+        for i, key in enumerate(keys):
+            chunk_levels = cached.get(key) or computed.get(key)
+            if chunk_levels is None:
+                chunk = leaves[i * self.chunk_leaves:(i + 1) * self.chunk_leaves]
+                chunk_levels = tree_levels(list(map(hash_function, chunk)), hash_function)
+                computed[key] = chunk_levels
+            if len(keys) == 1:
+                levels = chunk_levels
+                break
+            # A short last chunk is carried up unchanged from its own root to the chunk height
+            for height, level in enumerate(levels):
+                level.extend(chunk_levels[min(height, len(chunk_levels) - 1)])
+        else:
+            levels = levels[:-1] + tree_levels(levels[-1], hash_function)
+
+        self._store({key: chunk_levels[-1][0] for key, chunk_levels in computed.items()},
+                    hits=len(keys) - len(computed), misses=len(computed))
+        self._store_nodes(computed)
+        return levels
+
+    def _select(self, table, column, keys):
+        found = {}
+        try:
+            with self._lock:
+                connection = self.connection
+                for start in range(0, len(keys), _BATCH):
+                    batch = keys[start:start + _BATCH]
+                    placeholders = ','.join('?' * len(batch))
+                    found.update(connection.execute(
+                        f"SELECT key, {column} FROM {table} WHERE key IN ({placeholders})", batch))
+                    connection.execute(
+                        f"UPDATE {table} SET used = ? WHERE key IN ({placeholders})", [time.time(), *batch])
+        except sqlite3.Error:
+            # The cache is only an accelerator; fall back to hashing everything
+            return {}
+        return found
+
+    def _lookup(self, keys):
+        return self._select('subtree_hash', 'hash', keys)
+
+    def _lookup_nodes(self, keys, leaves):
+        # Nodes are stored as raw digests, level by level; the chunk's leaf count gives the shape
+        leaf_counts = {key: min(self.chunk_leaves, len(leaves) - i * self.chunk_leaves) for i, key in enumerate(keys)}
+        found = {}
+        for key, nodes in self._select('subtree_nodes', 'nodes', keys).items():
+            sizes = _level_sizes(leaf_counts[key])
+            if len(nodes) % sum(sizes):
+                continue
+            width = 2 * len(nodes) // sum(sizes)
+            digests = nodes.hex()
+            levels = []
+            offset = 0
+            for size in sizes:
+                levels.append([digests[i:i + width] for i in range(offset, offset + size * width, width)])
+                offset += size * width
+            found[key] = levels
+        return found
+
+    def _write(self, statement, rows, table, bound, hits=0, misses=0):
+        self.hits += hits
+        self.misses += misses
+        try:
+            with self._lock:
+                connection = self.connection
+                connection.execute("BEGIN")
+                try:
+                    connection.executemany(statement, rows)
+                    connection.execute(
+                        "UPDATE subtree_cache_stats SET value = value + CASE name "
+                        "WHEN 'hits' THEN ? WHEN 'misses' THEN ? ELSE 0 END", (hits, misses))
+                    if rows:
+                        self._evict(connection, table, bound)
+                    connection.execute("COMMIT")
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error:
+            pass
+
+    def _store(self, entries, hits=0, misses=0):
+        now = time.time()
+        self._write("INSERT OR REPLACE INTO subtree_hash (key, hash, used) VALUES (?, ?, ?)",
+                    [(key, value, now) for key, value in entries.items()],
+                    'subtree_hash', self.max_entries, hits, misses)
+
+    def _store_nodes(self, entries):
+        now = time.time()
+        rows = [(key, bytes.fromhex(''.join(node for level in levels for node in level)), now)
+                for key, levels in entries.items()]
+        self._write("INSERT OR REPLACE INTO subtree_nodes (key, nodes, used) VALUES (?, ?, ?)",
+                    rows, 'subtree_nodes', self.max_node_entries)
+
+    def _evict(self, connection, table, bound):
+        count = connection.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+        if count <= bound:
+            return
+        # Evict down to 90% of the bound so eviction does not run on every insert
+        excess = count - bound * 9 // 10
+        connection.execute(f"DELETE FROM {table} WHERE key IN (SELECT key FROM {table} ORDER BY used LIMIT ?)",
+                           (excess,))
+        connection.execute("UPDATE subtree_cache_stats SET value = value + ? WHERE name = 'evictions'", (excess,))
+
+    def stats(self):
+        """
+        Hit rates for this process and for the cache file as a whole.
+        """
+        with self._lock:
+            connection = self.connection
+            totals = dict(connection.execute("SELECT name, value FROM subtree_cache_stats"))
+            entries = connection.execute("SELECT count(*) FROM subtree_hash").fetchone()[0]
+            node_entries = connection.execute("SELECT count(*) FROM subtree_nodes").fetchone()[0]
+
+        def rate(hits, misses):
+            return hits / (hits + misses) if hits + misses else None
+
+        return {
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'node_entries': node_entries,
+            'max_node_entries': self.max_node_entries,
+            'chunk_leaves': self.chunk_leaves,
+            'process': {'hits': self.hits, 'misses': self.misses, 'hit_rate': rate(self.hits, self.misses)},
+            'total': {
+                'hits': totals.get('hits', 0),
+                'misses': totals.get('misses', 0),
+                'evictions': totals.get('evictions', 0),
+                'hit_rate': rate(totals.get('hits', 0), totals.get('misses', 0)),
+            },
+        }
+
+    def clear(self):
+        with self._lock:
+            connection = self.connection
+            connection.execute("DELETE FROM subtree_hash")
+            connection.execute("DELETE FROM subtree_nodes")
+            connection.execute("UPDATE subtree_cache_stats SET value = 0")
+
+
+def _level_sizes(leaf_count):
+    sizes = [leaf_count]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
@@ -0,0 +1,195 @@
+# transparency.py
+"""
+Proofs over an append-only log of leaf hashes (RFC 6962 / RFC 9162 structure).
+
+Nodes are addressed by (level, index): level 0 holds the leaf hashes and node (level, i)
+is the root of the perfect subtree over leaves [i * 2**level, (i + 1) * 2**level).
+The functions below only ever ask for such perfect nodes through a `get_node(level, index)`
+callable, so the log can keep them in any store. Leaf and node hashes are domain-separated
+as in RFC 6962 (a 0x00 prefix for leaves, 0x01 for nodes), so a leaf record can never be
+passed off as an interior node.
+"""
+import hashlib
+import json
+
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+
+def hash_leaf(record):
+    """
+    Log leaf hash of a record: SHA-256 of 0x00 followed by the record.
+    :return: The hash as a hexadecimal string.
+    """
+    return hashlib.sha256(LEAF_PREFIX + record.encode('utf-8')).hexdigest()
+
+
+def hash_pair(left_hash, right_hash):
+    """
+    Log node hash of two hexadecimal child hashes: SHA-256 of 0x01 followed by both digests.
+    """
+    return hashlib.sha256(NODE_PREFIX + bytes.fromhex(left_hash) + bytes.fromhex(right_hash)).hexdigest()
+
+
+def record_leaf(model_name, version, merkle_root, upload_date):
+    """
+    Canonical string for a model version record; the log leaf is its hash.
+    :param upload_date: A datetime, or its ISO string.
+    """
+    if hasattr(upload_date, 'isoformat'):
+        upload_date = upload_date.isoformat()
+    return json.dumps({
+        'model_name': model_name,
+        'version': version,
+        'merkle_root': merkle_root,
+        'upload_date': upload_date,
+    }, sort_keys=True, separators=(',', ':'))
+
+
+def record_hash(model_name, version, merkle_root, upload_date):
+    return hash_leaf(record_leaf(model_name, version, merkle_root, upload_date))
+
+
+def _largest_power_of_two_below(n):
+    return 1 << ((n - 1).bit_length() - 1)
+
+
+def completed_nodes(leaf_index):
+    """
+    Perfect nodes that become complete when leaf `leaf_index` is appended.
+    :return: List of (level, index) pairs, lowest level first, excluding the leaf itself.
+    """
+    nodes = []
+    level = 1
+    while (leaf_index + 1) % (1 << level) == 0:
+        nodes.append((level, (leaf_index + 1 >> level) - 1))
+        level += 1
+    return nodes
+
+
+def subtree_hash(start, end, get_node):
+    """
+    Hash of the subtree over leaves [start, end), built from O(log n) perfect nodes.
+    """
+    size = end - start
+    if size <= 0:
+        raise ValueError("Empty subtree.")
+    if size & (size - 1) == 0 and start % size == 0:
+        return get_node(size.bit_length() - 1, start // size)
+    k = _largest_power_of_two_below(size)
+    return hash_pair(subtree_hash(start, start + k, get_node), subtree_hash(start + k, end, get_node))
+
+
+def tree_root(tree_size, get_node):
+    return subtree_hash(0, tree_size, get_node)
+
+
+def inclusion_proof(leaf_index, tree_size, get_node):
+    """
+    Audit path for a leaf in the tree of the first `tree_size` leaves, leaf level first.
+    """
+    if not 0 <= leaf_index < tree_size:
+        raise IndexError("Leaf index out of range.")
+
+    path = []
+    start, end, m = 0, tree_size, leaf_index
+    while end - start > 1:
+        k = _largest_power_of_two_below(end - start)
+        if m < k:
+            path.append(subtree_hash(start + k, end, get_node))
+            end = start + k
+        else:
+            path.append(subtree_hash(start, start + k, get_node))
+            start += k
+            m -= k
+    path.reverse()
+    return path
+
+
+def verify_inclusion_proof(leaf_hash, leaf_index, tree_size, proof, root):
+    """
+    Check an audit path against a tree head (RFC 9162, section 2.1.3.2).
+    """
+    if not 0 <= leaf_index < tree_size:
+        return False
+
+    fn, sn = leaf_index, tree_size - 1
+    node = leaf_hash
+    for sibling in proof:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            node = hash_pair(sibling, node)
+            if not fn & 1:
+                while not fn & 1 and fn != 0:
+                    fn >>= 1
+                    sn >>= 1
+        else:
+            node = hash_pair(node, sibling)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and node == root
+
+
+def consistency_proof(first_size, second_size, get_node):
+    """
+    Proof that the tree of `first_size` leaves is a prefix of the tree of `second_size` leaves.
+    """
+    if not 0 < first_size <= second_size:
+        raise ValueError("Tree sizes must satisfy 0 < first <= second.")
+
+    proof = []
+    start, end, m, complete = 0, second_size, first_size, True
+    while m != end - start:
+        k = _largest_power_of_two_below(end - start)
+        if m <= k:
+            proof.append(subtree_hash(start + k, end, get_node))
+            end = start + k
+        else:
+            proof.append(subtree_hash(start, start + k, get_node))
+            start += k
+            m -= k
+            complete = False
+    if not complete:
+        proof.append(subtree_hash(start, end, get_node))
+    proof.reverse()
+    return proof
+
+
+def verify_consistency_proof(first_size, second_size, first_root, second_root, proof):
+    """
+    Check a consistency proof between two tree heads (RFC 9162, section 2.1.4.2).
+    """
+    if not 0 < first_size <= second_size:
+        return False
+    if first_size == second_size:
+        return not proof and first_root == second_root
+    if not proof:
+        return False
+
+    proof = list(proof)
+    if first_size & (first_size - 1) == 0:
+        proof.insert(0, first_root)
+
+    fn, sn = first_size - 1, second_size - 1
+    while fn & 1:
+        fn >>= 1
+        sn >>= 1
+
+    first_node = second_node = proof[0]
+    for node in proof[1:]:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            first_node = hash_pair(node, first_node)
+            second_node = hash_pair(node, second_node)
+            if not fn & 1:
+                while not fn & 1 and fn != 0:
+                    fn >>= 1
+                    sn >>= 1
+        else:
+            second_node = hash_pair(second_node, node)
+        fn >>= 1
+        sn >>= 1
+
+    return first_node == first_root and second_node == second_root and sn == 0
@@ -1,36 +1,142 @@
 
+import codecs
+import io
+import logging
+
 import chardet
-from .build_tree import build_tree
+from .build_tree import build_tree, compute_root
+from .chunking import read_chunked_leaves
+from .digest import DEFAULT_ALGORITHM, get_hash_function
+
+# Bytes read at a time when decoding comma-separated leaves from a stream
+DECODE_BLOCK_SIZE = 1024 * 1024
+
+logger = logging.getLogger(__name__)
 
 def detect_encoding(file_path):
     with open(file_path, 'rb') as f:
         result = chardet.detect(f.read())
         return result['encoding']
 
-def read_leaves_from_file(input_file_path):
+def read_leaves_from_file(input_file_path, chunking=None, algorithm=DEFAULT_ALGORITHM, hash_params=None):
     """
     Read the list of leaves from an input file with detected encoding.
     
     :param input_file_path: Path to the input file containing leaves.
+    :param chunking: Optional chunking parameters (see chunking.normalize_chunking);
+                     the leaves are then chunk digests with the given algorithm instead of comma-separated values.
+    :return: List of leaves.
+    """
+    with open(input_file_path, "rb") as f:
+        return read_leaves_from_stream(f, chunking, algorithm, hash_params)
+
+
+def read_leaves_from_stream(stream, chunking=None, algorithm=DEFAULT_ALGORITHM, hash_params=None):
+    """
+    Read the list of leaves from a binary file object with detected encoding.
+    Gives the same leaves as read_leaves_from_file on a file with the same contents.
+
+    :param stream: Readable binary file object, read from its current position.
+    :param chunking: Optional chunking parameters, as for read_leaves_from_file.
     :return: List of leaves.
     """
-    encoding = detect_encoding(input_file_path)
+    if chunking:
+        return read_chunked_leaves(stream, chunking, get_hash_function(algorithm, hash_params))
+    leaves, _ = fold_stream_leaves(stream, list)
+    return leaves
+
+
+def fold_stream_leaves(stream, fold):
+    """
+    Decode comma-separated leaves from a binary stream a block at a time and reduce them with `fold`.
+    Gives the same leaves as decode_leaves on the whole contents without holding the raw bytes or
+    the decoded text: the encoding is detected in a first pass and the leaves decoded in a second.
+    If the detected encoding fails, the stream is rewound and `fold` runs again on leaves decoded
+    as UTF-8, ignoring errors.
+
+    :param stream: Readable binary file object, read from its current position.
+    :param fold: Callable reducing an iterator of leaves to a result, e.g. list.
+    :return: A tuple (result of `fold`, encoding used to decode the leaves).
+    """
+    if not getattr(stream, 'seekable', lambda: False)():
+        stream = io.BytesIO(stream.read())
+    start = stream.tell()
+
+    detector = chardet.UniversalDetector()
+    for block in iter(lambda: stream.read(DECODE_BLOCK_SIZE), b''):
+        detector.feed(block)
+    encoding = detector.close()['encoding'] or 'utf-8'
+    logger.debug("Detected encoding: %s", encoding)
+
+    stream.seek(start)
+    try:
+        return fold(iter_decoded_leaves(stream, encoding)), encoding
+    except UnicodeDecodeError:
+        logger.debug("Failed to read with detected encoding %s. Retrying with 'utf-8' encoding...", encoding)
+        stream.seek(start)
+        return fold(iter_decoded_leaves(stream, 'utf-8', errors='ignore')), 'utf-8'
+
+
+def iter_decoded_leaves(stream, encoding, errors='strict'):
+    """
+    Yield the comma-separated leaves of a binary stream decoded with `encoding`, as decode_leaves
+    splits them: newlines translated, leading and trailing whitespace of the whole text stripped.
+    Only the current leaf and one block are held in memory.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    leaf = []
+    first = True
+    carried_cr = ''
+    final = False
+    while not final:
+        block = stream.read(DECODE_BLOCK_SIZE)
+        final = not block
+        text = carried_cr + decoder.decode(block, final=final)
+        # A '\r' at the end of a block may be the start of a '\r\n'
+        carried_cr = '\r' if text.endswith('\r') and not final else ''
+        if carried_cr:
+            text = text[:-1]
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+        parts = text.split(',')
+        if len(parts) > 1:
+            leaf.append(parts[0])
+            value = ''.join(leaf)
+            yield value.lstrip() if first else value
+            first = False
+            yield from parts[1:-1]
+            leaf = []
+        leaf.append(parts[-1])
+
+    value = ''.join(leaf)
+    yield value.strip() if first else value.rstrip()
+
+
+def decode_leaves(data):
+    """
+    Split raw file contents into leaves with detected encoding.
+
+    :param data: The file contents as bytes.
+    :return: A tuple (list of leaves, encoding used to decode them).
+    """
+    encoding = chardet.detect(data)['encoding'] or 'utf-8'
     print(f"Detected encoding: {encoding}")  # Debugging: Print the detected encoding
 
     try:
-        # Attempt to read the file with the detected encoding
-        with open(input_file_path, "r", encoding=encoding) as f:
-            content = f.read().strip()
+        # Attempt to decode with the detected encoding
+        content = data.decode(encoding)
     except UnicodeDecodeError:
         print(f"Failed to read with detected encoding {encoding}. Retrying with 'utf-8' encoding...")
         # If detected encoding fails, fallback to 'utf-8' and ignore errors
-        with open(input_file_path, "r", encoding="utf-8", errors='ignore') as f:
-            content = f.read().strip()
+        encoding = 'utf-8'
+        content = data.decode(encoding, errors='ignore')
     except Exception as e:
         print(f"An unexpected error occurred while reading the file: {e}")
         raise e
 
-    return content.split(',')
+    # Translate newlines the way reading the file in text mode does
+    content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content.strip().split(','), encoding
 
 
 
@@ -60,17 +166,34 @@ def _write_node(node, f):
     _write_node(node.right, f)
 
 
-def verify_model_integrity(local_filename, stored_merkle_root):
-    # Step 1: Read the contents of the downloaded file as leaves
-    leaves = read_leaves_from_file(local_filename)
+def verify_model_integrity(local_filename, stored_merkle_root, temp_merkle_file=None,
+                           algorithm=DEFAULT_ALGORITHM, hash_params=None, chunking=None):
+    """
+    Check a file against its stored Merkle root.
+    Only the root is computed by default; pass `temp_merkle_file` to also write the full tree there.
+    :param local_filename: Path of the file, or a readable binary file object.
+    :param chunking: Chunking parameters the root was computed with, if any.
+    """
+    # Step 1: Comma-separated leaves are hashed as they are decoded when only the root is needed
+    if not chunking and temp_merkle_file is None:
+        if hasattr(local_filename, 'read'):
+            root_hash, _ = fold_stream_leaves(local_filename, lambda leaves: compute_root(leaves, algorithm, hash_params))
+        else:
+            with open(local_filename, 'rb') as f:
+                root_hash, _ = fold_stream_leaves(f, lambda leaves: compute_root(leaves, algorithm, hash_params))
+        return root_hash == stored_merkle_root
 
-    # Step 2: Create a temporary file path for the Merkle Tree structure
-    temp_merkle_file = f"{local_filename}_merkle.tree"
+    # Step 2: Otherwise read the contents of the downloaded file as leaves
+    if hasattr(local_filename, 'read'):
+        leaves = read_leaves_from_stream(local_filename, chunking, algorithm, hash_params)
+    else:
+        leaves = read_leaves_from_file(local_filename, chunking, algorithm, hash_params)
 
-    # Step 3: Build the Merkle Tree and get the root
-    root = build_tree(leaves, temp_merkle_file)
+    # Step 3: Compute the Merkle root, persisting the tree only when a path was given
+    if temp_merkle_file is None:
+        root_hash = compute_root(leaves, algorithm, hash_params)
+    else:
+        root_hash = build_tree(leaves, temp_merkle_file, algorithm, hash_params).hashValue
 
     # Step 4: Compare the generated Merkle root with the stored root
-    if root.hashValue == stored_merkle_root:
-        return True
-    return False
+    return root_hash == stored_merkle_root
@@ -1,38 +1,43 @@
-import hashlib
+from .digest import DEFAULT_ALGORITHM, get_hash_function
 
 # Define a class for each node in the Merkle Tree.
 class MerkleNode:
-    def __init__(self, content):
+    def __init__(self, content, hash_function=None):
         self.left = None
         self.right = None
         self.content = content
-        self.hash_value = compute_hash(content)
+        self.hash_value = (hash_function or compute_hash)(content)
 
-def compute_hash(data):
+def compute_hash(data, algorithm=DEFAULT_ALGORITHM, hash_params=None):
     """
-    Compute the SHA-256 hash for a given data input.
+    Compute the hash for a given data input (SHA-256 unless another algorithm is given).
     :param data: The data to hash.
+    :param algorithm: Hash algorithm (see digest.SUPPORTED_ALGORITHMS).
+    :param hash_params: Optional algorithm parameters.
     :return: The hash as a hexadecimal string.
     """
-    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+    return get_hash_function(algorithm, hash_params)(data)
 
-def merge_hashes(hash1, hash2):
+def merge_hashes(hash1, hash2, algorithm=DEFAULT_ALGORITHM, hash_params=None):
     """
     Combine two hash values into one by concatenating and hashing them.
     :param hash1: The first hash.
     :param hash2: The second hash.
     :return: The combined hash as a hexadecimal string.
     """
-    return compute_hash(hash1 + hash2)
+    return compute_hash(hash1 + hash2, algorithm, hash_params)
 
-def construct_merkle_tree(leaves, file_writer=None):
+def construct_merkle_tree(leaves, file_writer=None, algorithm=DEFAULT_ALGORITHM, hash_params=None):
     """
     Construct a Merkle Tree from the given list of leaves.
     :param leaves: A list of string values representing the leaves.
     :param file_writer: An optional file object to write the tree structure to.
+    :param algorithm: Hash algorithm (see digest.SUPPORTED_ALGORITHMS).
+    :param hash_params: Optional algorithm parameters.
     :return: The root node of the constructed Merkle Tree.
     """
-    nodes = [MerkleNode(leaf) for leaf in leaves]
+    hash_function = get_hash_function(algorithm, hash_params)
+    nodes = [MerkleNode(leaf, hash_function) for leaf in leaves]
 
     while len(nodes) > 1:
         temp_nodes = []
@@ -49,7 +54,7 @@ def construct_merkle_tree(leaves, file_writer=None):
                 file_writer.write(f"Right Node: {node_right.content} | Hash: {node_right.hash_value}\n")
 
             parent_content = node_left.hash_value + node_right.hash_value
-            parent_node = MerkleNode(parent_content)
+            parent_node = MerkleNode(parent_content, hash_function)
             parent_node.left = node_left
             parent_node.right = node_right
 
@@ -62,11 +67,12 @@ def construct_merkle_tree(leaves, file_writer=None):
 
     return nodes[0]
 
-def validate_consistency(leaf_set1, leaf_set2):
+def validate_consistency(leaf_set1, leaf_set2, algorithm=DEFAULT_ALGORITHM, hash_params=None):
     """
     Validate the consistency between two Merkle Trees derived from different sets of leaves.
     :param leaf_set1: The first list of leaves.
     :param leaf_set2: The second list of leaves.
+    :param algorithm: Hash algorithm used by both trees.
     :return: A list of hash values demonstrating the consistency between the two trees.
     """
     common_length = 0
@@ -78,31 +84,33 @@ def validate_consistency(leaf_set1, leaf_set2):
     if common_length < len(leaf_set1):
         return []
 
-    root1 = construct_merkle_tree(leaf_set1)
-    root2 = construct_merkle_tree(leaf_set2)
+    root1 = construct_merkle_tree(leaf_set1, algorithm=algorithm, hash_params=hash_params)
+    root2 = construct_merkle_tree(leaf_set2, algorithm=algorithm, hash_params=hash_params)
     consistency_proof = [root1.hash_value]
 
     if root1.hash_value == root2.hash_value:
         consistency_proof.append(root2.hash_value)
         return consistency_proof
 
-    combined_root = merge_hashes(root1.hash_value, root2.hash_value)
+    combined_root = merge_hashes(root1.hash_value, root2.hash_value, algorithm, hash_params)
     if combined_root == root2.hash_value:
         consistency_proof.extend([combined_root, root2.hash_value])
         return consistency_proof
 
     return []
 
-def verify_inclusion(leaf, tree_root, leaf_set):
+def verify_inclusion(leaf, tree_root, leaf_set, algorithm=DEFAULT_ALGORITHM, hash_params=None):
     """
     Verify that a specific leaf is included in the Merkle Tree.
     :param leaf: The leaf to verify.
     :param tree_root: The root hash of the Merkle Tree.
     :param leaf_set: The set of leaves to reconstruct the tree.
+    :param algorithm: Hash algorithm used by the tree.
     :return: A list of hash values representing the path of inclusion.
     """
+    hash_function = get_hash_function(algorithm, hash_params)
     inclusion_path = []
-    nodes = [MerkleNode(l) for l in leaf_set]
+    nodes = [MerkleNode(l, hash_function) for l in leaf_set]
 
     while len(nodes) > 1:
         temp_nodes = []
@@ -119,7 +127,7 @@ def verify_inclusion(leaf, tree_root, leaf_set):
                 inclusion_path.append(sibling_node.hash_value)
 
             parent_content = node_left.hash_value + node_right.hash_value
-            parent_node = MerkleNode(parent_content)
+            parent_node = MerkleNode(parent_content, hash_function)
             parent_node.left = node_left
             parent_node.right = node_right
             temp_nodes.append(parent_node)
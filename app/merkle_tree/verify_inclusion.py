@@ -1,62 +1,497 @@
 # verify_inclusion.py
-import hashlib
+"""
+Inclusion proofs against Merkle tree files written by build_tree.
+
+Run from the repository root as either of:
+    python -m app.merkle_tree.verify_inclusion --tree model_merkle.tree leaf1 leaf2
+    python app/merkle_tree/verify_inclusion.py --tree model_merkle.tree leaf1 leaf2
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
 import sys
+from array import array
+from collections import OrderedDict
+
+if __name__ == "__main__" and not __package__:
+    # Run as a script: import the sibling modules through the merkle_tree package, which needs nothing from the app
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = 'merkle_tree'
+
+from .build_tree import TREE_HEADER_PREFIX
+from .digest import DEFAULT_ALGORITHM, get_hash_function, parse_description
+
+# Every record in a tree file ends with " | Hash: <hex digest>"; leaf values may span several lines
+_RECORD_END = re.compile(r' \| Hash: ([0-9a-fA-F]{8,})\s*$')
+_LEFT_PREFIXES = ('Left child: ', 'Left Node: ')
+_RIGHT_PREFIXES = ('Right child: ', 'Right Node: ')
+_PARENT_PREFIX = 'Parent ('
+
+# Pairs per indexed block: one offset is kept per block, and a proof parses at most one block per level
+_BLOCK_PAIRS = 64
+# Recently parsed blocks kept in memory; the blocks near the root are shared by every proof
+_CACHED_BLOCKS = 256
+# Queries looked up together in batch mode
+_QUERY_BATCH = 10000
+# Leaf hashes per lookup statement, below SQLite's limit on bound parameters
+_LOOKUP_CHUNK = 500
+# Page cache of the leaf lookup database, in KiB; the rest of it stays on disk
+_LOOKUP_CACHE_KIB = 8 * 1024
+
+
+def hash_leaf(value, algorithm=DEFAULT_ALGORITHM, hash_params=None):
+    """
+    Hash a leaf value the same way build_tree does.
+    :param value: The leaf value as a string.
+    :param algorithm: Hash algorithm of the tree.
+    :param hash_params: Optional algorithm parameters.
+    :return: The hash as bytes.
+    """
+    return bytes.fromhex(get_hash_function(algorithm, hash_params)(value))
+
+
+def _hash_pair(left, right, hash_function):
+    return bytes.fromhex(hash_function(left.hex() + right.hex()))
+
+
+class MerkleTreeIndex:
+    """
+    Positional index over a Merkle tree file written by build_tree.
+    build_tree writes the tree level by level, one (left, right, parent) record triple per pair,
+    so the position of every node follows from the number of pairs. Loading streams the file once
+    and keeps only the byte offset of every _BLOCK_PAIRS-th pair, plus a small cache of recently
+    read blocks; memory stays bounded however large the tree is. Each inclusion proof reads the
+    O(log n) pairs on the path from the leaf to the root, checking that every pair's parent is
+    the child recorded one level up.
+    Leaves are found by hash through a temporary on-disk SQLite table mapping every leaf hash to
+    its position, built when the tree is loaded, so each lookup is O(log n).
+    """
+
+    def __init__(self, file_path=None, algorithm=DEFAULT_ALGORITHM, hash_params=None):
+        self.file_path = file_path
+        self.hash_function = get_hash_function(algorithm, hash_params)
+        self.root = None
+        self.pair_count = 0
+        self.leaf_count = 0
+        # Nodes per level, from the leaves up, and the global index of each level's first pair
+        self.level_sizes = []
+        self._level_starts = []
+        # Byte offset of pairs 0, _BLOCK_PAIRS, 2 * _BLOCK_PAIRS, ...
+        self._offsets = array('Q')
+        self._blocks = OrderedDict()
+        self._lookup = None
+
+    @property
+    def algorithm(self):
+        return self.hash_function.algorithm
+
+    @property
+    def hash_params(self):
+        return self.hash_function.params
+
+    def hash_leaf(self, value):
+        return bytes.fromhex(self.hash_function(value))
+
+    def __len__(self):
+        return self.pair_count
+
+    @classmethod
+    def load(cls, file_path, verify=True, algorithm=DEFAULT_ALGORITHM, hash_params=None, lookup=True):
+        """
+        Stream a tree file into an index, one record at a time.
+        :param file_path: Path to the Merkle tree file.
+        :param verify: Check that every parent hash matches the hash of its two children.
+        :param lookup: Build the leaf lookup table now rather than on the first locate().
+        :param algorithm: Hash algorithm to assume when the file has no algorithm header.
+        :param hash_params: Optional algorithm parameters, used with `algorithm`.
+        :return: The populated MerkleTreeIndex.
+        """
+        index = cls(file_path, algorithm, hash_params)
+        with open(file_path, 'rb') as f:
+            first = f.readline()
+            if first.startswith(TREE_HEADER_PREFIX.encode()):
+                description = first[len(TREE_HEADER_PREFIX):].decode('utf-8', errors='replace')
+                index = cls(file_path, *parse_description(description))
+                offset = len(first)
+            else:
+                offset = 0
+            f.seek(offset)
+
+            pairs = _read_pairs(f, offset, file_path, first_line=2 if offset else 1)
+            for pair_start, (left, right, parent), line_number in pairs:
+                if index.pair_count % _BLOCK_PAIRS == 0:
+                    index._offsets.append(pair_start)
+                if verify and _hash_pair(left, right, index.hash_function) != parent:
+                    raise ValueError(f"{file_path}:{line_number}: parent hash does not match its children")
+                index.pair_count += 1
+                index.root = parent
+
+        # A tree of n leaves has n - 1 pairs
+        if index.pair_count:
+            index.leaf_count = index.pair_count + 1
+            size = index.leaf_count
+            first_pair = 0
+            while size > 1:
+                index.level_sizes.append(size)
+                index._level_starts.append(first_pair)
+                first_pair += size // 2
+                size = (size + 1) // 2
+            index.level_sizes.append(1)
+            if lookup:
+                index._leaf_lookup()
+        return index
+
+    def _leaf_lookup(self):
+        """
+        The leaf lookup table, built with one pass over the leaf records on first use.
+        An empty database name makes SQLite keep it in a temporary file, deleted on close.
+        """
+        if self._lookup is None:
+            lookup = sqlite3.connect('', check_same_thread=False)
+            lookup.execute(f"PRAGMA cache_size = -{_LOOKUP_CACHE_KIB}")
+            lookup.execute("PRAGMA journal_mode = OFF")
+            lookup.execute("PRAGMA synchronous = OFF")
+            lookup.execute("CREATE TABLE leaves (hash BLOB NOT NULL, position INTEGER NOT NULL)")
+            lookup.executemany("INSERT INTO leaves VALUES (?, ?)",
+                               ((leaf, position) for position, leaf in enumerate(self.iter_level(0))))
+            # Sorting once after the inserts is far cheaper than keeping the index up to date
+            lookup.execute("CREATE INDEX leaves_hash ON leaves (hash, position)")
+            lookup.commit()
+            self._lookup = lookup
+        return self._lookup
+
+    def close(self):
+        """
+        Drop the leaf lookup table.
+        """
+        if self._lookup is not None:
+            self._lookup.close()
+            self._lookup = None
+
+    def _block(self, number):
+        block = self._blocks.get(number)
+        if block is not None:
+            self._blocks.move_to_end(number)
+            return block
+        with open(self.file_path, 'rb') as f:
+            f.seek(self._offsets[number])
+            block = []
+            for _, pair, _ in _read_pairs(f, self._offsets[number], self.file_path):
+                block.append(pair)
+                if len(block) == _BLOCK_PAIRS:
+                    break
+        self._blocks[number] = block
+        if len(self._blocks) > _CACHED_BLOCKS:
+            self._blocks.popitem(last=False)
+        return block
+
+    def pair(self, level, position):
+        """
+        The (left, right, parent) digests of a pair of nodes.
+        :param level: Level of the two children, 0 for the leaves.
+        :param position: Index of the pair within its level.
+        """
+        number = self._level_starts[level] + position
+        block = self._block(number // _BLOCK_PAIRS)
+        if number % _BLOCK_PAIRS >= len(block):
+            raise ValueError(f"{self.file_path}: truncated tree file")
+        return block[number % _BLOCK_PAIRS]
+
+    def iter_level(self, level):
+        """
+        Stream the node digests of one level, in order, reading its pairs sequentially.
+        :param level: Level of the nodes, 0 for the leaves.
+        :return: Generator of digests as bytes.
+        """
+        if not self.pair_count:
+            return
+        if level == len(self.level_sizes) - 1:
+            yield self.root
+            return
+        size = self.level_sizes[level]
+        first = self._level_starts[level]
+        with open(self.file_path, 'rb') as f:
+            offset = self._offsets[first // _BLOCK_PAIRS]
+            f.seek(offset)
+            pairs = _read_pairs(f, offset, self.file_path)
+            # Skip to the level's first pair within its block
+            for _ in range(first % _BLOCK_PAIRS):
+                next(pairs, None)
+            for _ in range(size // 2):
+                pair = next(pairs, None)
+                if pair is None:
+                    raise ValueError(f"{self.file_path}: truncated tree file")
+                left, right, _ = pair[1]
+                yield left
+                yield right
+        if size % 2:
+            yield self._carried_node(level)
+
+    def locate(self, leaf_hashes):
+        """
+        Positions of leaves in the tree, looked up in the leaf lookup table.
+        :param leaf_hashes: Iterable of leaf hashes as bytes.
+        :return: Dict mapping each leaf hash found to its first position.
+        """
+        wanted = list(set(leaf_hashes))
+        found = {}
+        if not self.pair_count or not wanted:
+            return found
+        lookup = self._leaf_lookup()
+        for start in range(0, len(wanted), _LOOKUP_CHUNK):
+            chunk = wanted[start:start + _LOOKUP_CHUNK]
+            rows = lookup.execute(
+                f"SELECT hash, MIN(position) FROM leaves WHERE hash IN ({', '.join('?' * len(chunk))}) GROUP BY hash",
+                chunk)
+            found.update(rows)
+        return found
+
+    def _carried_node(self, level):
+        """
+        The unpaired last node of a level, read from the record of the pair it is carried up to.
+        """
+        position = self.level_sizes[level] - 1
+        while position == self.level_sizes[level] - 1 and self.level_sizes[level] % 2:
+            level += 1
+            position //= 2
+        left, right, _ = self.pair(level, position // 2)
+        return right if position % 2 else left
+
+    def prove_position(self, leaf_hash, position):
+        """
+        Build the inclusion proof for the leaf at `position`.
+        :return: A list of (sibling hash, sibling position) tuples from the leaf up to the root,
+                 or None if the records on the path do not link `leaf_hash` to the root.
+        """
+        proof = []
+        node = leaf_hash
+        level = 0
+        while level < len(self.level_sizes) - 1:
+            size = self.level_sizes[level]
+            if not (position == size - 1 and size % 2):
+                left, right, parent = self.pair(level, position // 2)
+                if (left if position % 2 == 0 else right) != node:
+                    return None
+                proof.append((right, 'right') if position % 2 == 0 else (left, 'left'))
+                node = parent
+            level += 1
+            position //= 2
+        return proof if proof and node == self.root else None
+
+    def prove_all(self, leaf_hashes):
+        """
+        Build the inclusion proofs of several leaves, locating them together.
+        :return: One proof (as returned by prove) per leaf hash, in order.
+        """
+        leaf_hashes = list(leaf_hashes)
+        positions = self.locate(leaf_hashes)
+        return [self.prove_position(leaf_hash, positions[leaf_hash]) if leaf_hash in positions else None
+                for leaf_hash in leaf_hashes]
+
+    def prove(self, leaf_hash):
+        """
+        Build the inclusion proof for a leaf.
+        :param leaf_hash: The leaf hash as bytes.
+        :return: A list of (sibling hash, sibling position) tuples from the leaf up to the root,
+                 or None if the leaf is not part of the tree.
+        """
+        return self.prove_all([leaf_hash])[0]
+
+
+def _read_pairs(f, offset, file_path, first_line=None):
+    """
+    Parse (left, right, parent) record triples from a binary tree file positioned at `offset`.
+    :param first_line: Line number of the first line read, if known, for error messages.
+    :return: Generator of (byte offset of the triple, (left, right, parent) digests, line number
+             of the parent record).
+    """
+    pending = []
+    record_type = None
+    pair_start = offset
+    line_number = (first_line or 1) - 1
+    for line in f:
+        line_number += 1
+        line_start = offset
+        offset += len(line)
+        text = line.decode('utf-8', errors='replace')
+        if record_type is None:
+            if text.startswith(_LEFT_PREFIXES):
+                record_type = 'left'
+                if not pending:
+                    pair_start = line_start
+            elif text.startswith(_RIGHT_PREFIXES):
+                record_type = 'right'
+            elif text.startswith(_PARENT_PREFIX):
+                record_type = 'parent'
+            elif not text.strip():
+                continue
+            else:
+                raise ValueError(f"{file_path}: unexpected record at byte {line_start}: {text[:40]!r}")
+
+        match = _RECORD_END.search(text)
+        if match is None:
+            continue
+
+        digest = bytes.fromhex(match.group(1))
+        if record_type == 'parent':
+            if len(pending) != 2:
+                raise ValueError(f"{file_path}: parent record without two children at byte {line_start}")
+            yield pair_start, (pending[0], pending[1], digest), line_number
+            pending = []
+        else:
+            pending.append(digest)
+        record_type = None
+
+    if pending:
+        raise ValueError(f"{file_path}: truncated tree file, {len(pending)} child record(s) without a parent")
+
+
+def verify_proof(leaf_hash, proof, root, algorithm=DEFAULT_ALGORITHM, hash_params=None):
+    """
+    Recompute the root from a leaf hash and its inclusion proof.
+    :param leaf_hash: The leaf hash as bytes.
+    :param proof: A list of (sibling hash, sibling position) tuples as returned by MerkleTreeIndex.prove.
+    :param root: The expected root hash as bytes.
+    :param algorithm: Hash algorithm of the tree.
+    :param hash_params: Optional algorithm parameters.
+    :return: True if the proof leads to the root.
+    """
+    hash_function = get_hash_function(algorithm, hash_params)
+    node = leaf_hash
+    for sibling, position in proof:
+        if position == 'left':
+            node = _hash_pair(sibling, node, hash_function)
+        else:
+            node = _hash_pair(node, sibling, hash_function)
+    return node == root
+
 
 def parse_merkle_tree(file_path="merkle.tree"):
     """
-    Parse the Merkle tree structure from a file and return it as a dictionary.
+    Parse the Merkle tree structure from a file and return it as an index.
     :param file_path: Path to the Merkle tree file.
-    :return: Dictionary representing the Merkle tree.
+    :return: A MerkleTreeIndex.
     """
-    merkle_tree = {}
-    try:
-        with open(file_path, "r") as f:
-            for line in f:
-                line_elements = line.split(" ")
-                if line_elements[0] == 'Parent(concatenation':
-                    parent_key = line_elements[6]
-                    parent_hash = line_elements[10]
-                    merkle_tree[parent_key] = parent_hash.strip()
-                else:
-                    node_key = line_elements[3]
-                    node_hash = line_elements[7]
-                    merkle_tree[node_key] = node_hash.strip()
-    except FileNotFoundError:
-        print(f"Error: File {file_path} not found.")
-    except Exception as e:
-        print(f"Error parsing the Merkle tree file: {e}")
-    return merkle_tree
+    return MerkleTreeIndex.load(file_path)
+
 
 def check_inclusion_proof(input_value, tree_structure):
     """
     Check if a given input value is included in the Merkle tree.
     :param input_value: The value to check for inclusion.
-    :param tree_structure: Dictionary representing the Merkle tree.
-    :return: List of hashes proving the inclusion of the input value.
+    :param tree_structure: A MerkleTreeIndex.
+    :return: List of sibling hashes proving the inclusion of the input value (empty if not included).
     """
-    inclusion_path = []
-    for key, value in tree_structure.items():
-        if input_value in key:
-            inclusion_path.append(value)
-            input_value = value
-    return inclusion_path
+    proof = tree_structure.prove(tree_structure.hash_leaf(input_value))
+    return [sibling.hex() for sibling, _ in proof or []]
 
-def main():
+
+def inclusion_result(index, leaf=None, leaf_hash=None):
+    """
+    Build the JSON-serializable inclusion result for one query.
     """
-    Main function to check inclusion in the Merkle tree.
+    if leaf_hash is None:
+        leaf_hash = index.hash_leaf(leaf)
+    return _result(index, leaf, leaf_hash, index.prove(leaf_hash))
+
+
+def _result(index, leaf, leaf_hash, proof):
+    result = {
+        'algorithm': index.algorithm,
+        'leaf_hash': leaf_hash.hex(),
+        'included': proof is not None,
+        'root': index.root.hex() if index.root is not None else None,
+        'proof': [{'hash': sibling.hex(), 'position': position} for sibling, position in proof or []],
+    }
+    if leaf is not None:
+        result = {'leaf': leaf, **result}
+    return result
+
+
+def _answer(index, queries):
     """
-    if len(sys.argv) != 2:
-        print("Usage: python verify_inclusion.py <input_string>")
-        sys.exit(1)
-    
-    input_string = sys.argv[1]
-    tree_structure = parse_merkle_tree()
+    Inclusion results of (leaf, leaf hash) queries, locating each batch of leaves together.
+    """
+    batch = []
+    for leaf, leaf_hash in queries:
+        batch.append((leaf, index.hash_leaf(leaf) if leaf_hash is None else leaf_hash))
+        if len(batch) == _QUERY_BATCH:
+            yield from _answer_batch(index, batch)
+            batch = []
+    if batch:
+        yield from _answer_batch(index, batch)
+
+
+def _answer_batch(index, batch):
+    proofs = index.prove_all(leaf_hash for _, leaf_hash in batch)
+    for (leaf, leaf_hash), proof in zip(batch, proofs):
+        yield _result(index, leaf, leaf_hash, proof)
+
+
+def _read_queries(stream, input_format):
+    for line in stream:
+        line = line.rstrip('\n')
+        if not line:
+            continue
+        if input_format == 'hash':
+            yield None, bytes.fromhex(line.strip())
+        elif input_format == 'json':
+            yield json.loads(line), None
+        else:
+            yield line, None
+
+
+def main(argv=None):
+    """
+    Answer inclusion queries against a Merkle tree file and print one JSON result per query.
+    """
+    parser = argparse.ArgumentParser(description="Check leaf inclusion in a Merkle tree file.")
+    parser.add_argument('leaves', nargs='*', help="Leaf values to check.")
+    parser.add_argument('--tree', default="merkle.tree", help="Path to the Merkle tree file.")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="Read one query per line from FILE ('-' for stdin).")
+    parser.add_argument('--format', choices=('text', 'json', 'hash'), default='text',
+                        help="Batch line format: raw leaf value, JSON string, or hex leaf hash.")
+    parser.add_argument('--root', help="Expected root hash; fail if the tree file has a different root.")
+    parser.add_argument('--algorithm', default=DEFAULT_ALGORITHM,
+                        help="Hash algorithm for tree files without an algorithm header.")
+    parser.add_argument('--hash-params', help="JSON algorithm parameters, e.g. '{\"digest_size\": 32}'.")
+    args = parser.parse_args(argv)
+
+    if not args.leaves and not args.batch:
+        parser.error("provide leaf values or --batch")
+
+    try:
+        index = MerkleTreeIndex.load(args.tree, algorithm=args.algorithm, hash_params=args.hash_params)
+    except (OSError, ValueError) as e:
+        print(f"Error loading the Merkle tree file: {e}", file=sys.stderr)
+        return 2
+
+    if args.root and (index.root is None or index.root.hex() != args.root.lower()):
+        print("Error: tree file root does not match the expected root.", file=sys.stderr)
+        return 2
+
+    all_included = True
+    out = sys.stdout
+
+    for result in _answer(index, ((leaf, None) for leaf in args.leaves)):
+        all_included &= result['included']
+        out.write(json.dumps(result) + '\n')
+
+    if args.batch:
+        stream = sys.stdin if args.batch == '-' else open(args.batch, 'r', encoding='utf-8')
+        try:
+            for result in _answer(index, _read_queries(stream, args.format)):
+                all_included &= result['included']
+                out.write(json.dumps(result) + '\n')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+    return 0 if all_included else 1
 
-    inclusion_proof = check_inclusion_proof(input_string, tree_structure)
-    if len(inclusion_proof) > 0:
-        print("Yes", inclusion_proof)
-    else:
-        print("No")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,2 +1,6 @@
 from app.models.modelmetadata import ModelMetadata
+from app.models.registry_log import RegistryLogEntry, RegistryLogNode, RegistryLogState, SignedTreeHead
+from app.models.scrub_checkpoint import ScrubCheckpoint
+from app.models.upload_session import UploadPart, UploadSession
+from app.models.user import User
 from app.extensions import db
@@ -1,3 +1,5 @@
+import json
+
 from app.extensions import db
 
 class ModelMetadata(db.Model):
@@ -9,14 +11,33 @@ class ModelMetadata(db.Model):
     description = db.Column(db.String(255))
     accuracy = db.Column(db.Float)
     s3_url = db.Column(db.String(255), nullable=False)
-    merkle_root = db.Column(db.String(64), nullable=False)
+    merkle_root = db.Column(db.String(128), nullable=False)
+    # Digest used for every node of the version's Merkle tree, with its parameters as JSON
+    hash_algorithm = db.Column(db.String(20), nullable=False, default='sha256', server_default='sha256')
+    hash_params = db.Column(db.Text)
+    # Content-defined chunking parameters as JSON when the leaves are chunk digests; NULL for comma-separated leaves
+    chunking = db.Column(db.Text)
     change_log = db.Column(db.Text)
+    # How the artifact and its tree file are stored; the Merkle root is over the original bytes
+    compression = db.Column(db.String(10), nullable=False, default='none', server_default='none')
+    original_size = db.Column(db.BigInteger)
+    stored_size = db.Column(db.BigInteger)
+    compression_ratio = db.Column(db.Float)
     deprecated = db.Column(db.Boolean, default=False)
     upload_date = db.Column(db.DateTime, default=db.func.current_timestamp())
+    # Outcome of the latest background integrity check (see app.scrubber)
+    last_verified_at = db.Column(db.DateTime)
+    last_verified_status = db.Column(db.String(20))
+    # ETag of the stored object that check read, so the result is not reused once the key is rewritten
+    last_verified_etag = db.Column(db.String(255))
 
-    # Define a composite unique constraint for model_name and version
+    # Define a composite unique constraint for model_name and version,
+    # plus the composite indexes backing the filters of the search endpoint
     __table_args__ = (
         db.UniqueConstraint('model_name', 'version', name='unique_model_version'),
+        db.Index('ix_model_metadata_name_upload_date', 'model_name', 'upload_date'),
+        db.Index('ix_model_metadata_deprecated_accuracy', 'deprecated', 'accuracy'),
+        db.Index('ix_model_metadata_deprecated_upload_date', 'deprecated', 'upload_date'),
     )
 
     def to_dict(self):
@@ -27,7 +48,28 @@ class ModelMetadata(db.Model):
             'accuracy': self.accuracy,
             's3_url': self.s3_url,
             'merkle_root': self.merkle_root,
+            'hash_algorithm': self.hash_algorithm,
+            'hash_params': self.get_hash_params(),
+            'chunking': self.get_chunking(),
             'change_log': self.change_log,
+            'compression': self.compression,
+            'original_size': self.original_size,
+            'stored_size': self.stored_size,
+            'compression_ratio': self.compression_ratio,
             'deprecated': self.deprecated,
             'upload_date': self.upload_date,
+            'last_verified_at': self.last_verified_at,
+            'last_verified_status': self.last_verified_status,
         }
+
+    def get_hash_params(self):
+        return json.loads(self.hash_params) if self.hash_params else {}
+
+    def get_chunking(self):
+        return json.loads(self.chunking) if self.chunking else None
+
+    def merkle_options(self):
+        """
+        Keyword arguments for the merkle_tree functions, matching how this version was hashed.
+        """
+        return {'algorithm': self.hash_algorithm or 'sha256', 'hash_params': self.get_hash_params()}
@@ -0,0 +1,65 @@
+from app.extensions import db
+
+
+class RegistryLogEntry(db.Model):
+    """
+    One leaf of the registry transparency log: the canonical record of a model version.
+    """
+    __tablename__ = 'registry_log_entry'
+
+    leaf_index = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    model_id = db.Column(db.Integer, db.ForeignKey('model_metadata.id'), nullable=False, unique=True)
+    record = db.Column(db.Text, nullable=False)
+    leaf_hash = db.Column(db.String(64), nullable=False)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    def to_dict(self):
+        return {
+            'leaf_index': self.leaf_index,
+            'record': self.record,
+            'leaf_hash': self.leaf_hash,
+            'created_at': self.created_at,
+        }
+
+
+class RegistryLogNode(db.Model):
+    """
+    Root hash of a perfect subtree of the log; level 0 holds the leaf hashes.
+    """
+    __tablename__ = 'registry_log_node'
+
+    level = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    node_index = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    hash = db.Column(db.String(64), nullable=False)
+
+
+class RegistryLogState(db.Model):
+    """
+    Single-row counter of the registry log size. Appends increment it first, which locks the row
+    until commit, so concurrent appends are given consecutive leaf indices one at a time.
+    """
+    __tablename__ = 'registry_log_state'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    size = db.Column(db.Integer, nullable=False, default=0)
+
+
+class SignedTreeHead(db.Model):
+    """
+    A persisted, signed snapshot (size and root) of the registry log.
+    """
+    __tablename__ = 'signed_tree_head'
+
+    id = db.Column(db.Integer, primary_key=True)
+    tree_size = db.Column(db.Integer, nullable=False, index=True)
+    root_hash = db.Column(db.String(64), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    signature = db.Column(db.String(128), nullable=False)
+
+    def to_dict(self):
+        return {
+            'tree_size': self.tree_size,
+            'root_hash': self.root_hash,
+            'timestamp': self.timestamp.isoformat(),
+            'signature': self.signature,
+        }
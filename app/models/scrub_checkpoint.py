@@ -0,0 +1,25 @@
+from app.extensions import db
+
+
+class ScrubCheckpoint(db.Model):
+    """
+    Progress of the background integrity scrubber, so an interrupted pass can resume.
+    """
+    __tablename__ = 'scrub_checkpoint'
+
+    name = db.Column(db.String(50), primary_key=True)
+    # Highest model_metadata.id checked in the current pass; 0 when no pass is in progress
+    cursor = db.Column(db.Integer, nullable=False, default=0)
+    pass_started_at = db.Column(db.DateTime)
+    pass_finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(),
+                           onupdate=db.func.current_timestamp())
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'cursor': self.cursor,
+            'pass_started_at': self.pass_started_at,
+            'pass_finished_at': self.pass_finished_at,
+            'updated_at': self.updated_at,
+        }
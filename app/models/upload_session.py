@@ -0,0 +1,88 @@
+import json
+
+from app.extensions import db
+
+
+class UploadSession(db.Model):
+    """
+    A resumable upload of a new model version, sent as numbered parts and finalized in one call.
+    """
+    __tablename__ = 'upload_session'
+
+    id = db.Column(db.String(32), primary_key=True)
+    model_name = db.Column(db.String(120), nullable=False)
+    version = db.Column(db.String(50), nullable=False)
+    description = db.Column(db.String(255))
+    accuracy = db.Column(db.Float, nullable=False)
+    change_log = db.Column(db.Text)
+    hash_algorithm = db.Column(db.String(20), nullable=False)
+    hash_params = db.Column(db.Text)
+    # Every part but the last is exactly part_size bytes, a power-of-two multiple of leaf_size,
+    # so each full part is one perfect subtree of the version's Merkle tree
+    leaf_size = db.Column(db.Integer, nullable=False)
+    part_size = db.Column(db.BigInteger, nullable=False)
+    # Multipart upload id of the storage driver
+    storage_upload_id = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='open')
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(),
+                           onupdate=db.func.current_timestamp())
+
+    parts = db.relationship('UploadPart', order_by='UploadPart.part_number', cascade='all, delete-orphan',
+                            lazy='select')
+
+    def get_hash_params(self):
+        return json.loads(self.hash_params) if self.hash_params else None
+
+    def to_dict(self):
+        return {
+            'session_id': self.id,
+            'model_name': self.model_name,
+            'version': self.version,
+            'status': self.status,
+            'leaf_size': self.leaf_size,
+            'part_size': self.part_size,
+            'hash_algorithm': self.hash_algorithm,
+            'hash_params': self.get_hash_params(),
+            'parts': [part.to_dict() for part in self.parts],
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
+
+
+class UploadPart(db.Model):
+    """
+    A received part of an upload session, hashed on arrival.
+    """
+    __tablename__ = 'upload_part'
+
+    session_id = db.Column(db.String(32), db.ForeignKey('upload_session.id'), primary_key=True)
+    part_number = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    # Leaves of the part (chunk digests), one per line
+    leaves = db.Column(db.Text, nullable=False)
+    # MerkleAccumulator frontier over the part's leaves as JSON [[height, hash], ...]
+    frontier = db.Column(db.Text, nullable=False)
+    # Hashes of the part's subtree level by level, from the leaf hashes up, as JSON [[hash, ...], ...]
+    nodes = db.Column(db.Text)
+    # Token returned by the storage driver for this upload of the part, such as an S3 ETag;
+    # a new upload only replaces the row if it still holds the token that upload started from
+    storage_token = db.Column(db.String(255))
+    received_at = db.Column(db.DateTime, default=db.func.current_timestamp(),
+                            onupdate=db.func.current_timestamp())
+
+    def get_leaves(self):
+        return self.leaves.split('\n')
+
+    def get_frontier(self):
+        return [(int(height), node) for height, node in json.loads(self.frontier)]
+
+    def get_nodes(self):
+        return json.loads(self.nodes) if self.nodes else None
+
+    def to_dict(self):
+        return {
+            'part_number': self.part_number,
+            'size': self.size,
+            'received_at': self.received_at,
+        }
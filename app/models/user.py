@@ -1,8 +1,10 @@
 # app/models/user.py
 from app.extensions import db
 from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
 from werkzeug.security import generate_password_hash, check_password_hash
-from app.auth.utils import generate_jwt_token
+from app.auth.utils import generate_jwt_token, invalidate_user_cache
 
 class User(db.Model, UserMixin):
     __tablename__ = 'users'
@@ -34,3 +36,24 @@ class User(db.Model, UserMixin):
     # Generate JWT token for the user
     def generate_auth_token(self):
         return generate_jwt_token(self.id, self.role)
+
+
+# Drop cached tokens and role lookups once a change to a user's role or status is committed;
+# dropping them earlier would let a concurrent request cache the old values again
+@event.listens_for(User.is_active, 'set')
+@event.listens_for(User.role, 'set')
+def _invalidate_auth_cache(target, value, oldvalue, initiator):
+    session = object_session(target)
+    if value != oldvalue and target.id is not None and session is not None:
+        session.info.setdefault('auth_cache_users', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_users(session):
+    for user_id in session.info.pop('auth_cache_users', ()):
+        invalidate_user_cache(user_id)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_rolled_back_users(session, previous_transaction):
+    session.info.pop('auth_cache_users', None)
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+bp = Blueprint('profiling', __name__)
+
+from app.profiling import routes
@@ -0,0 +1,187 @@
+# app/profiling/profiler.py
+"""
+Opt-in profiling of single requests.
+
+When PROFILING_ENABLED is set, a WSGI middleware profiles requests that carry the
+PROFILING_HEADER with the PROFILING_TOKEN, plus a random PROFILING_SAMPLE_RATE fraction of all
+requests. The profile covers the view and the sending of the response body, and is saved as a
+pstats file (readable with `python -m pstats` or snakeviz) next to a small JSON summary, with
+peak traced memory when PROFILING_TRACE_MEMORY is set. Only the newest PROFILING_MAX_FILES
+profiles are kept.
+
+When profiling is disabled the middleware is not installed, so requests pay nothing for it.
+One request per process is profiled at a time; others arriving meanwhile run unprofiled.
+"""
+import cProfile
+import datetime
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import tracemalloc
+
+PROFILE_SUFFIX = '.prof'
+SUMMARY_SUFFIX = '.json'
+
+_profile_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def init_app(app):
+    if app.config.get('PROFILING_ENABLED'):
+        app.wsgi_app = ProfilingMiddleware(app.wsgi_app, app.config)
+
+
+def profile_dir(config):
+    return config['PROFILING_DIR']
+
+
+def is_authorized(config, token):
+    """
+    Whether `token` is the configured profiling token; always False if none is configured.
+    """
+    expected = config.get('PROFILING_TOKEN')
+    return bool(expected) and token is not None and hmac.compare_digest(token.encode(), expected.encode())
+
+
+def list_profiles(config):
+    """
+    Summaries of the stored profiles, newest first.
+    """
+    directory = profile_dir(config)
+    if not os.path.isdir(directory):
+        return []
+    summaries = []
+    for filename in sorted(os.listdir(directory), reverse=True):
+        if not filename.endswith(SUMMARY_SUFFIX):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                summaries.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return summaries
+
+
+def profile_path(config, name):
+    """
+    Path of a stored profile, or None if `name` is not one.
+    """
+    if not re.fullmatch(r'[\w.-]+', name) or not name.endswith(PROFILE_SUFFIX):
+        return None
+    path = os.path.join(profile_dir(config), name)
+    return path if os.path.isfile(path) else None
+
+
+def _prune(directory, max_files):
+    profiles = sorted(name for name in os.listdir(directory) if name.endswith(PROFILE_SUFFIX))
+    for name in profiles[:max(0, len(profiles) - max_files)]:
+        stem = name[:-len(PROFILE_SUFFIX)]
+        for path in (os.path.join(directory, name), os.path.join(directory, stem + SUMMARY_SUFFIX)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class ProfilingMiddleware:
+    """
+    WSGI middleware wrapping chosen requests in cProfile (and optionally tracemalloc).
+    """
+
+    def __init__(self, wsgi_app, config):
+        self.wsgi_app = wsgi_app
+        self.config = config
+        self.header_key = 'HTTP_' + config['PROFILING_HEADER'].upper().replace('-', '_')
+
+    def _wanted(self, environ):
+        if is_authorized(self.config, environ.get(self.header_key)):
+            return True
+        rate = self.config.get('PROFILING_SAMPLE_RATE', 0)
+        return rate > 0 and random.random() < rate
+
+    def __call__(self, environ, start_response):
+        if not self._wanted(environ) or not _profile_lock.acquire(blocking=False):
+            return self.wsgi_app(environ, start_response)
+        return _ProfiledRequest(self, environ, start_response).run()
+
+    def save(self, profiler, environ, status, duration, peak_memory):
+        directory = profile_dir(self.config)
+        os.makedirs(directory, exist_ok=True)
+
+        created = datetime.datetime.now(datetime.timezone.utc)
+        path = re.sub(r'[^\w.-]+', '_', environ.get('PATH_INFO', '/')).strip('_') or 'root'
+        stem = f"{created:%Y%m%dT%H%M%S%f}-{environ.get('REQUEST_METHOD', 'GET')}-{path[:80]}"
+        profiler.dump_stats(os.path.join(directory, stem + PROFILE_SUFFIX))
+        summary = {
+            'name': stem + PROFILE_SUFFIX,
+            'method': environ.get('REQUEST_METHOD'),
+            'path': environ.get('PATH_INFO'),
+            'query_string': environ.get('QUERY_STRING') or None,
+            'status': status,
+            'duration_seconds': round(duration, 6),
+            'peak_memory_bytes': peak_memory,
+            'created_at': created.isoformat(),
+        }
+        with open(os.path.join(directory, stem + SUMMARY_SUFFIX), 'w') as f:
+            json.dump(summary, f)
+        _prune(directory, self.config['PROFILING_MAX_FILES'])
+
+
+class _ProfiledRequest:
+    """
+    One profiled request. Profiling stops when the server closes the response body.
+    """
+
+    def __init__(self, middleware, environ, start_response):
+        self.middleware = middleware
+        self.environ = environ
+        self.start_response = start_response
+        self.status = None
+        self.profiler = cProfile.Profile()
+        self.trace_memory = middleware.config.get('PROFILING_TRACE_MEMORY') and not tracemalloc.is_tracing()
+        self.started = None
+        self.body = None
+
+    def _start_response(self, status, headers, exc_info=None):
+        self.status = status
+        return self.start_response(status, headers, exc_info)
+
+    def run(self):
+        self.started = time.perf_counter()
+        if self.trace_memory:
+            tracemalloc.start()
+        try:
+            self.profiler.enable()
+            self.body = self.middleware.wsgi_app(self.environ, self._start_response)
+        except BaseException:
+            self.close()
+            raise
+        return self
+
+    def __iter__(self):
+        yield from self.body
+
+    def close(self):
+        try:
+            if self.body is not None and hasattr(self.body, 'close'):
+                self.body.close()
+        finally:
+            self.profiler.disable()
+            duration = time.perf_counter() - self.started
+            peak_memory = None
+            if self.trace_memory:
+                peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            try:
+                self.middleware.save(self.profiler, self.environ, self.status, duration, peak_memory)
+            except OSError:
+                # A profile that cannot be written must not fail the request it measured
+                logger.exception("Could not save request profile")
+            finally:
+                _profile_lock.release()
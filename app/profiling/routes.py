@@ -0,0 +1,39 @@
+from flask import current_app, jsonify, request, send_file
+from app.profiling import bp
+from app.profiling.profiler import is_authorized, list_profiles, profile_path
+
+
+def _check_access():
+    # Profiles reveal code paths and request details; they are only served with the profiling token
+    if not current_app.config.get('PROFILING_ENABLED'):
+        return jsonify({'error': 'Profiling is not enabled.'}), 404
+    if not is_authorized(current_app.config, request.headers.get(current_app.config['PROFILING_HEADER'])):
+        return jsonify({'error': 'A valid profiling token is required.'}), 403
+    return None
+
+
+# Stored request profiles, newest first
+@bp.route('/profiles', methods=['GET'])
+def get_profiles():
+    try:
+        denied = _check_access()
+        if denied:
+            return denied
+        return jsonify({'profiles': list_profiles(current_app.config)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# Download one profile as a pstats file
+@bp.route('/profiles/<name>', methods=['GET'])
+def download_profile(name):
+    try:
+        denied = _check_access()
+        if denied:
+            return denied
+        path = profile_path(current_app.config, name)
+        if path is None:
+            return jsonify({'error': f'Profile {name} not found.'}), 404
+        return send_file(path, as_attachment=True, download_name=name, mimetype='application/octet-stream')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+bp = Blueprint('registry-log', __name__)
+
+from app.registry_log import routes, commands
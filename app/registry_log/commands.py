@@ -0,0 +1,78 @@
+import click
+
+from app.extensions import db
+from app.registry_log import bp
+from app.registry_log.log import (append_model_version, generate_signing_key, get_node, latest_tree_head,
+                                  model_record, sign_tree_head, signing_configured, verify_tree_head)
+from app.merkle_tree.transparency import hash_leaf, tree_root
+from app.models.modelmetadata import ModelMetadata
+from app.models.registry_log import RegistryLogEntry
+
+
+@bp.cli.command('backfill')
+def backfill():
+    """Append every model version that is not in the log yet, oldest first."""
+    logged = db.select(RegistryLogEntry.model_id)
+    pending = ModelMetadata.query.filter(ModelMetadata.id.notin_(logged)).order_by(ModelMetadata.id).all()
+    for model_metadata in pending:
+        append_model_version(model_metadata)
+    if signing_configured():
+        sign_tree_head()
+    db.session.commit()
+    click.echo(f"Appended {len(pending)} model version(s) to the registry log.")
+
+
+@bp.cli.command('generate-key')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+def generate_key(path):
+    """Write a new Ed25519 tree head signing key to PATH and print its public key."""
+    try:
+        info = generate_signing_key(path)
+    except FileExistsError:
+        raise click.ClickException(f"{path} already exists.")
+    click.echo(f"Wrote the signing key to {path}; set TREE_HEAD_SIGNING_KEY_FILE to use it.")
+    click.echo(f"Public key: {info['public_key']}")
+
+
+@bp.cli.command('sign')
+def sign():
+    """Persist a signed tree head for the current log."""
+    if not signing_configured():
+        raise click.ClickException("TREE_HEAD_SIGNING_KEY_FILE is not configured.")
+    tree_head = sign_tree_head()
+    db.session.commit()
+    if tree_head is None:
+        click.echo("The registry log is empty.")
+    else:
+        click.echo(f"Signed tree head: size {tree_head.tree_size}, root {tree_head.root_hash}")
+
+
+@bp.cli.command('audit')
+def audit():
+    """Check every logged record against the registry and the latest signed tree head."""
+    problems = 0
+    for entry in RegistryLogEntry.query.order_by(RegistryLogEntry.leaf_index).yield_per(1000):
+        model_metadata = db.session.get(ModelMetadata, entry.model_id)
+        if model_metadata is None:
+            click.echo(f"Entry {entry.leaf_index}: model version was deleted from the registry.")
+            problems += 1
+        elif model_record(model_metadata) != entry.record or hash_leaf(entry.record) != entry.leaf_hash:
+            click.echo(f"Entry {entry.leaf_index}: {model_metadata.model_name} v{model_metadata.version} "
+                       f"does not match its logged record.")
+            problems += 1
+
+    tree_head = latest_tree_head()
+    if tree_head is not None:
+        if not signing_configured():
+            click.echo("TREE_HEAD_SIGNING_KEY_FILE is not configured; tree head signatures were not checked.")
+            problems += 1
+        elif not verify_tree_head(tree_head):
+            click.echo(f"Signed tree head {tree_head.id} has an invalid signature.")
+            problems += 1
+        if tree_root(tree_head.tree_size, get_node) != tree_head.root_hash:
+            click.echo(f"Signed tree head {tree_head.id} does not match the stored log.")
+            problems += 1
+
+    if problems:
+        raise click.ClickException(f"{problems} problem(s) found.")
+    click.echo("Registry log is consistent.")
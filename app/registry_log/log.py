@@ -0,0 +1,214 @@
+# app/registry_log/log.py
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from flask import current_app
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.merkle_tree.transparency import completed_nodes, hash_leaf, hash_pair, record_leaf, tree_root
+from app.models.registry_log import RegistryLogEntry, RegistryLogNode, RegistryLogState, SignedTreeHead
+
+# Attempts at appending a version when another append claimed the same leaf index first
+APPEND_ATTEMPTS = 3
+
+
+def get_node(level, node_index):
+    """
+    Hash of a perfect subtree of the log, as needed by the proof functions.
+    """
+    node = db.session.get(RegistryLogNode, (level, node_index))
+    if node is None:
+        raise LookupError(f"Registry log node ({level}, {node_index}) is missing.")
+    return node.hash
+
+
+def log_size():
+    """
+    Number of leaves in the registry log.
+    """
+    last_index = db.session.query(func.max(RegistryLogEntry.leaf_index)).scalar()
+    return 0 if last_index is None else last_index + 1
+
+
+def model_record(model_metadata):
+    return record_leaf(model_metadata.model_name, model_metadata.version,
+                       model_metadata.merkle_root, model_metadata.upload_date)
+
+
+def allocate_leaf_index():
+    """
+    Claim the next leaf index in the current transaction.
+    The size counter is incremented before it is read, so the row stays locked until commit and
+    a concurrent append waits for this one instead of reading the same size.
+    """
+    claimed = db.session.execute(
+        update(RegistryLogState).where(RegistryLogState.id == 1).values(size=RegistryLogState.size + 1)
+    )
+    if claimed.rowcount == 0:
+        # First append on a database without the counter row; a concurrent first append fails the insert and retries
+        db.session.add(RegistryLogState(id=1, size=log_size() + 1))
+        db.session.flush()
+    return db.session.execute(select(RegistryLogState.size).where(RegistryLogState.id == 1)).scalar_one() - 1
+
+
+def append_model_version(model_metadata):
+    """
+    Append a model version to the log in the current transaction.
+    Writes the leaf plus the O(log n) perfect subtree roots it completes. Each attempt runs in a
+    savepoint and is retried if its leaf index turns out to be taken.
+    The row must already be flushed so that its id and upload date are set.
+    :param model_metadata: The ModelMetadata row.
+    :return: The new RegistryLogEntry.
+    """
+    for attempt in range(1, APPEND_ATTEMPTS + 1):
+        try:
+            with db.session.begin_nested():
+                entry = _append_leaf(model_metadata)
+            break
+        except IntegrityError:
+            if attempt == APPEND_ATTEMPTS:
+                raise
+            current_app.logger.warning("Registry log index conflict appending model %s, retrying", model_metadata.id)
+            # The counter fell behind the stored entries (e.g. rows written without it); catch it up
+            size = log_size()
+            db.session.execute(update(RegistryLogState)
+                               .where(RegistryLogState.id == 1, RegistryLogState.size < size).values(size=size))
+
+    maybe_sign_tree_head(entry.leaf_index + 1)
+    return entry
+
+
+def _append_leaf(model_metadata):
+    leaf_index = allocate_leaf_index()
+    record = model_record(model_metadata)
+    leaf_hash = hash_leaf(record)
+
+    entry = RegistryLogEntry(leaf_index=leaf_index, model_id=model_metadata.id, record=record, leaf_hash=leaf_hash)
+    db.session.add(entry)
+    db.session.add(RegistryLogNode(level=0, node_index=leaf_index, hash=leaf_hash))
+
+    node = leaf_hash
+    for level, node_index in completed_nodes(leaf_index):
+        node = hash_pair(get_node(level - 1, 2 * node_index), node)
+        db.session.add(RegistryLogNode(level=level, node_index=node_index, hash=node))
+    db.session.flush()
+    return entry
+
+
+def signing_configured():
+    return bool(current_app.config.get('TREE_HEAD_SIGNING_KEY_FILE'))
+
+
+def generate_signing_key(path):
+    """
+    Write a new Ed25519 private key for tree heads to `path`, PEM encoded and readable by the owner only.
+    :return: The public key, as published by public_key_info.
+    """
+    key = Ed25519PrivateKey.generate()
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                            serialization.NoEncryption())
+    with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'wb') as f:
+        f.write(pem)
+    return _public_key_info(key.public_key())
+
+
+def _signing_key():
+    # Tree heads get a key of their own: the session secret must not be able to forge them
+    path = current_app.config.get('TREE_HEAD_SIGNING_KEY_FILE')
+    if not path:
+        raise RuntimeError("TREE_HEAD_SIGNING_KEY_FILE is not configured; tree heads cannot be signed or verified.")
+    cached = current_app.extensions.get('tree_head_signing_key')
+    if cached is None or cached[0] != path:
+        with open(path, 'rb') as f:
+            key = serialization.load_pem_private_key(f.read(), password=None)
+        if not isinstance(key, Ed25519PrivateKey):
+            raise RuntimeError(f"{path} does not hold an Ed25519 private key.")
+        cached = current_app.extensions['tree_head_signing_key'] = (path, key)
+    return cached[1]
+
+
+def _public_key_info(public_key):
+    raw = public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+    return {
+        'algorithm': 'ed25519',
+        'key_id': hashlib.sha256(raw).hexdigest(),
+        'public_key': raw.hex(),
+        'public_key_pem': public_key.public_bytes(serialization.Encoding.PEM,
+                                                  serialization.PublicFormat.SubjectPublicKeyInfo).decode('ascii'),
+        'signed_message': '{tree_size}:{root_hash}:{timestamp}',
+    }
+
+
+def public_key_info():
+    """
+    The public key tree heads are verified with, for publishing.
+    The signature of a tree head is over the UTF-8 bytes of its `signed_message`, with the
+    timestamp in ISO 8601 form as the tree head reports it.
+    """
+    return _public_key_info(_signing_key().public_key())
+
+
+def _tree_head_message(tree_size, root_hash, timestamp):
+    return f"{tree_size}:{root_hash}:{timestamp.isoformat()}".encode('utf-8')
+
+
+def tree_head_signature(tree_size, root_hash, timestamp):
+    return _signing_key().sign(_tree_head_message(tree_size, root_hash, timestamp)).hex()
+
+
+def verify_tree_head(tree_head):
+    """
+    Check the signature of a SignedTreeHead with the public half of the configured key.
+    """
+    message = _tree_head_message(tree_head.tree_size, tree_head.root_hash, tree_head.timestamp)
+    try:
+        _signing_key().public_key().verify(bytes.fromhex(tree_head.signature), message)
+    except (InvalidSignature, ValueError):
+        return False
+    return True
+
+
+def latest_tree_head():
+    return SignedTreeHead.query.order_by(SignedTreeHead.id.desc()).first()
+
+
+def sign_tree_head(tree_size=None):
+    """
+    Persist a signed tree head for the current (or given) log size in the current transaction.
+    :return: The new SignedTreeHead, or None if the log is empty.
+    """
+    if tree_size is None:
+        tree_size = log_size()
+    if tree_size == 0:
+        return None
+
+    timestamp = datetime.utcnow().replace(microsecond=0)
+    root_hash = tree_root(tree_size, get_node)
+    tree_head = SignedTreeHead(
+        tree_size=tree_size,
+        root_hash=root_hash,
+        timestamp=timestamp,
+        signature=tree_head_signature(tree_size, root_hash, timestamp)
+    )
+    db.session.add(tree_head)
+    return tree_head
+
+
+def maybe_sign_tree_head(tree_size):
+    """
+    Sign a new tree head if the last one is older than TREE_HEAD_INTERVAL seconds.
+    Does nothing without a TREE_HEAD_SIGNING_KEY_FILE; the log still grows and can be signed later.
+    """
+    if not signing_configured():
+        return None
+    latest = latest_tree_head()
+    interval = timedelta(seconds=current_app.config.get('TREE_HEAD_INTERVAL', 3600))
+    if latest is None or datetime.utcnow() - latest.timestamp >= interval:
+        return sign_tree_head(tree_size)
+    return None
@@ -0,0 +1,104 @@
+from flask import request, jsonify
+from app.registry_log import bp
+from app.registry_log.log import get_node, log_size, latest_tree_head, public_key_info, signing_configured
+from app.merkle_tree.transparency import inclusion_proof, consistency_proof, tree_root
+from app.models.modelmetadata import ModelMetadata
+from app.models.registry_log import RegistryLogEntry, SignedTreeHead
+
+
+# Latest signed tree head, or the current unsigned head with ?current=true
+@bp.route('/tree-head', methods=['GET'])
+def get_tree_head():
+    try:
+        if request.args.get('current', '').lower() == 'true':
+            size = log_size()
+            return jsonify({
+                'tree_size': size,
+                'root_hash': tree_root(size, get_node) if size else None
+            }), 200
+
+        tree_head = latest_tree_head()
+        if not tree_head:
+            return jsonify({'error': 'No signed tree head has been published yet.'}), 404
+        return jsonify(tree_head.to_dict()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# Public key that verifies the signatures of tree heads
+@bp.route('/public-key', methods=['GET'])
+def get_public_key():
+    try:
+        if not signing_configured():
+            return jsonify({'error': 'Tree head signing is not configured.'}), 404
+        return jsonify(public_key_info()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# Recent signed tree heads, newest first
+@bp.route('/tree-heads', methods=['GET'])
+def list_tree_heads():
+    try:
+        limit = min(request.args.get('limit', 100, type=int), 1000)
+        tree_heads = SignedTreeHead.query.order_by(SignedTreeHead.id.desc()).limit(limit).all()
+        return jsonify({'tree_heads': [tree_head.to_dict() for tree_head in tree_heads]}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# Inclusion proof of a model version record in the tree of the given size
+# (defaults to the current log size, which always includes the record)
+@bp.route('/inclusion/<model_name>/<version>', methods=['GET'])
+def get_inclusion_proof(model_name, version):
+    try:
+        model_metadata = ModelMetadata.query.filter_by(model_name=model_name, version=version).first()
+        if not model_metadata:
+            return jsonify({'error': f'Model {model_name} with version {version} not found in the registry.'}), 404
+
+        entry = RegistryLogEntry.query.filter_by(model_id=model_metadata.id).first()
+        if not entry:
+            return jsonify({'error': f'Model {model_name} version {version} has not been logged yet.'}), 404
+
+        current_size = log_size()
+        tree_size = request.args.get('tree_size', current_size, type=int)
+        if not 0 < tree_size <= current_size:
+            return jsonify({'error': f'tree_size must be between 1 and the current log size ({current_size}).'}), 400
+        if entry.leaf_index >= tree_size:
+            return jsonify({
+                'error': f'Model {model_name} version {version} was logged at index {entry.leaf_index}, after the '
+                         f'first {tree_size} entries; request a tree_size of at least {entry.leaf_index + 1}.'
+            }), 400
+
+        return jsonify({
+            'leaf_index': entry.leaf_index,
+            'record': entry.record,
+            'leaf_hash': entry.leaf_hash,
+            'tree_size': tree_size,
+            'root_hash': tree_root(tree_size, get_node),
+            'proof': inclusion_proof(entry.leaf_index, tree_size, get_node)
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# Consistency proof between two tree sizes
+@bp.route('/consistency', methods=['GET'])
+def get_consistency_proof():
+    try:
+        first = request.args.get('first', type=int)
+        second = request.args.get('second', type=int)
+        if first is None or second is None:
+            return jsonify({'error': "'first' and 'second' tree sizes are required."}), 400
+        if not 0 < first <= second <= log_size():
+            return jsonify({'error': 'Tree sizes must satisfy 0 < first <= second <= current log size.'}), 400
+
+        return jsonify({
+            'first': first,
+            'second': second,
+            'first_root': tree_root(first, get_node),
+            'second_root': tree_root(second, get_node),
+            'proof': consistency_proof(first, second, get_node)
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+bp = Blueprint('scrubber', __name__)
+
+from app.scrubber import commands
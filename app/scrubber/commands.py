@@ -0,0 +1,72 @@
+import time
+
+import click
+from flask import current_app
+
+from app.extensions import db
+from app.scrubber import bp
+from app.scrubber.scrub import DEFAULT_CHECKPOINT, STATUS_OK, get_checkpoint, scrub_pass
+from app.models.modelmetadata import ModelMetadata
+from app.storage import get_storage
+
+
+@bp.cli.command('run')
+@click.option('--continuous', is_flag=True, help="Start a new pass every --interval seconds instead of exiting.")
+@click.option('--interval', type=int, default=None, help="Seconds between passes (default: SCRUB_INTERVAL).")
+@click.option('--workers', type=int, default=None, help="Parallel verifications (default: SCRUB_WORKERS).")
+@click.option('--rate', type=int, default=None,
+              help="Read limit in bytes per second across workers, 0 for none (default: SCRUB_MAX_BYTES_PER_SECOND).")
+@click.option('--batch-size', type=int, default=None, help="Versions per checkpoint (default: SCRUB_BATCH_SIZE).")
+@click.option('--skip-deprecated', is_flag=True, help="Do not verify deprecated versions.")
+@click.option('--restart', is_flag=True, help="Discard the saved checkpoint and start a new pass.")
+@click.option('--checkpoint', 'checkpoint_name', default=DEFAULT_CHECKPOINT, show_default=True,
+              help="Checkpoint name, for running separate scrubbers.")
+@click.option('--quiet', is_flag=True, help="Only print problems and pass summaries.")
+def run(continuous, interval, workers, rate, batch_size, skip_deprecated, restart, checkpoint_name, quiet):
+    """Verify stored model versions against their Merkle roots."""
+    config = current_app.config
+    interval = config['SCRUB_INTERVAL'] if interval is None else interval
+
+    def report(model_metadata, status, error):
+        if status != STATUS_OK or not quiet:
+            message = f"{model_metadata.model_name} v{model_metadata.version}: {status}"
+            click.echo(f"{message} ({error})" if error else message)
+
+    while True:
+        counts = scrub_pass(
+            get_storage(),
+            workers=config['SCRUB_WORKERS'] if workers is None else workers,
+            bytes_per_second=config['SCRUB_MAX_BYTES_PER_SECOND'] if rate is None else rate,
+            batch_size=config['SCRUB_BATCH_SIZE'] if batch_size is None else batch_size,
+            skip_deprecated=skip_deprecated,
+            checkpoint_name=checkpoint_name,
+            restart=restart,
+            on_result=report,
+        )
+        click.echo("Pass complete: " + ", ".join(f"{count} {status}" for status, count in counts.items()))
+        if not continuous:
+            break
+        restart = False
+        time.sleep(interval)
+
+    if not continuous and sum(counts.values()) != counts[STATUS_OK]:
+        raise click.ClickException("Some model versions failed verification.")
+
+
+@bp.cli.command('status')
+@click.option('--checkpoint', 'checkpoint_name', default=DEFAULT_CHECKPOINT, show_default=True)
+def status(checkpoint_name):
+    """Show scrubber progress and the latest result counts."""
+    checkpoint = get_checkpoint(checkpoint_name)
+    if checkpoint.cursor:
+        click.echo(f"Pass in progress since {checkpoint.pass_started_at}, checked up to id {checkpoint.cursor}.")
+    elif checkpoint.pass_finished_at:
+        click.echo(f"Last pass finished at {checkpoint.pass_finished_at}.")
+    else:
+        click.echo("No scrub pass has run yet.")
+    db.session.rollback()
+
+    rows = db.session.query(ModelMetadata.last_verified_status, db.func.count()) \
+        .group_by(ModelMetadata.last_verified_status).all()
+    for result, count in rows:
+        click.echo(f"{result or 'never verified'}: {count}")
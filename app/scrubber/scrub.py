@@ -0,0 +1,232 @@
+# app/scrubber/scrub.py
+"""
+Background integrity scrubbing of stored model versions.
+
+Versions are checked in id order, a batch at a time. Worker threads stream each object from
+storage (sharing one byte-rate limit) straight into Merkle verification, without buffering it;
+comma-separated objects are read twice, since their encoding is detected before they are
+decoded. The calling thread
+records the results on model_metadata and moves the pass checkpoint forward after every batch,
+so an interrupted pass resumes after the last completed batch.
+"""
+import datetime
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.extensions import db
+from app.merkle_tree import verify_model_integrity
+from app.models.modelmetadata import ModelMetadata
+from app.models.scrub_checkpoint import ScrubCheckpoint
+from app.storage import model_key
+from app.storage.base import IterableReader
+from app.storage.compression import COMPRESSION_NONE, stream_object
+
+STATUS_OK = 'ok'
+STATUS_CORRUPT = 'corrupt'
+STATUS_MISSING = 'missing'
+STATUS_ERROR = 'error'
+
+DEFAULT_CHECKPOINT = 'default'
+
+
+class RateLimiter:
+    """
+    Byte-rate limit shared by several threads. Each caller reserves time for the bytes it
+    has read and sleeps until the reservation ends, so the total rate stays at or below
+    `bytes_per_second`. A rate of 0 or None disables the limit.
+    """
+
+    def __init__(self, bytes_per_second):
+        self.bytes_per_second = bytes_per_second
+        self._lock = threading.Lock()
+        self._available_at = time.monotonic()
+
+    def consume(self, byte_count):
+        if not self.bytes_per_second:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._available_at = max(self._available_at, now) + byte_count / self.bytes_per_second
+            delay = self._available_at - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ObjectStream:
+    """
+    Readable binary file object over the original bytes of a stored object, read from storage as it
+    is consumed and throttled by an optional RateLimiter. Seeking back to the start restarts the read.
+    """
+
+    def __init__(self, storage, key, compression=COMPRESSION_NONE, rate_limiter=None):
+        self._open = lambda: stream_object(storage, key, compression)
+        self._rate_limiter = rate_limiter
+        self._chunks = None
+        self._start()
+
+    def _start(self):
+        self.close()
+        self._chunks = self._open()
+        self._reader = IterableReader(self._throttled(self._chunks))
+        self._position = 0
+
+    def _throttled(self, chunks):
+        for chunk in chunks:
+            if self._rate_limiter is not None:
+                self._rate_limiter.consume(len(chunk))
+            yield chunk
+
+    def read(self, size=-1):
+        data = self._reader.read(size)
+        self._position += len(data)
+        return data
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if offset != 0 or whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("Stored objects can only be read again from the start.")
+        if self._position:
+            self._start()
+        return 0
+
+    def close(self):
+        if self._chunks is not None and hasattr(self._chunks, 'close'):
+            self._chunks.close()
+
+
+def check_object(storage, key, merkle_root, merkle_options, rate_limiter=None, compression=COMPRESSION_NONE,
+                 chunking=None):
+    """
+    Stream one stored object and verify it against its Merkle root.
+    :param storage: A StorageBackend.
+    :param key: Object key of the model artifact.
+    :param merkle_root: The root recorded for the version.
+    :param merkle_options: Keyword arguments from ModelMetadata.merkle_options().
+    :param rate_limiter: Optional RateLimiter throttling the read.
+    :param compression: How the object is stored (see app.storage.compression).
+    :param chunking: Content-defined chunking parameters of the version, if its leaves are chunks.
+    :return: A tuple (status, error message or None).
+    """
+    try:
+        stream = ObjectStream(storage, key, compression, rate_limiter)
+        try:
+            if verify_model_integrity(stream, merkle_root, chunking=chunking, **merkle_options):
+                return STATUS_OK, None
+            return STATUS_CORRUPT, 'Merkle root does not match the stored root.'
+        finally:
+            stream.close()
+    except FileNotFoundError:
+        return STATUS_MISSING, 'Stored object is missing.'
+    except Exception as e:
+        try:
+            if not storage.exists(key):
+                return STATUS_MISSING, 'Stored object is missing.'
+        except Exception:
+            pass
+        return STATUS_ERROR, str(e)
+
+
+def check_stored_version(storage, key, *args, **kwargs):
+    """
+    check_object, also telling which object was checked.
+    The object's identity is read before and after the check, and a check across a rewrite of the
+    key ends in an error, since the bytes read then belong to neither object.
+    Takes the arguments of check_object.
+    :return: A tuple (status, error message or None, storage.object_version() of the object checked, or None).
+    """
+    try:
+        version = storage.object_version(key)
+    except FileNotFoundError:
+        return STATUS_MISSING, 'Stored object is missing.', None
+    except Exception as e:
+        return STATUS_ERROR, str(e), None
+
+    status, error = check_object(storage, key, *args, **kwargs)
+    if status == STATUS_OK and version is not None:
+        try:
+            rewritten = storage.object_version(key) != version
+        except FileNotFoundError:
+            return STATUS_MISSING, 'Stored object is missing.', None
+        except Exception as e:
+            return STATUS_ERROR, str(e), None
+        if rewritten:
+            return STATUS_ERROR, 'Stored object was rewritten while it was being checked.', None
+    return status, error, version
+
+
+def get_checkpoint(name=DEFAULT_CHECKPOINT):
+    checkpoint = db.session.get(ScrubCheckpoint, name)
+    if checkpoint is None:
+        checkpoint = ScrubCheckpoint(name=name, cursor=0)
+        db.session.add(checkpoint)
+    return checkpoint
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def scrub_pass(storage, workers=4, bytes_per_second=None, batch_size=32, skip_deprecated=False,
+               checkpoint_name=DEFAULT_CHECKPOINT, restart=False, on_result=None):
+    """
+    Verify every stored model version once, resuming an interrupted pass from its checkpoint.
+    Must run inside an application context; storage reads happen on `workers` threads.
+    :param storage: A StorageBackend.
+    :param workers: Number of objects verified in parallel.
+    :param bytes_per_second: Total read rate across workers; None or 0 for no limit.
+    :param batch_size: Versions verified between two checkpoints.
+    :param skip_deprecated: Leave deprecated versions out of the pass.
+    :param checkpoint_name: Name of the checkpoint row, so separate scrubbers can keep their own progress.
+    :param restart: Ignore the saved checkpoint and start a new pass.
+    :param on_result: Optional callback(model_metadata, status, error) called for every version.
+    :return: A dict counting the versions per status.
+    """
+    checkpoint = get_checkpoint(checkpoint_name)
+    if restart or not checkpoint.cursor:
+        checkpoint.cursor = 0
+        checkpoint.pass_started_at = _now()
+        checkpoint.pass_finished_at = None
+    db.session.commit()
+
+    rate_limiter = RateLimiter(bytes_per_second)
+    counts = {STATUS_OK: 0, STATUS_CORRUPT: 0, STATUS_MISSING: 0, STATUS_ERROR: 0}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while True:
+            query = ModelMetadata.query.filter(ModelMetadata.id > checkpoint.cursor)
+            if skip_deprecated:
+                query = query.filter(db.or_(ModelMetadata.deprecated.is_(False), ModelMetadata.deprecated.is_(None)))
+            batch = query.order_by(ModelMetadata.id).limit(batch_size).all()
+            if not batch:
+                break
+
+            # Workers only see plain values; the session stays on this thread
+            futures = [
+                executor.submit(check_stored_version, storage, model_key(m.model_name, m.version), m.merkle_root,
+                                m.merkle_options(), rate_limiter,
+                                m.compression or COMPRESSION_NONE, m.get_chunking())
+                for m in batch
+            ]
+            for model_metadata, future in zip(batch, futures):
+                status, error, version = future.result()
+                model_metadata.last_verified_at = _now()
+                model_metadata.last_verified_status = status
+                model_metadata.last_verified_etag = version['etag'] if version else None
+                counts[status] += 1
+                if on_result is not None:
+                    on_result(model_metadata, status, error)
+
+            checkpoint.cursor = batch[-1].id
+            db.session.commit()
+
+    checkpoint.cursor = 0
+    checkpoint.pass_finished_at = _now()
+    db.session.commit()
+    return counts
@@ -0,0 +1,38 @@
+# storage/__init__.py
+from flask import current_app
+
+from .base import PartMismatchError, StorageBackend, model_key, tree_key
+from .local import LocalStorage
+from .s3 import S3Storage
+
+
+def create_storage(config):
+    """
+    Build the storage backend selected by the STORAGE_BACKEND config value.
+    :param config: A mapping with the application configuration.
+    :return: A StorageBackend instance.
+    """
+    backend = (config.get('STORAGE_BACKEND') or 's3').lower()
+    if backend == 's3':
+        return S3Storage(
+            bucket=config.get('S3_BUCKET'),
+            region=config.get('AWS_REGION'),
+            access_key=config.get('AWS_ACCESS_KEY'),
+            secret_key=config.get('AWS_SECRET_KEY'),
+            max_pool_connections=config.get('S3_MAX_POOL_CONNECTIONS', 10),
+            endpoint_url=config.get('S3_ENDPOINT_URL')
+        )
+    if backend == 'local':
+        return LocalStorage(config.get('LOCAL_STORAGE_ROOT'))
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def get_storage():
+    """
+    Return the storage backend of the current application, creating it on first use.
+    """
+    storage = current_app.extensions.get('storage')
+    if storage is None:
+        storage = create_storage(current_app.config)
+        current_app.extensions['storage'] = storage
+    return storage
@@ -0,0 +1,238 @@
+# app/storage/base.py
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def model_key(model_name, version):
+    """
+    Object key under which a model version's artifact is stored.
+    """
+    return f"models/{model_name}_v{version}"
+
+
+def tree_key(model_name, version):
+    """
+    Object key under which a model version's Merkle tree file is stored.
+    """
+    return f"merkle_trees/{model_name}_v{version}_merkle.tree"
+
+
+def part_key(upload_id, part_number, token=None):
+    """
+    Object key under which drivers without native multipart uploads keep an uploaded part.
+    :param token: The token put_part returned for the upload of the part; None for parts stored
+                  before every upload got its own key.
+    """
+    key = f"multipart/{upload_id}/{part_number:05d}"
+    return f"{key}-{token}" if token else key
+
+
+class PartMismatchError(Exception):
+    """
+    The stored copy of some parts of a multipart upload is not the one recorded for them, e.g. after
+    concurrent uploads of the same part number; those parts have to be sent again.
+    """
+
+    def __init__(self, part_numbers):
+        super().__init__(f"Stored parts do not match their recorded uploads: {', '.join(map(str, part_numbers))}.")
+        self.part_numbers = part_numbers
+
+
+class StorageBackend(ABC):
+    """
+    Interface every storage driver implements.
+    Keys are '/'-separated object names such as 'models/<name>_v<version>'.
+    """
+
+    @abstractmethod
+    def put(self, key, fileobj):
+        """
+        Store the contents of a readable binary file object under `key`.
+        """
+        raise NotImplementedError
+
+    def put_file(self, key, file_path):
+        """
+        Store a local file under `key`.
+        """
+        with open(file_path, 'rb') as f:
+            self.put(key, f)
+
+    def get(self, key, dest_path):
+        """
+        Copy the object stored under `key` to a local file.
+        """
+        with open(dest_path, 'wb') as f:
+            for chunk in self.stream(key):
+                f.write(chunk)
+
+    @abstractmethod
+    def stream(self, key, chunk_size=1024 * 1024):
+        """
+        Yield the object's bytes in chunks of at most `chunk_size`.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_range(self, key, start, end):
+        """
+        Return bytes [start, end) of the object.
+        """
+        raise NotImplementedError
+
+    def stream_ranges(self, key, part_size, concurrency):
+        """
+        Yield the object's bytes in order, fetched as concurrent byte-range reads of `part_size` bytes.
+        At most `concurrency` ranges are in flight or waiting to be consumed at a time, so the
+        caller can process each range while later ones are still being fetched.
+        """
+        size = self.size(key) if concurrency > 1 else 0
+        if size <= part_size:
+            yield from self.stream(key, part_size)
+            return
+
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='ranged-read')
+        pending = deque()
+        try:
+            for start in range(0, size, part_size):
+                pending.append(executor.submit(self.get_range, key, start, min(start + part_size, size)))
+                if len(pending) >= concurrency:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @abstractmethod
+    def exists(self, key):
+        raise NotImplementedError
+
+    @abstractmethod
+    def size(self, key):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key):
+        raise NotImplementedError
+
+    @abstractmethod
+    def url(self, key):
+        """
+        Public URL recorded in the registry for the object.
+        """
+        raise NotImplementedError
+
+    def object_version(self, key):
+        """
+        Identity of the object currently stored under `key`, which changes whenever it is rewritten.
+        :return: A dict with its 'etag' and its 'version_id' (None unless the store keeps versions),
+                 or None if the driver cannot tell.
+        :raises FileNotFoundError: If there is no such object.
+        """
+        return None
+
+    def presigned_url(self, key, expires_in, filename=None, version_id=None):
+        """
+        Short-lived URL from which clients can download the object directly.
+        :param expires_in: Seconds the URL stays valid.
+        :param filename: Optional name the browser should save the download as.
+        :param version_id: Version of the object the URL serves, from object_version(); the latest when None.
+        :return: The URL, or None if the driver cannot sign URLs.
+        """
+        return None
+
+    def create_multipart(self, key):
+        """
+        Start a multipart upload of the object `key`, whose parts can then arrive in any order.
+        :return: The upload id.
+        """
+        return uuid.uuid4().hex
+
+    def put_part(self, key, upload_id, part_number, fileobj):
+        """
+        Store one part of a multipart upload. Every upload of a part number is kept under its own key,
+        so the caller decides which one is assembled.
+        :return: A token identifying this upload of the part, to pass back to complete_multipart.
+        """
+        token = uuid.uuid4().hex
+        self.put(part_key(upload_id, part_number, token), fileobj)
+        return token
+
+    def discard_part(self, key, upload_id, part_number, token):
+        """
+        Discard one upload of a part that will not be assembled, e.g. one replaced by a later upload.
+        """
+        self.delete(part_key(upload_id, part_number, token))
+
+    def complete_multipart(self, key, upload_id, parts):
+        """
+        Assemble the uploaded parts into the object `key`.
+        :param parts: List of (part number, token) tuples in ascending part order.
+        :raises PartMismatchError: If the upload a token identifies is not stored; nothing is assembled then.
+        """
+        part_keys = [part_key(upload_id, part_number, token) for part_number, token in parts]
+        missing = [part_number for (part_number, _), key_of_part in zip(parts, part_keys)
+                   if not self.exists(key_of_part)]
+        if missing:
+            raise PartMismatchError(missing)
+        self.put(key, IterableReader(chunk for part in part_keys for chunk in self.stream(part)))
+        self.abort_multipart(key, upload_id, parts)
+
+    def abort_multipart(self, key, upload_id, parts):
+        """
+        Discard a multipart upload and the parts stored for it.
+        :param parts: List of (part number, token) tuples of the recorded parts.
+        """
+        for part_number, token in parts:
+            self.delete(part_key(upload_id, part_number, token))
+
+    def list_multipart_uploads(self):
+        """
+        Multipart uploads the store still holds parts for, completed or not.
+        :return: An iterable of (key or None if unknown, upload id, naive UTC start time) tuples;
+                 empty if the driver cannot list them.
+        """
+        return []
+
+    def local_path(self, key):
+        """
+        Path of the object on the local filesystem, if the driver stores it there.
+        Callers can then read or serve the file in place instead of copying it.
+        """
+        return None
+
+    def copy_to(self, key, fileobj):
+        """
+        Write the object's bytes to a writable binary file object.
+        """
+        for chunk in self.stream(key):
+            fileobj.write(chunk)
+
+    @staticmethod
+    def _copy_stream(src, dst):
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+class IterableReader:
+    """
+    Readable binary file object over an iterable of byte chunks, consumed as it is read.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
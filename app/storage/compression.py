@@ -0,0 +1,149 @@
+# app/storage/compression.py
+"""
+Optional streaming compression of stored objects.
+
+Objects are compressed chunk by chunk while they are uploaded and decompressed chunk by chunk
+while they are read back, so neither side holds a whole compressed copy. Callers always see
+the original bytes; Merkle roots are computed over those.
+"""
+import lzma
+import zlib
+
+COMPRESSION_NONE = 'none'
+COMPRESSION_METHODS = (COMPRESSION_NONE, 'zlib', 'lzma')
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def normalize_compression(method, level=None):
+    """
+    Validate a compression method and level.
+    :param method: One of COMPRESSION_METHODS (None means 'none').
+    :param level: zlib level 0-9 or lzma preset 0-9; None for the library default.
+    :return: A tuple (method, level).
+    :raises ValueError: If the method or level is not supported.
+    """
+    method = (method or COMPRESSION_NONE).lower()
+    if method not in COMPRESSION_METHODS:
+        raise ValueError(f"Unsupported compression '{method}'. Choose one of: {', '.join(COMPRESSION_METHODS)}.")
+    if level is not None:
+        level = int(level)
+        if not 0 <= level <= 9:
+            raise ValueError("Compression level must be between 0 and 9.")
+    return method, level
+
+
+def _compressor(method, level):
+    if method == 'zlib':
+        return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level)
+    return lzma.LZMACompressor(preset=level)
+
+
+def _decompressor(method):
+    if method == 'zlib':
+        return zlib.decompressobj()
+    return lzma.LZMADecompressor()
+
+
+class CompressingReader:
+    """
+    Readable binary file object returning the compressed form of another one.
+    Counts the bytes read from the source and returned to the caller.
+    """
+
+    def __init__(self, fileobj, method, level=None):
+        self.fileobj = fileobj
+        self._compressor = _compressor(method, level)
+        self._buffer = bytearray()
+        self._eof = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while not self._eof and (size is None or size < 0 or len(self._buffer) < size):
+            chunk = self.fileobj.read(_CHUNK_SIZE)
+            if chunk:
+                self.bytes_in += len(chunk)
+                self._buffer += self._compressor.compress(chunk)
+            else:
+                self._buffer += self._compressor.flush()
+                self._eof = True
+
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        self.bytes_out += len(data)
+        return data
+
+
+def decompress_chunks(chunks, method):
+    """
+    Decompress an iterable of compressed chunks, yielding the original bytes.
+    """
+    if method == COMPRESSION_NONE:
+        yield from chunks
+        return
+    decompressor = _decompressor(method)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    if method == 'zlib':
+        data = decompressor.flush()
+        if data:
+            yield data
+    if not decompressor.eof:
+        raise ValueError("Compressed object is truncated.")
+
+
+def put_object(storage, key, fileobj, method=COMPRESSION_NONE, level=None):
+    """
+    Store a file object, compressing it on the way.
+    :return: A tuple (original size, stored size) in bytes.
+    """
+    if method == COMPRESSION_NONE:
+        start = fileobj.tell()
+        fileobj.seek(0, 2)
+        size = fileobj.tell() - start
+        fileobj.seek(start)
+        storage.put(key, fileobj)
+        return size, size
+    reader = CompressingReader(fileobj, method, level)
+    storage.put(key, reader)
+    return reader.bytes_in, reader.bytes_out
+
+
+def stream_object(storage, key, method=COMPRESSION_NONE, chunk_size=_CHUNK_SIZE, concurrency=1):
+    """
+    Yield the original bytes of a stored object.
+    :param concurrency: Byte ranges of `chunk_size` fetched at once; 1 reads the object as a single stream.
+    """
+    if concurrency > 1:
+        return decompress_chunks(storage.stream_ranges(key, chunk_size, concurrency), method)
+    return decompress_chunks(storage.stream(key, chunk_size), method)
+
+
+def copy_object_to(storage, key, fileobj, method=COMPRESSION_NONE):
+    """
+    Write the original bytes of a stored object to a writable binary file object.
+    """
+    if method == COMPRESSION_NONE:
+        storage.copy_to(key, fileobj)
+        return
+    for chunk in stream_object(storage, key, method):
+        fileobj.write(chunk)
+
+
+def get_object(storage, key, dest_path, method=COMPRESSION_NONE):
+    """
+    Copy the original bytes of a stored object to a local file.
+    """
+    if method == COMPRESSION_NONE:
+        storage.get(key, dest_path)
+        return
+    with open(dest_path, 'wb') as f:
+        copy_object_to(storage, key, f, method)
@@ -0,0 +1,159 @@
+# app/storage/s3.py
+import datetime
+import os
+import threading
+
+from .base import PartMismatchError, StorageBackend
+
+
+class S3Storage(StorageBackend):
+    """
+    Stores objects in an S3 bucket.
+    The boto3 client is created on first use in each process and then reused by every
+    request thread, so workers pay neither the boto3 import nor a new connection pool at boot.
+    """
+
+    def __init__(self, bucket, region=None, access_key=None, secret_key=None, max_pool_connections=10,
+                 endpoint_url=None):
+        self.bucket = bucket
+        self.region = region
+        # S3-compatible service such as MinIO or a local moto server; AWS when unset
+        self.endpoint_url = endpoint_url
+        self._access_key = access_key
+        self._secret_key = secret_key
+        self._max_pool_connections = max_pool_connections
+        self._client = None
+        self._client_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        # Clients are not fork-safe, so a worker forked after first use builds its own
+        if self._client is None or self._client_pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._client_pid != os.getpid():
+                    import boto3
+                    from botocore.config import Config as BotoConfig
+
+                    self._client = boto3.client(
+                        's3',
+                        aws_access_key_id=self._access_key,
+                        aws_secret_access_key=self._secret_key,
+                        region_name=self.region,
+                        endpoint_url=self.endpoint_url,
+                        config=BotoConfig(max_pool_connections=self._max_pool_connections)
+                    )
+                    self._client_pid = os.getpid()
+        return self._client
+
+    def put(self, key, fileobj):
+        self.client.upload_fileobj(fileobj, self.bucket, key)
+
+    def put_file(self, key, file_path):
+        self.client.upload_file(file_path, self.bucket, key)
+
+    def get(self, key, dest_path):
+        self.client.download_file(self.bucket, key, dest_path)
+
+    def copy_to(self, key, fileobj):
+        self.client.download_fileobj(self.bucket, key, fileobj)
+
+    def stream(self, key, chunk_size=1024 * 1024):
+        body = self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+        try:
+            for chunk in body.iter_chunks(chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    def get_range(self, key, start, end):
+        if start >= end:
+            return b''
+        response = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end - 1}")
+        return response['Body'].read()
+
+    def _head(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def exists(self, key):
+        return self._head(key) is not None
+
+    def size(self, key):
+        head = self._head(key)
+        if head is None:
+            raise FileNotFoundError(key)
+        return head['ContentLength']
+
+    def object_version(self, key):
+        head = self._head(key)
+        if head is None:
+            raise FileNotFoundError(key)
+        return {'etag': head['ETag'], 'version_id': head.get('VersionId')}
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def url(self, key):
+        if self.endpoint_url:
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
+
+    def create_multipart(self, key):
+        return self.client.create_multipart_upload(Bucket=self.bucket, Key=key)['UploadId']
+
+    def put_part(self, key, upload_id, part_number, fileobj):
+        fileobj.seek(0, os.SEEK_END)
+        length = fileobj.tell()
+        fileobj.seek(0)
+        response = self.client.upload_part(Bucket=self.bucket, Key=key, UploadId=upload_id,
+                                           PartNumber=part_number, Body=fileobj, ContentLength=length)
+        return response['ETag']
+
+    def discard_part(self, key, upload_id, part_number, token):
+        # S3 keeps one copy per part number, which a later upload replaces
+        pass
+
+    def _stored_parts(self, key, upload_id):
+        stored = {}
+        paginator = self.client.get_paginator('list_parts')
+        for page in paginator.paginate(Bucket=self.bucket, Key=key, UploadId=upload_id):
+            for part in page.get('Parts', []):
+                stored[part['PartNumber']] = part['ETag']
+        return stored
+
+    def complete_multipart(self, key, upload_id, parts):
+        # The ETag recorded for each part must still be the one S3 holds for its number: a concurrent
+        # upload of the same number may have replaced the copy whose leaves were recorded
+        stored = self._stored_parts(key, upload_id)
+        mismatched = [number for number, etag in parts if stored.get(number) != etag]
+        if mismatched:
+            raise PartMismatchError(mismatched)
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=upload_id,
+            MultipartUpload={'Parts': [{'PartNumber': number, 'ETag': etag} for number, etag in parts]}
+        )
+
+    def abort_multipart(self, key, upload_id, parts):
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+    def list_multipart_uploads(self):
+        paginator = self.client.get_paginator('list_multipart_uploads')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix='models/'):
+            for upload in page.get('Uploads', []):
+                yield upload['Key'], upload['UploadId'], upload['Initiated'].astimezone(
+                    datetime.timezone.utc).replace(tzinfo=None)
+
+    def presigned_url(self, key, expires_in, filename=None, version_id=None):
+        params = {'Bucket': self.bucket, 'Key': key}
+        if version_id:
+            params['VersionId'] = version_id
+        if filename:
+            params['ResponseContentDisposition'] = f'attachment; filename="{filename}"'
+        return self.client.generate_presigned_url('get_object', Params=params, ExpiresIn=expires_in)
@@ -0,0 +1,197 @@
+# app/utils/admission_utils.py
+"""
+Admission control for the heavy endpoints.
+
+Uploads and downloads hash and transfer whole artifacts, so each endpoint class gets a limit on
+requests in flight and on the bytes they carry. A request that does not fit waits in a bounded
+first-in-first-out queue; if the queue is full, or the wait runs past ADMISSION_QUEUE_TIMEOUT,
+it is turned away at once with 429 and a Retry-After header instead of slowing every other
+request down. A slot is held until the response has been sent, not just until the view returns.
+
+Limits are per worker process. Cheap metadata endpoints are not limited.
+"""
+import itertools
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request
+
+UPLOAD = 'upload'
+DOWNLOAD = 'download'
+ENDPOINT_CLASSES = (UPLOAD, DOWNLOAD)
+
+REJECTED_QUEUE_FULL = 'queue_full'
+REJECTED_TIMEOUT = 'timeout'
+
+
+class AdmissionLimiter:
+    """
+    Concurrency and byte budget of one endpoint class, with a bounded wait queue.
+    A limit of 0 means unlimited. A request larger than the whole byte budget is admitted
+    when nothing else of its class is running, so it is slowed down but never refused for good.
+    """
+
+    def __init__(self, name, max_concurrent=0, max_bytes=0, max_queue=0, queue_timeout=0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_bytes = max_bytes
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self._waiting = deque()
+        self._tickets = itertools.count()
+        self.active = 0
+        self.bytes_in_use = 0
+        self.admitted = 0
+        self.rejected = {REJECTED_QUEUE_FULL: 0, REJECTED_TIMEOUT: 0}
+        self.peak_queued = 0
+        self.wait_seconds = 0.0
+
+    def _fits(self, cost):
+        if self.max_concurrent and self.active >= self.max_concurrent:
+            return False
+        if self.max_bytes and self.bytes_in_use and self.bytes_in_use + cost > self.max_bytes:
+            return False
+        return True
+
+    def _admit(self, cost):
+        self.active += 1
+        self.bytes_in_use += cost
+        self.admitted += 1
+
+    def acquire(self, cost=0):
+        """
+        Wait for a slot.
+        :param cost: Bytes the request is expected to carry.
+        :return: None once admitted, or the reason it was rejected.
+        """
+        with self._condition:
+            if not self._waiting and self._fits(cost):
+                self._admit(cost)
+                return None
+            if len(self._waiting) >= self.max_queue:
+                self.rejected[REJECTED_QUEUE_FULL] += 1
+                return REJECTED_QUEUE_FULL
+
+            # Only the head of the queue may take a slot, so large requests are not starved by small ones
+            ticket = next(self._tickets)
+            self._waiting.append(ticket)
+            self.peak_queued = max(self.peak_queued, len(self._waiting))
+            started = time.monotonic()
+            deadline = started + self.queue_timeout
+            try:
+                while not (self._waiting[0] == ticket and self._fits(cost)):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected[REJECTED_TIMEOUT] += 1
+                        return REJECTED_TIMEOUT
+                    self._condition.wait(remaining)
+                self._admit(cost)
+                return None
+            finally:
+                self._waiting.remove(ticket)
+                self.wait_seconds += time.monotonic() - started
+                self._condition.notify_all()
+
+    def release(self, cost=0):
+        with self._condition:
+            self.active -= 1
+            self.bytes_in_use -= cost
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_bytes': self.max_bytes,
+                'max_queue': self.max_queue,
+                'queue_timeout': self.queue_timeout,
+                'active': self.active,
+                'bytes_in_use': self.bytes_in_use,
+                'queued': len(self._waiting),
+                'peak_queued': self.peak_queued,
+                'admitted': self.admitted,
+                'rejected': dict(self.rejected),
+                'wait_seconds': round(self.wait_seconds, 3),
+            }
+
+
+def get_admission_limiter(endpoint_class):
+    """
+    Return the AdmissionLimiter of an endpoint class for the current application.
+    """
+    limiters = current_app.extensions.setdefault('admission_limiters', {})
+    limiter = limiters.get(endpoint_class)
+    if limiter is None:
+        config = current_app.config
+        prefix = f'ADMISSION_{endpoint_class.upper()}'
+        limiter = limiters.setdefault(endpoint_class, AdmissionLimiter(
+            endpoint_class,
+            max_concurrent=config[f'{prefix}_CONCURRENCY'],
+            max_bytes=config[f'{prefix}_BYTES'],
+            max_queue=config['ADMISSION_QUEUE_SIZE'],
+            queue_timeout=config['ADMISSION_QUEUE_TIMEOUT']
+        ))
+    return limiter
+
+
+def admission_stats():
+    """
+    Queue depth, slots in use and rejection counts of every endpoint class.
+    """
+    return {endpoint_class: get_admission_limiter(endpoint_class).stats() for endpoint_class in ENDPOINT_CLASSES}
+
+
+def _call_on_close(response, callback):
+    if not response.direct_passthrough or isinstance(response.response, (list, tuple)):
+        response.call_on_close(callback)
+        return
+
+    # send_file hands its file wrapper straight to the server, which closes it but never calls
+    # the response's own close callbacks; hook the wrapper instead so sendfile still applies
+    body = response.response
+    close = getattr(body, 'close', None)
+
+    def close_body():
+        try:
+            if close is not None:
+                close()
+        finally:
+            callback()
+
+    body.close = close_body
+
+
+def admission_controlled(endpoint_class, cost=None):
+    """
+    Decorator limiting a view with the admission limiter of `endpoint_class`.
+    :param endpoint_class: One of ENDPOINT_CLASSES.
+    :param cost: Optional callable taking the view arguments and returning the bytes the request
+                 will carry; the request's Content-Length is used by default.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = get_admission_limiter(endpoint_class)
+            byte_cost = max(0, (cost(*args, **kwargs) if cost is not None else request.content_length) or 0)
+
+            rejected = limiter.acquire(byte_cost)
+            if rejected is not None:
+                response = jsonify({'error': f'Too many {endpoint_class} requests in progress. Retry later.',
+                                    'reason': rejected})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(current_app.config['ADMISSION_RETRY_AFTER'])
+                return response
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                limiter.release(byte_cost)
+                raise
+            # Streamed files are still being sent after the view returns; keep the slot until then
+            _call_on_close(response, lambda: limiter.release(byte_cost))
+            return response
+        return wrapper
+    return decorator
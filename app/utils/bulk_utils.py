@@ -0,0 +1,122 @@
+# app/utils/bulk_utils.py
+"""
+Bulk updates of model versions.
+
+A bulk request selects versions by explicit (model_name, version) pairs, by the same filters as
+the search endpoint, or both, and changes them with set-based UPDATE statements in a single
+transaction instead of loading and committing one row at a time.
+"""
+from sqlalchemy import and_, select, tuple_, update
+
+from app.extensions import db
+from app.models.modelmetadata import ModelMetadata
+from app.utils.search_utils import metadata_filter_conditions, parse_search_filters
+
+# Pairs per statement, keeping two host parameters each under older SQLite limits
+PAIR_BATCH_SIZE = 400
+
+UPDATABLE_FIELDS = ('description', 'accuracy', 'change_log', 'deprecated')
+
+
+def parse_bulk_selection(payload):
+    """
+    Reads the versions a bulk request applies to.
+    :param payload: The JSON body, with a 'versions' list of {"model_name", "version"} objects
+                    and/or a 'filters' object using the search endpoint's filter names.
+    :return: A tuple (pairs, filters, error). `pairs` is a list of (model_name, version) tuples
+             or None; `error` is a message when validation fails, otherwise None.
+    """
+    pairs = None
+    if payload.get('versions') is not None:
+        versions = payload['versions']
+        if not isinstance(versions, list) or not versions:
+            return None, None, "'versions' must be a non-empty list."
+        pairs = []
+        for item in versions:
+            if not isinstance(item, dict) or not item.get('model_name') or not item.get('version'):
+                return None, None, "Each entry of 'versions' needs a 'model_name' and a 'version'."
+            pairs.append((str(item['model_name']), str(item['version'])))
+        pairs = list(dict.fromkeys(pairs))
+
+    raw_filters = payload.get('filters') or {}
+    if not isinstance(raw_filters, dict):
+        return None, None, "'filters' must be an object."
+    # Query-string parsers expect text; JSON booleans become 'true' / 'false'
+    as_text = {key: str(value).lower() if isinstance(value, bool) else str(value)
+               for key, value in raw_filters.items() if value is not None}
+    filters, error = parse_search_filters(as_text)
+    if error:
+        return None, None, error
+    filters.pop('limit')
+    filters.pop('offset')
+
+    if pairs is None and not metadata_filter_conditions(filters):
+        # Never update every version because the selection was left out or narrows nothing
+        return None, None, "Provide 'versions', 'filters' or both to select the versions to update."
+    return pairs, filters, None
+
+
+def parse_bulk_updates(values):
+    """
+    Validates the new values of a bulk update.
+    :param values: Dictionary of field names to new values.
+    :return: A tuple (updates, error).
+    """
+    if not isinstance(values, dict) or not values:
+        return None, "'updates' must be a non-empty object."
+    unknown = sorted(set(values) - set(UPDATABLE_FIELDS))
+    if unknown:
+        return None, f"Fields cannot be bulk updated: {', '.join(unknown)}."
+
+    updates = dict(values)
+    if 'accuracy' in updates:
+        try:
+            updates['accuracy'] = float(updates['accuracy'])
+        except (TypeError, ValueError):
+            return None, "'accuracy' must be a valid number."
+    if 'deprecated' in updates and not isinstance(updates['deprecated'], bool):
+        return None, "'deprecated' must be true or false."
+    return updates, None
+
+
+def _update_where(conditions, updates):
+    """
+    Run one UPDATE and return the (model_name, version) keys of the rows it changed.
+    """
+    keys_of = (ModelMetadata.model_name, ModelMetadata.version)
+    if db.engine.dialect.update_returning:
+        statement = update(ModelMetadata).where(*conditions).values(**updates).returning(*keys_of)
+        return [tuple(row) for row in db.session.execute(statement)]
+
+    # Without RETURNING, read the keys first; the UPDATE then targets exactly those ids
+    rows = db.session.execute(select(ModelMetadata.id, *keys_of).where(*conditions)).all()
+    if rows:
+        db.session.execute(
+            update(ModelMetadata).where(ModelMetadata.id.in_([row.id for row in rows])).values(**updates))
+    return [(row.model_name, row.version) for row in rows]
+
+
+def bulk_update_versions(pairs, filters, updates):
+    """
+    Applies `updates` to every selected version in the current transaction.
+    The caller commits (or rolls back) the session.
+    :param pairs: List of (model_name, version) tuples, or None to select by filters only.
+    :param filters: Search filters, as returned by parse_bulk_selection.
+    :param updates: Column values, as returned by parse_bulk_updates.
+    :return: A tuple (updated keys, requested pairs that were not updated because no version matched).
+    """
+    conditions = metadata_filter_conditions(filters)
+    if pairs is None:
+        if not conditions:
+            raise ValueError("A bulk update needs versions or filters that narrow the selection.")
+        updated = _update_where(conditions, updates)
+    else:
+        updated = []
+        for start in range(0, len(pairs), PAIR_BATCH_SIZE):
+            batch = pairs[start:start + PAIR_BATCH_SIZE]
+            in_batch = tuple_(ModelMetadata.model_name, ModelMetadata.version).in_(batch)
+            updated += _update_where([and_(in_batch, *conditions)], updates)
+
+    updated.sort()
+    unmatched = [] if pairs is None else sorted(set(pairs) - set(updated))
+    return updated, unmatched
@@ -0,0 +1,22 @@
+# app/utils/cache_utils.py
+from flask import current_app
+
+from app.merkle_tree.subtree_cache import SubtreeCache
+
+
+def get_subtree_cache():
+    """
+    Return the Merkle subtree cache of the current application, or None if it is disabled.
+    """
+    if current_app.config.get('SUBTREE_CACHE_SIZE', 0) <= 0:
+        return None
+    cache = current_app.extensions.get('subtree_cache')
+    if cache is None:
+        cache = SubtreeCache(
+            current_app.config['SUBTREE_CACHE_PATH'],
+            max_entries=current_app.config['SUBTREE_CACHE_SIZE'],
+            chunk_leaves=current_app.config['SUBTREE_CACHE_LEAVES'],
+            max_node_entries=current_app.config['SUBTREE_CACHE_NODE_SIZE']
+        )
+        current_app.extensions['subtree_cache'] = cache
+    return cache
@@ -0,0 +1,58 @@
+# app/utils/fetch_utils.py
+"""
+Downloads fetched from storage as concurrent byte ranges and verified as they arrive.
+
+Ranges are read DOWNLOAD_CONCURRENCY at a time on worker threads and handed over in order, so
+while later ranges are still in flight the request thread writes each one to the download
+buffer and hashes the leaves it completes. Verification then only has to fold the leaf hashes
+into the root, instead of starting a full rehash once the last byte is on disk.
+
+Comma-separated leaves need the whole file to detect its text encoding, so for those only
+the fetch is parallel and hashing still follows it.
+"""
+from flask import current_app
+
+from app.merkle_tree import compute_root, verify_model_integrity
+from app.merkle_tree.chunking import read_chunked_leaves
+from app.merkle_tree.digest import get_hash_function
+from app.storage import model_key
+from app.storage.base import IterableReader
+from app.storage.compression import COMPRESSION_NONE, stream_object
+
+
+def _tee(chunks, fileobj):
+    for chunk in chunks:
+        fileobj.write(chunk)
+        yield chunk
+
+
+def fetch_and_verify(storage, model_metadata, fileobj):
+    """
+    Copy a stored model version into `fileobj` and check it against the version's Merkle root.
+    :param storage: The StorageBackend holding the version.
+    :param model_metadata: The ModelMetadata of the version.
+    :param fileobj: Writable and seekable binary file object, left rewound to the start.
+    :return: True if the copy matches the stored Merkle root.
+    """
+    chunks = stream_object(
+        storage, model_key(model_metadata.model_name, model_metadata.version),
+        model_metadata.compression or COMPRESSION_NONE,
+        chunk_size=current_app.config['DOWNLOAD_PART_SIZE'],
+        concurrency=current_app.config['DOWNLOAD_CONCURRENCY']
+    )
+    options = model_metadata.merkle_options()
+    chunking = model_metadata.get_chunking()
+
+    if chunking is None:
+        for _ in _tee(chunks, fileobj):
+            pass
+        fileobj.seek(0)
+        is_verified = verify_model_integrity(fileobj, model_metadata.merkle_root, **options)
+    else:
+        hash_function = get_hash_function(options['algorithm'], options['hash_params'])
+        leaves = read_chunked_leaves(IterableReader(_tee(chunks, fileobj)), chunking, hash_function)
+        root_hash = compute_root(leaves, options['algorithm'], options['hash_params'])
+        is_verified = root_hash == model_metadata.merkle_root
+
+    fileobj.seek(0)
+    return is_verified
@@ -1,4 +1,6 @@
 from flask import request
+from app.merkle_tree.chunking import normalize_chunking
+from app.merkle_tree.digest import normalize_hash_params
 
 def extract_metadata_from_form():
     """
@@ -51,6 +53,30 @@ def extract_metadata_from_form():
     
     return metadata
 
+def extract_hash_options(default_algorithm, default_params=None, source=None):
+    """
+    Reads the Merkle hash algorithm and its parameters from the request form,
+    falling back to the configured defaults.
+    :param source: Optional mapping to read instead of the form, such as a JSON body.
+    :return: A tuple (algorithm, params) validated by the digest layer.
+    :raises ValueError: If the algorithm or parameters are not supported.
+    """
+    source = request.form if source is None else source
+    algorithm = source.get('hash_algorithm') or default_algorithm
+    params = source.get('hash_params')
+    if params is None and algorithm == default_algorithm:
+        params = default_params
+    return normalize_hash_params(algorithm, params)
+
+def extract_chunking_options(default_chunking=None):
+    """
+    Reads the leaf chunking of a new version from the request form ('none', 'fastcdc', 'fixed' or
+    a JSON object with the chunk sizes), falling back to the configured default.
+    :return: Chunking parameters validated by the chunker, or None for comma-separated leaves.
+    :raises ValueError: If the method or sizes are not supported.
+    """
+    return normalize_chunking(request.form.get('chunking') or default_chunking)
+
 def validate_metadata(metadata, required_fields):
     """
     Validates the required metadata fields and checks for any missing or invalid fields.
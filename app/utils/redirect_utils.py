@@ -0,0 +1,91 @@
+# app/utils/redirect_utils.py
+"""
+Downloads served by redirecting to a presigned storage URL.
+
+The bytes then go straight from object storage to the client, so the app only has to vouch
+for them: the stored object is checked against its Merkle root unless a check (by an earlier
+redirect or by the scrubber) succeeded recently on the same object, and the expected root goes
+along with the redirect so clients can verify what they receive.
+
+A check is tied to the ETag of the object it read, so rewriting the key (through the app or
+not) voids it. In a versioned bucket the URL is signed for the version that was checked; otherwise
+its ETag goes along with the redirect, for clients to send as If-Match.
+"""
+import datetime
+
+from flask import current_app, jsonify, redirect
+
+from app.extensions import db
+from app.scrubber.scrub import STATUS_OK, check_stored_version
+from app.storage import model_key
+from app.storage.compression import COMPRESSION_NONE
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def wants_redirect(args):
+    """
+    Whether a download should redirect, from ?redirect=true|false or the DOWNLOAD_REDIRECT default.
+    """
+    value = args.get('redirect')
+    if value is None or value == '':
+        return current_app.config['DOWNLOAD_REDIRECT']
+    return value.strip().lower() in ('true', '1', 'yes')
+
+
+def ensure_verified(storage, model_metadata):
+    """
+    Check the stored object against its Merkle root, reusing a recent successful check of the same object.
+    The result is recorded on the row like a scrubber result.
+    :return: A tuple (status, error message or None, storage.object_version() of the object verified or None),
+             with the statuses of app.scrubber.scrub.
+    """
+    key = model_key(model_metadata.model_name, model_metadata.version)
+    max_age = datetime.timedelta(seconds=current_app.config['DOWNLOAD_VERIFY_MAX_AGE'])
+    if (model_metadata.last_verified_status == STATUS_OK and model_metadata.last_verified_at is not None
+            and _now() - model_metadata.last_verified_at <= max_age):
+        try:
+            version = storage.object_version(key)
+        except FileNotFoundError:
+            version = None
+        if version is not None and version['etag'] == model_metadata.last_verified_etag:
+            return STATUS_OK, None, version
+
+    status, error, version = check_stored_version(
+        storage, key, model_metadata.merkle_root, model_metadata.merkle_options(),
+        compression=model_metadata.compression or COMPRESSION_NONE,
+        chunking=model_metadata.get_chunking()
+    )
+    model_metadata.last_verified_at = _now()
+    model_metadata.last_verified_status = status
+    model_metadata.last_verified_etag = version['etag'] if version else None
+    db.session.commit()
+    return status, error, version
+
+
+def redirect_response(url, model_metadata, expires_in, version=None):
+    """
+    302 to a presigned URL, carrying the expected Merkle root in headers and in the body.
+    :param version: storage.object_version() of the object verified, whose ETag is passed on.
+    """
+    options = model_metadata.merkle_options()
+    etag = version['etag'] if version else None
+    response = redirect(url, code=302)
+    response.headers['X-Merkle-Root'] = model_metadata.merkle_root
+    response.headers['X-Merkle-Hash-Algorithm'] = options['algorithm']
+    if etag:
+        response.headers['X-Object-ETag'] = etag
+    body = jsonify({
+        'url': url,
+        'expires_in': expires_in,
+        'merkle_root': model_metadata.merkle_root,
+        'hash_algorithm': options['algorithm'],
+        'hash_params': options['hash_params'],
+        'chunking': model_metadata.get_chunking(),
+        'etag': etag,
+    })
+    response.set_data(body.get_data())
+    response.mimetype = 'application/json'
+    return response
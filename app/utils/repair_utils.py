@@ -0,0 +1,56 @@
+# app/utils/repair_utils.py
+from flask import current_app
+
+from app.merkle_tree.repair import repair_file
+from app.merkle_tree.verify_inclusion import MerkleTreeIndex
+from app.storage import model_key, tree_key
+from app.storage.compression import copy_object_to, get_object
+from app.utils.temp_utils import workspace_path
+
+
+def load_stored_tree(storage, model_metadata):
+    """
+    Fetch and index the Merkle tree file stored with a model version.
+    :return: A MerkleTreeIndex, or None if the tree file is missing or does not check out.
+    """
+    key = tree_key(model_metadata.model_name, model_metadata.version)
+    tree_file = workspace_path(f"{model_metadata.model_name}_v{model_metadata.version}_merkle.tree")
+    try:
+        get_object(storage, key, tree_file, model_metadata.compression or 'none')
+        return MerkleTreeIndex.load(tree_file, verify=True, lookup=False, **model_metadata.merkle_options())
+    except Exception as e:
+        current_app.logger.warning("Stored Merkle tree %s is unusable: %s", key, e)
+        return None
+
+
+def repair_download(storage, model_metadata, fileobj):
+    """
+    Repair a download that failed verification by re-fetching only its corrupted byte ranges.
+    :param storage: The StorageBackend the file was downloaded from.
+    :param model_metadata: The ModelMetadata of the downloaded version.
+    :param fileobj: Seekable, writable file object holding the download; repaired in place.
+    :return: True if the file now matches the stored Merkle root.
+    """
+    attempts = current_app.config['DOWNLOAD_REPAIR_ATTEMPTS']
+    if attempts <= 0:
+        return False
+
+    key = model_key(model_metadata.model_name, model_metadata.version)
+    compression = model_metadata.compression or 'none'
+    # Byte ranges of a compressed object do not map to ranges of the original file
+    compressed = compression != 'none'
+    report = repair_file(
+        fileobj,
+        model_metadata.merkle_root,
+        None if compressed else load_stored_tree(storage, model_metadata),
+        fetch_range=None if compressed else lambda start, end: storage.get_range(key, start, end),
+        fetch_all=lambda f: copy_object_to(storage, key, f, compression),
+        attempts=attempts,
+        chunking=model_metadata.get_chunking(),
+        **model_metadata.merkle_options()
+    )
+    current_app.logger.warning(
+        "Download of %s failed verification; repair %s after %d attempt(s), %d range(s) and %d byte(s) re-fetched.",
+        key, 'succeeded' if report['verified'] else 'failed', report['attempts'], len(report['ranges']),
+        report['bytes_refetched'])
+    return report['verified']
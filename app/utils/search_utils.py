@@ -0,0 +1,169 @@
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import Integer, and_, column, or_, text
+
+from app.extensions import db
+from app.models.modelmetadata import ModelMetadata
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+FTS_TABLE = 'model_metadata_fts'
+
+
+def _parse_bool(value):
+    lowered = value.strip().lower()
+    if lowered in ('true', '1', 'yes'):
+        return True
+    if lowered in ('false', '0', 'no'):
+        return False
+    raise ValueError
+
+
+def _parse_date(value):
+    return datetime.fromisoformat(value.strip())
+
+
+def _parse_terms(value):
+    # Whitespace alone has no terms to match; reject it rather than silently match everything
+    if not value.split():
+        raise ValueError
+    return value
+
+
+def parse_search_filters(args):
+    """
+    Parses and validates search filters from the request query string.
+    :param args: The request arguments (e.g. request.args).
+    :return: A tuple (filters, error). `error` is a message when validation fails, otherwise None.
+    """
+    parsers = {
+        'name_prefix': str,
+        'min_accuracy': float,
+        'max_accuracy': float,
+        'deprecated': _parse_bool,
+        'uploaded_after': _parse_date,
+        'uploaded_before': _parse_date,
+        'q': _parse_terms,
+        'limit': int,
+        'offset': int,
+    }
+
+    filters = {}
+    for field, parse in parsers.items():
+        value = args.get(field)
+        if value is None or value == '':
+            continue
+        try:
+            filters[field] = parse(value)
+        except ValueError:
+            return None, f"'{field}' has an invalid value: {value}"
+
+    filters['limit'] = min(max(filters.get('limit', DEFAULT_LIMIT), 1), MAX_LIMIT)
+    filters['offset'] = max(filters.get('offset', 0), 0)
+    return filters, None
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _fts_available():
+    """
+    Whether the SQLite FTS table created by the search migration exists, checked once per app.
+    """
+    available = current_app.extensions.get('metadata_fts')
+    if available is None:
+        available = False
+        if db.engine.dialect.name == 'sqlite':
+            row = db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': FTS_TABLE}
+            ).first()
+            available = row is not None
+        current_app.extensions['metadata_fts'] = available
+    return available
+
+
+def full_text_condition(query_text):
+    """
+    Build a condition matching every term of `query_text` in the description or change log.
+    Uses the FTS index when available and falls back to LIKE matching otherwise.
+    """
+    terms = query_text.split()
+    if not terms:
+        return None
+
+    if _fts_available():
+        # Quote every term so user input is never interpreted as FTS query syntax
+        match = ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        return ModelMetadata.id.in_(
+            text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match")
+            .bindparams(match=match)
+            .columns(column('rowid', Integer))
+        )
+
+    conditions = []
+    for term in terms:
+        pattern = f"%{_escape_like(term)}%"
+        conditions.append(or_(
+            ModelMetadata.description.ilike(pattern, escape='\\'),
+            ModelMetadata.change_log.ilike(pattern, escape='\\')
+        ))
+    return and_(*conditions)
+
+
+def metadata_filter_conditions(filters):
+    """
+    Builds the SQL conditions for the given filters. The filters line up with the
+    composite indexes on model_metadata and the FTS table created by the search migration.
+    :param filters: A dictionary as returned by parse_search_filters.
+    :return: A list of conditions on ModelMetadata columns, to be combined with AND.
+    """
+    conditions = []
+    if filters.get('name_prefix'):
+        # A range on the column (rather than LIKE 'prefix%') can always use the model_name indexes
+        prefix = filters['name_prefix']
+        conditions += [ModelMetadata.model_name >= prefix, ModelMetadata.model_name < prefix + '\U0010ffff']
+    if 'deprecated' in filters:
+        if filters['deprecated']:
+            conditions.append(ModelMetadata.deprecated.is_(True))
+        else:
+            # Rows created before the deprecated column existed hold NULL
+            conditions.append(or_(ModelMetadata.deprecated.is_(False), ModelMetadata.deprecated.is_(None)))
+    if 'min_accuracy' in filters:
+        conditions.append(ModelMetadata.accuracy >= filters['min_accuracy'])
+    if 'max_accuracy' in filters:
+        conditions.append(ModelMetadata.accuracy <= filters['max_accuracy'])
+    if 'uploaded_after' in filters:
+        conditions.append(ModelMetadata.upload_date >= filters['uploaded_after'])
+    if 'uploaded_before' in filters:
+        conditions.append(ModelMetadata.upload_date <= filters['uploaded_before'])
+    if filters.get('q'):
+        condition = full_text_condition(filters['q'])
+        if condition is not None:
+            conditions.append(condition)
+    return conditions
+
+
+def apply_metadata_filters(query, filters):
+    """
+    Narrows a ModelMetadata query with the given filters.
+    :param query: A ModelMetadata query.
+    :param filters: A dictionary as returned by parse_search_filters.
+    :return: The filtered query.
+    """
+    conditions = metadata_filter_conditions(filters)
+    return query.filter(*conditions) if conditions else query
+
+
+def search_model_metadata(filters):
+    """
+    Runs a filtered, paginated search over model metadata, newest uploads first.
+    :param filters: A dictionary as returned by parse_search_filters.
+    :return: A list of ModelMetadata rows.
+    """
+    query = apply_metadata_filters(ModelMetadata.query, filters)
+    query = query.order_by(ModelMetadata.upload_date.desc(), ModelMetadata.id.desc())
+    return query.offset(filters['offset']).limit(filters['limit']).all()
@@ -0,0 +1,82 @@
+# app/utils/stream_utils.py
+from itertools import islice
+
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Serialized items are sent in writes of roughly this many characters
+_FLUSH_SIZE = 64 * 1024
+
+
+def wants_ndjson():
+    """
+    Whether the client asked for newline-delimited JSON, with ?format=ndjson or an Accept header.
+    """
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def _buffered(parts):
+    buffer = []
+    size = 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= _FLUSH_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_json_list(key, rows, serialize, fields=None):
+    """
+    Stream rows as {key: [...]} JSON, or as one NDJSON line per row when the client asks for it.
+    Rows are serialized one at a time while the response is sent, so memory does not grow with
+    the number of rows and the first bytes go out before the query has been read to the end.
+    The first row is fetched and serialized before the Response is returned, so a failing query
+    still raises in the view. A failure after that is logged and ends the body early: NDJSON gets
+    a final {"error": ...} line, JSON is left unterminated so that it does not parse.
+    :param key: Name of the list in the JSON object.
+    :param rows: Iterable of rows, typically a query with yield_per().
+    :param serialize: Function turning a row into a JSON-serializable dict.
+    :param fields: Optional dict of other members written before the list (ignored for NDJSON).
+    :return: A streamed Response.
+    """
+    dumps = current_app.json.dumps
+    rows = iter(rows)
+    first = [dumps(serialize(row)) for row in islice(rows, 1)]
+
+    def serialized():
+        yield from first
+        for row in rows:
+            yield dumps(serialize(row))
+
+    if wants_ndjson():
+        def generate():
+            try:
+                for item in serialized():
+                    yield item + '\n'
+            except Exception as e:
+                current_app.logger.exception("Streaming %s failed", key)
+                yield dumps({'error': str(e)}) + '\n'
+
+        return Response(stream_with_context(_buffered(generate())), mimetype=NDJSON_MIMETYPE)
+
+    def generate():
+        prefix = dumps(fields)[1:-1] + ',' if fields else ''
+        yield '{' + prefix + dumps(key) + ':['
+        separator = ''
+        try:
+            for item in serialized():
+                yield separator + item
+                separator = ','
+        except Exception:
+            current_app.logger.exception("Streaming %s failed", key)
+            return
+        yield ']}\n'
+
+    return Response(stream_with_context(_buffered(generate())), mimetype='application/json')
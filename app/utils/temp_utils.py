@@ -0,0 +1,98 @@
+# app/utils/temp_utils.py
+"""
+Scratch storage private to the current request.
+
+Uploads and downloads are buffered in spooled files, which stay in memory up to
+TEMP_SPOOL_MAX_SIZE and then roll over to an anonymous file under TEMP_ROOT. Uploaded files
+are spooled once, by the form parser itself, and read from there. Files that need a path
+(such as Merkle tree files) go in a per-request workspace directory. Everything is released
+when the request is torn down, so concurrent requests for the same model never share a path.
+"""
+import os
+import shutil
+import tempfile
+
+from flask import Request, current_app, g
+
+
+class SpoolingRequest(Request):
+    """
+    Request whose uploaded files are parsed into spooled files bounded by TEMP_SPOOL_MAX_SIZE under TEMP_ROOT.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=current_app.config['TEMP_SPOOL_MAX_SIZE'], dir=_temp_root())
+
+
+def init_app(app):
+    app.request_class = SpoolingRequest
+    app.teardown_request(cleanup_request_files)
+
+
+def _temp_root():
+    root = current_app.config.get('TEMP_ROOT')
+    if root:
+        os.makedirs(root, exist_ok=True)
+    return root or None
+
+
+def request_workspace():
+    """
+    Directory unique to the current request, created on first use.
+    :return: The absolute path of the directory.
+    """
+    if 'temp_workspace' not in g:
+        g.temp_workspace = tempfile.mkdtemp(prefix='request-', dir=_temp_root())
+    return g.temp_workspace
+
+
+def workspace_path(filename):
+    """
+    Path for a file inside the current request's workspace.
+    """
+    return os.path.join(request_workspace(), os.path.basename(filename))
+
+
+def spooled_file():
+    """
+    New spooled temporary file, closed when the request is torn down unless detached.
+    """
+    spool = tempfile.SpooledTemporaryFile(
+        max_size=current_app.config['TEMP_SPOOL_MAX_SIZE'], dir=_temp_root())
+    g.setdefault('temp_spools', []).append(spool)
+    return spool
+
+
+def upload_stream(file_storage):
+    """
+    Seekable stream of an uploaded file, rewound to the start.
+    The form parser already spooled the file privately for this request, so its stream is used
+    as is; only a stream that cannot seek is copied into a spooled file.
+    :param file_storage: A werkzeug FileStorage from request.files.
+    """
+    stream = file_storage.stream
+    if getattr(stream, 'seekable', lambda: False)():
+        stream.seek(0)
+        return stream
+    spool = spooled_file()
+    shutil.copyfileobj(stream, spool, 1024 * 1024)
+    spool.seek(0)
+    return spool
+
+
+def detach(spool):
+    """
+    Hand a spooled file over to the caller (e.g. a streamed response that closes it).
+    """
+    spools = g.get('temp_spools', [])
+    if spool in spools:
+        spools.remove(spool)
+    return spool
+
+
+def cleanup_request_files(exc=None):
+    for spool in g.pop('temp_spools', []):
+        spool.close()
+    workspace = g.pop('temp_workspace', None)
+    if workspace is not None:
+        shutil.rmtree(workspace, ignore_errors=True)
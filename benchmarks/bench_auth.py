@@ -0,0 +1,54 @@
+# benchmarks/bench_auth.py
+"""
+Measure the per-request overhead of the jwt_required decorator with and without the claims cache.
+
+Run from the repository root:
+    python -m benchmarks.bench_auth
+"""
+import time
+
+from app import create_app
+from app.auth.utils import generate_jwt_token, jwt_required, get_auth_caches
+from config import TestingConfig
+
+
+class BenchConfig(TestingConfig):
+    SECRET_KEY = 'benchmark-secret-benchmark-secret-0123'
+
+
+def _time_requests(app, view, token, iterations):
+    headers = {'Authorization': f'Bearer {token}'}
+    with app.test_request_context('/', headers=headers):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            view()
+        return (time.perf_counter() - start) / iterations
+
+
+def main(iterations=20000):
+    app = create_app(BenchConfig)
+    view = jwt_required(lambda: 'ok')
+
+    with app.app_context():
+        token = generate_jwt_token(1, 'Viewer')
+
+    app.config['JWT_CACHE_SIZE'] = 0
+    app.extensions.pop('jwt_cache', None)
+    uncached = _time_requests(app, view, token, iterations)
+
+    app.config['JWT_CACHE_SIZE'] = 1024
+    app.extensions.pop('jwt_cache', None)
+    cached = _time_requests(app, view, token, iterations)
+
+    with app.app_context():
+        claims_cache, _ = get_auth_caches()
+        entries = len(claims_cache)
+
+    print(f"iterations:        {iterations}")
+    print(f"uncached per call: {uncached * 1e6:8.2f} us")
+    print(f"cached per call:   {cached * 1e6:8.2f} us")
+    print(f"speedup:           {uncached / cached:8.2f}x  (cache entries: {entries})")
+
+
+if __name__ == '__main__':
+    main()
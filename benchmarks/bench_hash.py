@@ -0,0 +1,51 @@
+# benchmarks/bench_hash.py
+"""
+Compare the supported Merkle hash algorithms on raw digest throughput and on the
+root of a tree built the way build_tree does.
+
+Run from the repository root:
+    python -m benchmarks.bench_hash [leaf_count]
+"""
+import os
+import sys
+import time
+
+from app.merkle_tree.digest import get_hash_function
+from app.merkle_tree.multiproof import compute_levels
+
+CANDIDATES = (
+    ('sha256', None),
+    ('blake2b', None),
+    ('blake2b', {'digest_size': 32}),
+    ('blake2s', None),
+)
+
+
+def _throughput(hash_function, payload, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        hash_function(payload)
+    return len(payload) * rounds / (time.perf_counter() - start) / 1e6
+
+
+def _tree_time(hash_function, leaves):
+    start = time.perf_counter()
+    compute_levels([hash_function(leaf) for leaf in leaves], hash_function)
+    return time.perf_counter() - start
+
+
+def main(leaf_count=100_000):
+    payload = os.urandom(1 << 20)
+    leaves = [f"leaf-{i}" for i in range(leaf_count)]
+
+    print(f"{'algorithm':<28}{'1 MiB digests':>16}{f'tree of {leaf_count} leaves':>26}")
+    for algorithm, params in CANDIDATES:
+        hash_function = get_hash_function(algorithm, params)
+        label = algorithm + (f" {params}" if params else "")
+        mb_per_s = _throughput(hash_function, payload, 64)
+        tree_ms = min(_tree_time(hash_function, leaves) for _ in range(3)) * 1000
+        print(f"{label:<28}{mb_per_s:>11.0f} MB/s{tree_ms:>23.1f} ms")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
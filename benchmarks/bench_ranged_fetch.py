@@ -0,0 +1,103 @@
+# benchmarks/bench_ranged_fetch.py
+"""
+Download-and-verify time of one model version from a simulated object store, as a single
+stream followed by a full rehash and as concurrent byte ranges hashed as they arrive.
+
+The store answers every request after a fixed latency and serves each connection at a
+fixed bandwidth, roughly like S3: one stream is capped by its connection, while several
+ranges add up.
+
+Run from the repository root:
+    python -m benchmarks.bench_ranged_fetch [megabytes] [concurrency]
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from app import create_app
+from app.merkle_tree import compute_root, verify_model_integrity
+from app.merkle_tree.chunking import normalize_chunking, read_chunked_leaves
+from app.merkle_tree.digest import get_hash_function
+from app.models.modelmetadata import ModelMetadata
+from app.storage.base import StorageBackend
+from app.utils.fetch_utils import fetch_and_verify
+from config import TestingConfig
+
+LATENCY = 0.02
+BANDWIDTH = 100e6
+
+
+class SimulatedStorage(StorageBackend):
+    def __init__(self, objects):
+        self.objects = objects
+
+    def _transfer(self, data):
+        time.sleep(len(data) / BANDWIDTH)
+        return data
+
+    def stream(self, key, chunk_size=1024 * 1024):
+        time.sleep(LATENCY)
+        data = self.objects[key]
+        for offset in range(0, len(data), chunk_size):
+            yield self._transfer(data[offset:offset + chunk_size])
+
+    def get_range(self, key, start, end):
+        time.sleep(LATENCY)
+        return self._transfer(self.objects[key][start:end])
+
+    def put(self, key, fileobj):
+        self.objects[key] = fileobj.read()
+
+    def exists(self, key):
+        return key in self.objects
+
+    def size(self, key):
+        return len(self.objects[key])
+
+    def delete(self, key):
+        self.objects.pop(key, None)
+
+    def url(self, key):
+        return f"memory://{key}"
+
+
+def main(megabytes=256, concurrency=8):
+    data = os.urandom(megabytes << 20)
+    chunking = normalize_chunking('fastcdc')
+    root = compute_root(read_chunked_leaves(io.BytesIO(data), chunking, get_hash_function()))
+    storage = SimulatedStorage({'models/bench_v1': data})
+    model_metadata = ModelMetadata(model_name='bench', version='1', merkle_root=root, hash_algorithm='sha256',
+                                   chunking=json.dumps(chunking), compression='none')
+
+    class BenchConfig(TestingConfig):
+        SECRET_KEY = 'benchmark-secret-benchmark-secret-0123'
+        SUBTREE_CACHE_SIZE = 0
+        DOWNLOAD_PART_SIZE = 8 * 1024 * 1024
+        DOWNLOAD_CONCURRENCY = concurrency
+
+    app = create_app(BenchConfig)
+    with app.app_context(), tempfile.TemporaryFile() as f:
+        start = time.perf_counter()
+        for chunk in storage.stream('models/bench_v1'):
+            f.write(chunk)
+        f.seek(0)
+        assert verify_model_integrity(f, root, chunking=chunking)
+        sequential = time.perf_counter() - start
+
+        f.seek(0)
+        f.truncate()
+        start = time.perf_counter()
+        assert fetch_and_verify(storage, model_metadata, f)
+        ranged = time.perf_counter() - start
+
+    print(f"{megabytes} MB, {BANDWIDTH / 1e6:.0f} MB/s per connection, {LATENCY * 1000:.0f} ms latency")
+    print(f"single stream, then verify        {sequential:7.2f} s")
+    print(f"{concurrency} ranges, verified on arrival  {ranged:7.2f} s")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 256,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 8)
@@ -0,0 +1,49 @@
+# benchmarks/bench_startup.py
+"""
+Measure worker cold start: package import, create_app() and the first request.
+Each sample runs in a fresh interpreter so nothing is cached between runs.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup [samples]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_PROBE = r"""
+import json, time
+t0 = time.perf_counter()
+import app
+from config import TestingConfig
+t1 = time.perf_counter()
+application = app.create_app(TestingConfig)
+t2 = time.perf_counter()
+client = application.test_client()
+client.get('/ai-model/models/')
+t3 = time.perf_counter()
+print(json.dumps({'import': t1 - t0, 'create_app': t2 - t1, 'first_request': t3 - t2}))
+"""
+
+
+def _sample(root):
+    output = subprocess.run(
+        [sys.executable, '-c', _PROBE],
+        cwd=root, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(samples=5):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = [_sample(root) for _ in range(samples)]
+
+    print(f"samples: {samples}")
+    for phase in ('import', 'create_app', 'first_request'):
+        values = [r[phase] * 1000 for r in results]
+        print(f"{phase:<14} median {statistics.median(values):8.1f} ms   max {max(values):8.1f} ms")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
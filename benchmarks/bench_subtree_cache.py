@@ -0,0 +1,64 @@
+# benchmarks/bench_subtree_cache.py
+"""
+Root computation and tree file writing (build_tree, as on upload) for a new model version that
+changes a small fraction of the previous version's leaves, with and without the Merkle subtree
+cache. Changes come in contiguous
+runs (a retrained layer, an edited section); edits scattered over every chunk leave
+nothing to reuse.
+
+Run from the repository root:
+    python -m benchmarks.bench_subtree_cache [leaf_count] [changed_fraction]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from app.merkle_tree import SubtreeCache, build_tree, compute_root
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main(leaf_count=500_000, changed_fraction=0.01, run_length=4096):
+    rng = random.Random(0)
+    previous = [f"weight-{i}-{rng.random():.12f}" for i in range(leaf_count)]
+    current = list(previous)
+    runs = max(1, int(leaf_count * changed_fraction) // run_length)
+    for start in rng.sample(range(0, leaf_count - run_length), runs):
+        for i in range(start, start + run_length):
+            current[i] = f"weight-{i}-{rng.random():.12f}"
+
+    cache = SubtreeCache(':memory:')
+    _, uncached_ms = _timed(compute_root, current)
+    _, cold_ms = _timed(cache.compute_root, previous)
+    root, warm_ms = _timed(cache.compute_root, current)
+    assert root == compute_root(current)
+
+    print(f"leaves: {leaf_count}, changed: {changed_fraction:.1%}, chunk: {cache.chunk_leaves} leaves")
+    print(f"no cache                 {uncached_ms:8.1f} ms")
+    print(f"previous version (cold)  {cold_ms:8.1f} ms")
+    print(f"new version (warm)       {warm_ms:8.1f} ms")
+    print(f"hit rate                 {cache.stats()['process']['hit_rate']:8.1%}")
+
+    cache = SubtreeCache(':memory:')
+    with tempfile.TemporaryDirectory() as directory:
+        tree_file = os.path.join(directory, 'merkle.tree')
+        _, uncached_ms = _timed(build_tree, current, tree_file)
+        _, cold_ms = _timed(build_tree, previous, tree_file, 'sha256', None, cache)
+        node, warm_ms = _timed(build_tree, current, tree_file, 'sha256', None, cache)
+    assert node.hashValue == root
+
+    print("build_tree, tree file written:")
+    print(f"no cache                 {uncached_ms:8.1f} ms")
+    print(f"previous version (cold)  {cold_ms:8.1f} ms")
+    print(f"new version (warm)       {warm_ms:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 0.01)
@@ -1,15 +1,7 @@
 import os
-from dotenv import load_dotenv
 import env_loader
 
 basedir = os.path.abspath(os.path.dirname(__file__))
-load_dotenv(os.path.join(basedir, '.env'))
-
-environment = os.getenv('FLASK_ENV', 'development')
-if environment == 'production':
-    load_dotenv(os.path.join(basedir, '.env.prod'))
-else:
-    load_dotenv(os.path.join(basedir, '.env.dev'))
 
 # print(os.environ.get('SQLALCHEMY_DATABASE_URI'), "database")
 
@@ -18,10 +10,112 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI')\
         or 'sqlite:///' + os.path.join(basedir, 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Schema changes are applied with `flask db upgrade`; only enable this for throwaway databases
+    AUTO_CREATE_SCHEMA = os.environ.get('AUTO_CREATE_SCHEMA', 'false').lower() == 'true'
     AWS_ACCESS_KEY = os.environ.get('AWS_ACCESS_KEY')
     AWS_SECRET_KEY = os.environ.get('AWS_SECRET_KEY')
     AWS_REGION = os.environ.get('AWS_REGION')
     S3_BUCKET = os.environ.get('S3_BUCKET')
+    # S3-compatible endpoint (MinIO, a local moto server); AWS when unset
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')
+
+    # Storage backend for model artifacts and tree files: 's3' or 'local'
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 's3')
+    LOCAL_STORAGE_ROOT = os.environ.get('LOCAL_STORAGE_ROOT') or os.path.join(basedir, 'storage')
+    # Size of the per-process S3 connection pool shared by all request threads
+    S3_MAX_POOL_CONNECTIONS = int(os.environ.get('S3_MAX_POOL_CONNECTIONS', 10))
+
+    # Per-request scratch files: uploads and downloads stay in memory up to TEMP_SPOOL_MAX_SIZE bytes,
+    # then spill to TEMP_ROOT (the system temporary directory by default)
+    TEMP_ROOT = os.environ.get('TEMP_ROOT')
+    TEMP_SPOOL_MAX_SIZE = int(os.environ.get('TEMP_SPOOL_MAX_SIZE', 8 * 1024 * 1024))
+
+    # Streaming compression of stored artifacts and tree files: none, zlib or lzma,
+    # with a level from 0 to 9 (the library default when unset)
+    STORAGE_COMPRESSION = os.environ.get('STORAGE_COMPRESSION', 'none')
+    STORAGE_COMPRESSION_LEVEL = os.environ.get('STORAGE_COMPRESSION_LEVEL')
+
+    # Content-addressed cache of Merkle subtree hashes shared by the workers on a host, used to build
+    # the trees of new uploads (integrity checks never read it); SUBTREE_CACHE_SIZE is the maximum
+    # number of cached chunk roots (0 disables the cache) and SUBTREE_CACHE_NODE_SIZE the maximum
+    # number of chunks whose every node is kept for writing tree files (about 64 KB each for SHA-256)
+    SUBTREE_CACHE_PATH = os.environ.get('SUBTREE_CACHE_PATH') or os.path.join(basedir, 'subtree_cache.db')
+    SUBTREE_CACHE_SIZE = int(os.environ.get('SUBTREE_CACHE_SIZE', 1000000))
+    SUBTREE_CACHE_LEAVES = int(os.environ.get('SUBTREE_CACHE_LEAVES', 1024))
+    SUBTREE_CACHE_NODE_SIZE = int(os.environ.get('SUBTREE_CACHE_NODE_SIZE', 4096))
+
+    # Admission control of uploads and downloads, per worker process: requests beyond the concurrency or
+    # byte budget of their class wait in a bounded queue for up to ADMISSION_QUEUE_TIMEOUT seconds, then
+    # get 429 with Retry-After (0 means unlimited for the limits and budgets)
+    ADMISSION_UPLOAD_CONCURRENCY = int(os.environ.get('ADMISSION_UPLOAD_CONCURRENCY', 4))
+    ADMISSION_UPLOAD_BYTES = int(os.environ.get('ADMISSION_UPLOAD_BYTES', 0))
+    ADMISSION_DOWNLOAD_CONCURRENCY = int(os.environ.get('ADMISSION_DOWNLOAD_CONCURRENCY', 8))
+    ADMISSION_DOWNLOAD_BYTES = int(os.environ.get('ADMISSION_DOWNLOAD_BYTES', 0))
+    ADMISSION_QUEUE_SIZE = int(os.environ.get('ADMISSION_QUEUE_SIZE', 16))
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 10))
+    ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER', 5))
+
+    # Downloads can redirect to a presigned storage URL instead of streaming through the app
+    # (?redirect=true per request, or by default with DOWNLOAD_REDIRECT). The object is verified
+    # first unless it passed verification within DOWNLOAD_VERIFY_MAX_AGE seconds
+    DOWNLOAD_REDIRECT = os.environ.get('DOWNLOAD_REDIRECT', 'false').lower() == 'true'
+    DOWNLOAD_PRESIGNED_EXPIRY = int(os.environ.get('DOWNLOAD_PRESIGNED_EXPIRY', 300))
+    DOWNLOAD_VERIFY_MAX_AGE = int(os.environ.get('DOWNLOAD_VERIFY_MAX_AGE', 86400))
+
+    # Resumable upload sessions: parts of UPLOAD_PART_SIZE bytes (the last may be shorter) are hashed on
+    # arrival as leaves of UPLOAD_LEAF_SIZE bytes; the part size must be a power-of-two multiple of the
+    # leaf size, and at least 5 MiB on S3
+    UPLOAD_LEAF_SIZE = int(os.environ.get('UPLOAD_LEAF_SIZE', 1024 * 1024))
+    UPLOAD_PART_SIZE = int(os.environ.get('UPLOAD_PART_SIZE', 8 * 1024 * 1024))
+    # `flask ai-model cleanup-uploads` aborts open sessions idle for UPLOAD_SESSION_MAX_AGE seconds,
+    # and multipart uploads left in storage that long without a session
+    UPLOAD_SESSION_MAX_AGE = int(os.environ.get('UPLOAD_SESSION_MAX_AGE', 7 * 24 * 3600))
+
+    # Downloads through the app fetch stored objects as DOWNLOAD_CONCURRENCY concurrent byte-range reads
+    # of DOWNLOAD_PART_SIZE bytes, hashing each range as it arrives (1 reads a single stream). Up to
+    # concurrency x part size bytes are buffered per download; keep the concurrency within S3_MAX_POOL_CONNECTIONS
+    DOWNLOAD_PART_SIZE = int(os.environ.get('DOWNLOAD_PART_SIZE', 8 * 1024 * 1024))
+    DOWNLOAD_CONCURRENCY = int(os.environ.get('DOWNLOAD_CONCURRENCY', 4))
+
+    # Repair rounds for a download that fails verification, re-fetching only the corrupted byte ranges
+    DOWNLOAD_REPAIR_ATTEMPTS = int(os.environ.get('DOWNLOAD_REPAIR_ATTEMPTS', 2))
+
+    # Opt-in request profiling: requests sending PROFILING_HEADER with PROFILING_TOKEN, plus a random
+    # PROFILING_SAMPLE_RATE fraction of all requests, are profiled with cProfile (and tracemalloc for peak
+    # memory when PROFILING_TRACE_MEMORY is set); the newest PROFILING_MAX_FILES profiles are kept in PROFILING_DIR
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+    PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN')
+    PROFILING_HEADER = os.environ.get('PROFILING_HEADER', 'X-Profile-Token')
+    PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+    PROFILING_TRACE_MEMORY = os.environ.get('PROFILING_TRACE_MEMORY', 'false').lower() == 'true'
+    PROFILING_DIR = os.environ.get('PROFILING_DIR') or os.path.join(basedir, 'profiles')
+    PROFILING_MAX_FILES = int(os.environ.get('PROFILING_MAX_FILES', 50))
+
+    # Background integrity scrubber (`flask scrubber run`)
+    SCRUB_WORKERS = int(os.environ.get('SCRUB_WORKERS', 4))
+    SCRUB_MAX_BYTES_PER_SECOND = int(os.environ.get('SCRUB_MAX_BYTES_PER_SECOND', 0))
+    SCRUB_BATCH_SIZE = int(os.environ.get('SCRUB_BATCH_SIZE', 32))
+    SCRUB_INTERVAL = int(os.environ.get('SCRUB_INTERVAL', 86400))
+
+    # Default Merkle hash for new versions: sha256, blake2b or blake2s (params as JSON, e.g. {"digest_size": 32})
+    MERKLE_HASH_ALGORITHM = os.environ.get('MERKLE_HASH_ALGORITHM', 'sha256')
+    MERKLE_HASH_PARAMS = os.environ.get('MERKLE_HASH_PARAMS')
+    # Default leaves of new versions: 'none' splits on commas, 'fastcdc' (or a JSON object with
+    # method, min_size, avg_size and max_size) uses content-defined chunks that survive insertions
+    MERKLE_CHUNKING = os.environ.get('MERKLE_CHUNKING', 'none')
+
+    # Signed tree heads of the registry transparency log: path of a PEM Ed25519 private key (create one with
+    # `flask registry-log generate-key`), kept apart from SECRET_KEY; its public key is published at
+    # /registry-log/public-key, and tree heads are not signed until it is set
+    TREE_HEAD_SIGNING_KEY_FILE = os.environ.get('TREE_HEAD_SIGNING_KEY_FILE')
+    TREE_HEAD_INTERVAL = int(os.environ.get('TREE_HEAD_INTERVAL', 3600))
+
+    # Validated JWT claims and user role lookups are cached per process; role and status changes are
+    # dropped from the changing process at commit and expire elsewhere within JWT_USER_CACHE_TTL seconds
+    JWT_CACHE_SIZE = int(os.environ.get('JWT_CACHE_SIZE', 1024))
+    JWT_CACHE_TTL = int(os.environ.get('JWT_CACHE_TTL', 300))
+    JWT_USER_CACHE_SIZE = int(os.environ.get('JWT_USER_CACHE_SIZE', 1024))
+    JWT_USER_CACHE_TTL = int(os.environ.get('JWT_USER_CACHE_TTL', 60))
 
 
 class DevelopmentConfig(Config):
@@ -32,4 +126,6 @@ class ProductionConfig(Config):
 
 class TestingConfig(Config):
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
\ No newline at end of file
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    AUTO_CREATE_SCHEMA = True
+    SUBTREE_CACHE_PATH = ':memory:'
\ No newline at end of file
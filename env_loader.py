@@ -1,21 +1,40 @@
 # env_loader.py
 
 import os
+import sys
 from dotenv import load_dotenv
 
 # Get the base directory of the project
 basedir = os.path.abspath(os.path.dirname(__file__))
 
-# Determine which .env file to load based on the FLASK_ENV environment variable
-environment = os.getenv('FLASK_ENV', 'development')
-
-# Load the appropriate .env file
-if environment == 'production':
-    load_dotenv(os.path.join(basedir, '.env.prod'))
-    print("Loaded .env.prod")
-elif environment == 'testing':
-    load_dotenv(os.path.join(basedir, '.env.test'))
-    print("Loaded .env.test")
-else:
-    load_dotenv(os.path.join(basedir, '.env.dev'))
-    print("Loaded .env.dev")
+_loaded = False
+
+
+def load_environment():
+    """
+    Load the .env files for the current FLASK_ENV once per process.
+    Values from the environment-specific file take precedence over the shared .env file.
+    """
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+
+    # Determine which .env file to load based on the FLASK_ENV environment variable
+    environment = os.getenv('FLASK_ENV', 'development')
+
+    # Load the appropriate .env file
+    if environment == 'production':
+        load_dotenv(os.path.join(basedir, '.env.prod'))
+        print("Loaded .env.prod", file=sys.stderr)
+    elif environment == 'testing':
+        load_dotenv(os.path.join(basedir, '.env.test'))
+        print("Loaded .env.test", file=sys.stderr)
+    else:
+        load_dotenv(os.path.join(basedir, '.env.dev'))
+        print("Loaded .env.dev", file=sys.stderr)
+
+    load_dotenv(os.path.join(basedir, '.env'))
+
+
+load_environment()
@@ -1,7 +1,7 @@
 """Added the change logs in the schema0
 
 Revision ID: 65be8ac06445
-Revises: 
+Revises: b1f0c2a7d9e4
 Create Date: 2024-09-28 00:29:56.908168
 
 """
@@ -11,7 +11,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = '65be8ac06445'
-down_revision = None
+down_revision = 'b1f0c2a7d9e4'
 branch_labels = None
 depends_on = None
 
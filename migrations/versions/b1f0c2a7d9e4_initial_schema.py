@@ -0,0 +1,59 @@
+"""Initial schema
+
+Revision ID: b1f0c2a7d9e4
+Revises: 
+Create Date: 2024-09-27 23:58:10.412305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1f0c2a7d9e4'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Baseline tables that existed before the first tracked migration, so that
+    # `flask db upgrade` can build a fresh database without db.create_all()
+    op.create_table('model_metadata',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('model_name', sa.String(length=120), nullable=False),
+    sa.Column('version', sa.String(length=50), nullable=False),
+    sa.Column('description', sa.String(length=255), nullable=True),
+    sa.Column('accuracy', sa.Float(), nullable=True),
+    sa.Column('s3_url', sa.String(length=255), nullable=False),
+    sa.Column('merkle_root', sa.String(length=64), nullable=False),
+    sa.Column('upload_date', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('model_name', 'version', name='unique_model_version')
+    )
+    with op.batch_alter_table('model_metadata', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_model_metadata_model_name'), ['model_name'], unique=False)
+        batch_op.create_index(batch_op.f('ix_model_metadata_version'), ['version'], unique=False)
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=50), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('password_hash', sa.String(length=128), nullable=False),
+    sa.Column('role', sa.String(length=20), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email'),
+    sa.UniqueConstraint('username')
+    )
+
+
+def downgrade():
+    op.drop_table('users')
+    with op.batch_alter_table('model_metadata', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_model_metadata_version'))
+        batch_op.drop_index(batch_op.f('ix_model_metadata_model_name'))
+
+    op.drop_table('model_metadata')
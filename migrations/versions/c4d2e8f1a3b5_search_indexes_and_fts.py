@@ -0,0 +1,66 @@
+"""Search indexes and full-text table for model metadata
+
+Revision ID: c4d2e8f1a3b5
+Revises: 3911aa258c3d
+Create Date: 2024-10-02 18:41:07.215530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d2e8f1a3b5'
+down_revision = '3911aa258c3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('model_metadata', schema=None) as batch_op:
+        batch_op.create_index('ix_model_metadata_name_upload_date', ['model_name', 'upload_date'], unique=False)
+        batch_op.create_index('ix_model_metadata_deprecated_accuracy', ['deprecated', 'accuracy'], unique=False)
+        batch_op.create_index('ix_model_metadata_deprecated_upload_date', ['deprecated', 'upload_date'], unique=False)
+
+    # Full-text index over description and change_log, kept in sync by triggers (SQLite FTS5 only;
+    # other databases fall back to LIKE matching in the search endpoint)
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("""
+            CREATE VIRTUAL TABLE model_metadata_fts USING fts5(
+                description, change_log, content='model_metadata', content_rowid='id'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER model_metadata_fts_ai AFTER INSERT ON model_metadata BEGIN
+                INSERT INTO model_metadata_fts(rowid, description, change_log)
+                VALUES (new.id, new.description, new.change_log);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER model_metadata_fts_ad AFTER DELETE ON model_metadata BEGIN
+                INSERT INTO model_metadata_fts(model_metadata_fts, rowid, description, change_log)
+                VALUES ('delete', old.id, old.description, old.change_log);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER model_metadata_fts_au AFTER UPDATE OF description, change_log ON model_metadata BEGIN
+                INSERT INTO model_metadata_fts(model_metadata_fts, rowid, description, change_log)
+                VALUES ('delete', old.id, old.description, old.change_log);
+                INSERT INTO model_metadata_fts(rowid, description, change_log)
+                VALUES (new.id, new.description, new.change_log);
+            END
+        """)
+        op.execute("INSERT INTO model_metadata_fts(model_metadata_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS model_metadata_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS model_metadata_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS model_metadata_fts_ai")
+        op.execute("DROP TABLE IF EXISTS model_metadata_fts")
+
+    with op.batch_alter_table('model_metadata', schema=None) as batch_op:
+        batch_op.drop_index('ix_model_metadata_deprecated_upload_date')
+        batch_op.drop_index('ix_model_metadata_deprecated_accuracy')
+        batch_op.drop_index('ix_model_metadata_name_upload_date')
@@ -0,0 +1,21 @@
+# tests/conftest.py
+import pytest
+
+from app import create_app
+from config import TestingConfig
+
+
+class LocalTestingConfig(TestingConfig):
+    SECRET_KEY = 'test-secret-test-secret-test-secret-0123'
+    STORAGE_BACKEND = 'local'
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """
+    Build an application on LocalTestingConfig with some of its values overridden.
+    """
+    def factory(**overrides):
+        overrides.setdefault('LOCAL_STORAGE_ROOT', str(tmp_path / 'storage'))
+        return create_app(type('Config', (LocalTestingConfig,), overrides))
+    return factory
@@ -0,0 +1,53 @@
+# tests/test_accumulator.py
+"""
+The accumulator must give the same roots as build_tree and compute_root.
+"""
+import pytest
+
+from app.merkle_tree import MerkleAccumulator, build_tree, compute_root
+from app.merkle_tree.digest import get_hash_function
+
+ALGORITHMS = [('sha256', None), ('blake2s', {'digest_size': 16}), ('blake2b', {'digest_size': 32})]
+LEAF_COUNTS = list(range(1, 70)) + [127, 128, 129, 1000]
+
+
+def _leaves(count):
+    return [f"leaf-{i}" for i in range(count)]
+
+
+@pytest.mark.parametrize('algorithm, hash_params', ALGORITHMS)
+def test_accumulator_matches_build_tree(tmp_path, algorithm, hash_params):
+    for count in LEAF_COUNTS:
+        leaves = _leaves(count)
+        accumulator = MerkleAccumulator(algorithm, hash_params)
+        for leaf in leaves:
+            accumulator.append(leaf)
+        tree_root = build_tree(leaves, str(tmp_path / 'tree.txt'), algorithm, hash_params).hashValue
+        assert accumulator.root() == tree_root, count
+        assert compute_root(leaves, algorithm, hash_params) == tree_root, count
+
+
+def test_accumulator_subtrees_and_snapshots_match_build_tree(tmp_path):
+    leaves = _leaves(1000)
+    for split in (0, 1, 64, 512, 999):
+        accumulator = MerkleAccumulator()
+        for leaf in leaves[:split]:
+            accumulator.append(leaf)
+        accumulator = MerkleAccumulator.restore(accumulator.snapshot())
+        # The rest as perfect subtrees wherever they are aligned, single leaves otherwise
+        position = split
+        while position < len(leaves):
+            height = 0
+            while position % (2 << height) == 0 and position + (2 << height) <= len(leaves):
+                height += 1
+            accumulator.append_subtree(compute_root(leaves[position:position + (1 << height)]), height)
+            position += 1 << height
+        assert accumulator.leaf_count == len(leaves)
+        assert accumulator.root() == build_tree(leaves, str(tmp_path / 'tree.txt')).hashValue, split
+
+
+def test_accumulator_rejects_misaligned_subtrees():
+    accumulator = MerkleAccumulator()
+    accumulator.append('x')
+    with pytest.raises(ValueError):
+        accumulator.append_subtree(get_hash_function()('y'), 1)
@@ -0,0 +1,65 @@
+# tests/test_chunking.py
+"""
+Chunk boundaries must depend only on the content, not on how it is read.
+"""
+import io
+import random
+
+import pytest
+
+from app.merkle_tree import chunking
+from app.merkle_tree.chunking import chunk_data, iter_chunks, normalize_chunking
+from app.merkle_tree.digest import get_hash_function
+
+
+CHUNKINGS = [
+    {'method': 'fastcdc', 'min_size': 256, 'avg_size': 1024, 'max_size': 4096},
+    'fastcdc',
+    {'method': 'fixed', 'size': 1000},
+]
+
+
+def _data(size, seed=0):
+    return random.Random(seed).randbytes(size)
+
+
+@pytest.mark.parametrize('params', CHUNKINGS)
+def test_chunks_do_not_depend_on_the_read_block_size(params):
+    params = normalize_chunking(params)
+    data = _data(600_000)
+    expected = list(iter_chunks(io.BytesIO(data), params))
+    assert b''.join(expected) == data
+    for block_size in (4096, 65_537, len(data) + 1):
+        assert list(iter_chunks(io.BytesIO(data), params, block_size=block_size)) == expected, block_size
+    # Blocks shorter than the rolling window, on a prefix to keep the test quick
+    prefix = data[:20_000]
+    expected_prefix = list(iter_chunks(io.BytesIO(prefix), params))
+    for block_size in (1, 31):
+        assert list(iter_chunks(io.BytesIO(prefix), params, block_size=block_size)) == expected_prefix, block_size
+
+    hash_function = get_hash_function()
+    leaves, ranges = chunk_data(data, params, hash_function)
+    assert [data[start:end] for start, end in ranges] == expected
+    assert leaves == [hash_function(chunk) for chunk in expected]
+
+
+@pytest.mark.skipif(chunking.np is None, reason='numpy is not installed')
+def test_numpy_and_python_cut_points_agree(monkeypatch):
+    params = normalize_chunking({'method': 'fastcdc', 'min_size': 64, 'avg_size': 256, 'max_size': 1024})
+    data = _data(300_000, seed=1)
+    for block_size in (4096, 100_003):
+        with_numpy = list(iter_chunks(io.BytesIO(data), params, block_size=block_size))
+        with monkeypatch.context() as patch:
+            patch.setattr(chunking, 'np', None)
+            without_numpy = list(iter_chunks(io.BytesIO(data), params, block_size=block_size))
+        assert with_numpy == without_numpy, block_size
+        assert len(with_numpy) > 100
+
+
+def test_insertion_only_changes_nearby_chunks():
+    params = normalize_chunking({'method': 'fastcdc', 'min_size': 256, 'avg_size': 1024, 'max_size': 4096})
+    data = _data(200_000, seed=2)
+    edited = data[:100_000] + b'inserted' + data[100_000:]
+    before = set(iter_chunks(io.BytesIO(data), params))
+    after = list(iter_chunks(io.BytesIO(edited), params))
+    assert sum(chunk not in before for chunk in after) <= 3
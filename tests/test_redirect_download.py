@@ -0,0 +1,116 @@
+# tests/test_redirect_download.py
+"""
+Redirected downloads against a local S3 stand-in (moto).
+"""
+import io
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+boto3 = pytest.importorskip('boto3')
+moto = pytest.importorskip('moto')
+requests = pytest.importorskip('requests')
+
+from app.models.modelmetadata import ModelMetadata
+
+BUCKET = 'models-bucket'
+KEY = 'models/m_v1'
+
+
+@pytest.fixture
+def s3():
+    with moto.mock_aws():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def app(make_app, s3):
+    return make_app(STORAGE_BACKEND='s3', S3_BUCKET=BUCKET, AWS_REGION='us-east-1',
+                    AWS_ACCESS_KEY='testing', AWS_SECRET_KEY='testing')
+
+
+def _upload(client, data=b'a,b,c,d,e'):
+    response = client.post('/ai-model/upload/', data={'file': (io.BytesIO(data), 'm'), 'accuracy': '0.9', 'version': '1'},
+                           content_type='multipart/form-data', buffered=True)
+    assert response.status_code == 200, response.json
+
+
+def _redirect(client):
+    return client.get('/ai-model/download/m/1?redirect=true', buffered=True)
+
+
+def _row(app):
+    with app.app_context():
+        return ModelMetadata.query.filter_by(model_name='m', version='1').one()
+
+
+def test_redirect_serves_the_verified_object(app, s3):
+    client = app.test_client()
+    _upload(client)
+
+    response = _redirect(client)
+    assert response.status_code == 302
+    row = _row(app)
+    assert response.headers['X-Merkle-Root'] == row.merkle_root
+    assert response.json['merkle_root'] == row.merkle_root
+    assert response.headers['X-Object-ETag'] == s3.head_object(Bucket=BUCKET, Key=KEY)['ETag']
+    assert requests.get(response.headers['Location']).content == b'a,b,c,d,e'
+    assert row.last_verified_status == 'ok'
+    assert row.last_verified_etag == response.headers['X-Object-ETag']
+
+
+def test_recent_check_of_the_same_object_is_reused(app, monkeypatch):
+    client = app.test_client()
+    _upload(client)
+    assert _redirect(client).status_code == 302
+
+    def fail(*args, **kwargs):
+        raise AssertionError('the object was checked again')
+
+    monkeypatch.setattr('app.scrubber.scrub.check_object', fail)
+    assert _redirect(client).status_code == 302
+
+
+def test_rewriting_the_key_voids_the_check(app, s3):
+    client = app.test_client()
+    _upload(client)
+    assert _redirect(client).status_code == 302
+
+    # Rewritten behind the registry's back, while the previous check is still recent
+    s3.put_object(Bucket=BUCKET, Key=KEY, Body=b'a,b,X,d,e')
+    response = _redirect(client)
+    assert response.status_code == 400
+    assert _row(app).last_verified_status == 'corrupt'
+
+
+def test_missing_object(app, s3):
+    client = app.test_client()
+    _upload(client)
+    s3.delete_object(Bucket=BUCKET, Key=KEY)
+    assert _redirect(client).status_code == 404
+
+
+def test_versioned_bucket_pins_the_verified_version(app, s3):
+    s3.put_bucket_versioning(Bucket=BUCKET, VersioningConfiguration={'Status': 'Enabled'})
+    client = app.test_client()
+    _upload(client)
+
+    response = _redirect(client)
+    assert response.status_code == 302
+    version_id = s3.head_object(Bucket=BUCKET, Key=KEY)['VersionId']
+    assert parse_qs(urlparse(response.headers['Location']).query)['versionId'] == [version_id]
+
+    # The URL keeps serving what was verified after the key is overwritten
+    s3.put_object(Bucket=BUCKET, Key=KEY, Body=b'a,b,X,d,e')
+    assert requests.get(response.headers['Location']).content == b'a,b,c,d,e'
+
+
+def test_local_storage_serves_through_the_app(make_app):
+    app = make_app()
+    client = app.test_client()
+    _upload(client)
+    response = _redirect(client)
+    assert response.status_code == 200
+    assert response.data == b'a,b,c,d,e'
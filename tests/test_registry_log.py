@@ -0,0 +1,73 @@
+# tests/test_registry_log.py
+"""
+Signed tree heads of the registry log verify with the published public key alone.
+"""
+import io
+
+import pytest
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+
+from app.registry_log.log import generate_signing_key
+
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    key_file = tmp_path / 'tree_head.pem'
+    generate_signing_key(str(key_file))
+    return make_app(TREE_HEAD_SIGNING_KEY_FILE=str(key_file), TREE_HEAD_INTERVAL=0)
+
+
+def _upload(client, name, version='1'):
+    response = client.post('/ai-model/upload/', data={
+        'file': (io.BytesIO(b"a,b,c," + name.encode()), name), 'accuracy': '0.9', 'version': version
+    }, content_type='multipart/form-data', buffered=True)
+    assert response.status_code == 200, response.get_json()
+
+
+def test_tree_heads_verify_with_the_published_public_key(app):
+    client = app.test_client()
+    for name in ('first', 'second'):
+        _upload(client, name)
+
+    key = client.get('/registry-log/public-key', buffered=True).get_json()
+    assert key['algorithm'] == 'ed25519'
+    public_key = serialization.load_pem_public_key(key['public_key_pem'].encode())
+    assert public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw).hex() == key['public_key']
+
+    tree_head = client.get('/registry-log/tree-head', buffered=True).get_json()
+    assert tree_head['tree_size'] == 2
+    message = key['signed_message'].format(**tree_head).encode()
+    public_key.verify(bytes.fromhex(tree_head['signature']), message)
+    with pytest.raises(InvalidSignature):
+        public_key.verify(bytes.fromhex(tree_head['signature']), message.replace(b'2:', b'3:', 1))
+
+    result = app.test_cli_runner().invoke(args=['registry-log', 'audit'])
+    assert result.exit_code == 0, result.output
+
+
+def test_public_key_is_not_found_without_a_signing_key(make_app):
+    response = make_app().test_client().get('/registry-log/public-key', buffered=True)
+    assert response.status_code == 404
+
+
+def test_inclusion_proof_defaults_to_the_current_log_size(make_app, tmp_path):
+    # Only the first append signs a tree head within the interval, so the log runs ahead of it
+    key_file = tmp_path / 'tree_head.pem'
+    generate_signing_key(str(key_file))
+    app = make_app(TREE_HEAD_SIGNING_KEY_FILE=str(key_file), TREE_HEAD_INTERVAL=3600)
+    client = app.test_client()
+    for name in ('first', 'second', 'third'):
+        _upload(client, name)
+    assert client.get('/registry-log/tree-head', buffered=True).get_json()['tree_size'] == 1
+
+    proof = client.get('/registry-log/inclusion/third/1', buffered=True).get_json()
+    assert proof['leaf_index'] == 2 and proof['tree_size'] == 3
+    assert proof['root_hash'] == client.get('/registry-log/tree-head?current=true', buffered=True).get_json()['root_hash']
+
+    response = client.get('/registry-log/inclusion/third/1?tree_size=2', buffered=True)
+    assert response.status_code == 400
+    assert 'tree_size of at least 3' in response.get_json()['error']
+    response = client.get('/registry-log/inclusion/first/1?tree_size=4', buffered=True)
+    assert response.status_code == 400
+    assert 'current log size (3)' in response.get_json()['error']
@@ -0,0 +1,193 @@
+# tests/test_upload_sessions.py
+"""
+Resumable upload sessions: tree files, concurrent uploads of a part and cleanup of abandoned sessions.
+"""
+import datetime
+import io
+import os
+
+import pytest
+
+from app.extensions import db
+from app.merkle_tree import build_tree, iter_chunks
+from app.merkle_tree.digest import get_hash_function
+from app.models.upload_session import UploadPart, UploadSession
+from app.storage import get_storage, tree_key
+from app.storage.base import StorageBackend, part_key
+
+LEAF_SIZE = 100
+PART_SIZE = 400
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(UPLOAD_LEAF_SIZE=LEAF_SIZE, UPLOAD_PART_SIZE=PART_SIZE)
+
+
+def _create(client, version='1'):
+    response = client.post('/ai-model/uploads', json={'model_name': 'm', 'version': version, 'accuracy': 0.5})
+    assert response.status_code == 201, response.json
+    return response.json['session_id']
+
+
+def _put(client, session_id, part_number, data):
+    return client.put(f'/ai-model/uploads/{session_id}/parts/{part_number}', data=data, buffered=True)
+
+
+def _upload_parts(client, session_id, data):
+    for part_number, start in enumerate(range(0, len(data), PART_SIZE), 1):
+        assert _put(client, session_id, part_number, data[start:start + PART_SIZE]).status_code == 200
+
+
+def _complete(client, session_id, data):
+    return client.post(f'/ai-model/uploads/{session_id}/complete',
+                       json={'part_count': -(-len(data) // PART_SIZE)}, buffered=True)
+
+
+def _download(client):
+    return client.get('/ai-model/download/m/1', buffered=True)
+
+
+@pytest.mark.parametrize('size', [1, 100, 399, 400, 401, 1200, 1250, 2000, 2801, 4000])
+def test_tree_file_from_part_levels_matches_build_tree(app, tmp_path, size):
+    data = os.urandom(size)
+    client = app.test_client()
+    session_id = _create(client)
+    _upload_parts(client, session_id, data)
+    response = _complete(client, session_id, data)
+    assert response.status_code == 200, response.json
+
+    hash_function = get_hash_function()
+    leaves = [hash_function(chunk) for chunk in iter_chunks(io.BytesIO(data), {'method': 'fixed', 'size': LEAF_SIZE})]
+    assert build_tree(leaves, str(tmp_path / 'expected.tree')).hashValue == response.json['merkle_root']
+    with app.app_context():
+        stored = get_storage().local_path(tree_key('m', '1'))
+    with open(stored) as f, open(tmp_path / 'expected.tree') as expected:
+        assert f.read() == expected.read()
+
+
+def test_concurrent_upload_of_a_part_cannot_mix_leaves_and_bytes(make_app, monkeypatch):
+    # The racing upload runs inside the first one, which must not wait for its admission slot
+    app = make_app(UPLOAD_LEAF_SIZE=LEAF_SIZE, UPLOAD_PART_SIZE=PART_SIZE, ADMISSION_UPLOAD_CONCURRENCY=0)
+    data = os.urandom(1000)
+    client = app.test_client()
+    session_id = _create(client)
+    _upload_parts(client, session_id, data)
+
+    # While one upload of part 1 is being stored, another one is stored and recorded first
+    put_part = StorageBackend.put_part
+    racing = []
+
+    def put_part_during_another_upload(self, key, upload_id, part_number, fileobj):
+        token = put_part(self, key, upload_id, part_number, fileobj)
+        if not racing:
+            racing.append(None)
+            racing[0] = _put(client, session_id, 1, data[:PART_SIZE])
+        return token
+
+    monkeypatch.setattr(StorageBackend, 'put_part', put_part_during_another_upload)
+    response = _put(client, session_id, 1, b'x' * PART_SIZE)
+    monkeypatch.undo()
+    assert racing[0].status_code == 200, racing[0].json
+    assert response.status_code == 409
+
+    # Only the recorded upload of the part is kept and assembled
+    with app.app_context():
+        upload_session = db.session.get(UploadSession, session_id)
+        token = db.session.get(UploadPart, (session_id, 1)).storage_token
+        stored = os.listdir(os.path.dirname(get_storage().local_path(
+            part_key(upload_session.storage_upload_id, 1, token))))
+    assert sorted(name for name in stored if name.startswith('00001')) == [f'00001-{token}']
+    assert _complete(client, session_id, data).status_code == 200
+    assert _download(client).data == data
+
+
+def test_completion_drops_parts_whose_upload_is_gone(app):
+    data = os.urandom(1000)
+    client = app.test_client()
+    session_id = _create(client)
+    _upload_parts(client, session_id, data)
+    with app.app_context():
+        upload_session = db.session.get(UploadSession, session_id)
+        get_storage().delete(part_key(upload_session.storage_upload_id, 2,
+                                      db.session.get(UploadPart, (session_id, 2)).storage_token))
+
+    response = _complete(client, session_id, data)
+    assert response.status_code == 409
+    assert response.json['missing_parts'] == [2]
+    assert [part['part_number'] for part in client.get(f'/ai-model/uploads/{session_id}').json['parts']] == [1, 3]
+
+    assert _put(client, session_id, 2, data[PART_SIZE:2 * PART_SIZE]).status_code == 200
+    assert _complete(client, session_id, data).status_code == 200
+    assert _download(client).data == data
+
+
+def test_completion_checks_the_part_s3_holds(make_app):
+    boto3 = pytest.importorskip('boto3')
+    moto = pytest.importorskip('moto')
+    with moto.mock_aws():
+        s3 = boto3.client('s3', region_name='us-east-1')
+        s3.create_bucket(Bucket='models-bucket')
+        app = make_app(STORAGE_BACKEND='s3', S3_BUCKET='models-bucket', AWS_REGION='us-east-1',
+                       AWS_ACCESS_KEY='testing', AWS_SECRET_KEY='testing',
+                       UPLOAD_LEAF_SIZE=LEAF_SIZE, UPLOAD_PART_SIZE=PART_SIZE)
+        data = os.urandom(300)
+        client = app.test_client()
+        session_id = _create(client)
+        _upload_parts(client, session_id, data)
+        # S3 keeps one copy per part number: another upload of part 1 replaces the recorded one
+        with app.app_context():
+            upload_id = db.session.get(UploadSession, session_id).storage_upload_id
+        s3.upload_part(Bucket='models-bucket', Key='models/m_v1', UploadId=upload_id, PartNumber=1, Body=b'x' * 300)
+
+        response = _complete(client, session_id, data)
+        assert response.status_code == 409
+        assert response.json['missing_parts'] == [1]
+
+        _upload_parts(client, session_id, data)
+        assert _complete(client, session_id, data).status_code == 200
+        assert s3.get_object(Bucket='models-bucket', Key='models/m_v1')['Body'].read() == data
+
+
+def test_cleanup_aborts_abandoned_sessions(app):
+    client = app.test_client()
+    abandoned = _create(client, '1')
+    _put(client, abandoned, 1, os.urandom(PART_SIZE))
+    active = _create(client, '2')
+    _put(client, active, 1, os.urandom(PART_SIZE))
+    with app.app_context():
+        week_ago = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) - datetime.timedelta(days=8)
+        UploadSession.query.filter_by(id=abandoned).update({'updated_at': week_ago, 'created_at': week_ago})
+        UploadPart.query.filter_by(session_id=abandoned).update({'received_at': week_ago})
+        db.session.commit()
+        upload_id = db.session.get(UploadSession, abandoned).storage_upload_id
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['ai-model', 'cleanup-uploads', '--dry-run'])
+    assert f'Would abort upload session {abandoned}' in result.output
+    assert client.get(f'/ai-model/uploads/{abandoned}').json['status'] == 'open'
+
+    result = runner.invoke(args=['ai-model', 'cleanup-uploads'])
+    assert result.exit_code == 0, result.output
+    assert 'Aborted 1 session(s) and 0 orphaned upload(s).' in result.output
+    assert client.get(f'/ai-model/uploads/{abandoned}').json['status'] == 'aborted'
+    assert client.get(f'/ai-model/uploads/{active}').json['status'] == 'open'
+    with app.app_context():
+        assert upload_id not in [upload for _, upload, _ in get_storage().list_multipart_uploads()]
+
+
+def test_cleanup_aborts_multipart_uploads_without_a_session(make_app):
+    boto3 = pytest.importorskip('boto3')
+    moto = pytest.importorskip('moto')
+    with moto.mock_aws():
+        s3 = boto3.client('s3', region_name='us-east-1')
+        s3.create_bucket(Bucket='models-bucket')
+        app = make_app(STORAGE_BACKEND='s3', S3_BUCKET='models-bucket', AWS_REGION='us-east-1',
+                       AWS_ACCESS_KEY='testing', AWS_SECRET_KEY='testing')
+        orphan = s3.create_multipart_upload(Bucket='models-bucket', Key='models/lost_v1')['UploadId']
+
+        result = app.test_cli_runner().invoke(args=['ai-model', 'cleanup-uploads', '--max-age', '0'])
+        assert result.exit_code == 0, result.output
+        assert f'Aborted multipart upload {orphan} of models/lost_v1' in result.output
+        remaining = [upload['UploadId'] for upload in s3.list_multipart_uploads(Bucket='models-bucket').get('Uploads', [])]
+        assert orphan not in remaining